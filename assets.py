@@ -0,0 +1,137 @@
+import hashlib
+import os
+import threading
+
+import data
+
+# Index of the reactor renderings and CFD images, and an on-disk cache of
+# downscaled thumbnails. The index is built once per process and rebuilt only
+# when an asset directory changes (a stat per directory, no listing), so page
+# reruns do no directory scans. Thumbnails are written once per image and width.
+
+ASSETS_DIR = os.path.join(data.APP_DIR, "assets")
+REACTORS_DIR = os.path.join(ASSETS_DIR, "reactors")
+CFD_DIR = os.path.join(ASSETS_DIR, "CFD")
+THUMBNAILS_DIR = os.path.join(ASSETS_DIR, ".thumbnails")
+
+# thumbnails are this many times the display width for high-density screens
+SCALE = 2
+
+_cache = {}
+_lock = threading.Lock()
+
+class AssetIndex:
+    '''
+    Renderings and CFD images per vessel.
+
+    views: (owner, reactor) -> {view: path}, e.g. "iso", "side" (assets/reactors/{owner}_{reactor}_{view}.png)
+    cfd: (owner, reactor) -> sorted list of paths (assets/CFD/{owner}_{reactor}_CFD_{label}.png)
+    '''
+
+    def __init__(self, reactors_dir=REACTORS_DIR, cfd_dir=CFD_DIR):
+        self.views = {}
+        self.cfd = {}
+        for name in _listdir(reactors_dir):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() != ".png" or "_" not in stem:
+                continue
+            # owners have no underscores; reactor names may have spaces
+            owner, rest = stem.split("_", 1)
+            if "_" not in rest:
+                continue
+            reactor, view = rest.rsplit("_", 1)
+            self.views.setdefault((owner, reactor), {})[view] = os.path.join(reactors_dir, name)
+
+        for name in sorted(_listdir(cfd_dir)):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() != ".png" or "_CFD_" not in stem:
+                continue
+            vessel = stem.split("_CFD_", 1)[0]
+            if "_" not in vessel:
+                continue
+            owner, reactor = vessel.split("_", 1)
+            self.cfd.setdefault((owner, reactor), []).append(os.path.join(cfd_dir, name))
+
+    def view(self, owner, reactor, view):
+        '''
+        Path of a vessel rendering, None if there is none
+        '''
+        return self.views.get((owner, reactor), {}).get(view)
+
+    def cfd_images(self, owner, reactor):
+        '''
+        Paths of the CFD images of a vessel
+        '''
+        return self.cfd.get((owner, reactor), [])
+
+def _listdir(path):
+    try:
+        return os.listdir(path)
+    except FileNotFoundError:
+        return []
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return None
+
+def index():
+    '''
+    Asset index, rebuilt only when an asset directory changes.
+    '''
+    key = (_mtime(REACTORS_DIR), _mtime(CFD_DIR))
+    with _lock:
+        cached = _cache.get("index")
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        idx = AssetIndex()
+        _cache["index"] = (key, idx)
+        return idx
+
+def thumbnail(path, width):
+    '''
+    Path of a downscaled copy of an image for display at width [px].
+    Thumbnails are stored in assets/.thumbnails keyed by the image path, its
+    modification time and the width. Returns the original path if the image is
+    already small enough or cannot be downscaled (e.g. Pillow is not installed).
+
+    path: image path
+    width: display width [px]
+    '''
+    mtime = _mtime(path)
+    if mtime is None:
+        return path
+    size = width * SCALE
+    key = hashlib.sha1(f"{os.path.abspath(path)}|{mtime}|{size}".encode()).hexdigest()[:16]
+    thumb = os.path.join(THUMBNAILS_DIR, f"{key}.png")
+
+    with _lock:
+        cached = _cache.get(("thumbnail", key))
+    if cached is not None:
+        return cached
+
+    # decode and resize outside the lock so one slow image does not block other
+    # sessions; concurrent writers of the same thumbnail are safe (atomic rename)
+    result = thumb
+    if not os.path.exists(thumb):
+        try:
+            from PIL import Image
+        except ImportError:
+            return path
+        try:
+            with Image.open(path) as img:
+                if img.width <= size:
+                    result = path
+                else:
+                    img.thumbnail((size, size * img.height // img.width + 1))
+                    os.makedirs(THUMBNAILS_DIR, exist_ok=True)
+                    # write then rename so other readers never see a partial file
+                    tmp = f"{thumb}.{os.getpid()}.{threading.get_ident()}.tmp"
+                    img.save(tmp, format="PNG", optimize=True)
+                    os.replace(tmp, thumb)
+        except OSError:
+            return path
+    with _lock:
+        _cache[("thumbnail", key)] = result
+    return result
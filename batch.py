@@ -0,0 +1,157 @@
+'''
+Batch runner for mixing sensitivity campaigns.
+
+Runs the Damkohler sensitivity sweep for every system x reactor x reaction
+combination in a manifest across a process pool and writes one consolidated
+results file.
+
+Usage:
+    python batch.py manifest.json -o campaign.csv [--workers 8]
+
+Manifest (JSON):
+    {
+        "systems": ["systems/TAK279_lab_system.csv", "systems/TAK279_mfg_system.csv"],
+        "reactors": ["Takeda-EasyMax 102 Pressure", "Cambrex-R-802"],
+        "reactions": ["TAK-279 Step 1 Debenzylation 1"],
+        "C_eff": 1.0,
+        "n_points": 20
+    }
+
+"reactors" may also be "all" for every vessel in the catalog; "reactions" are
+names in reactions.csv; "C_eff" (default 1.0) and "n_points" (default 20) are
+optional.
+
+System paths are relative to the manifest file; a directory stands for all
+the *_system.csv files in it. All system files are read and mixed once, in
+one pass (mixture.read_systems), and each case gets its mixture.
+'''
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import pandas as pd
+
+import core
+import data
+import mixture
+
+def load_systems(paths):
+    '''
+    Mixture properties of system files, read and mixed in one pass
+    (see mixture.read_systems and mixture.mix_systems).
+    Returns {system name: mixture dict}, the name being the file name without extension.
+    '''
+    mixtures = mixture.mix_systems(mixture.read_systems(paths))
+    return {name: row.to_dict() for name, row in mixtures.iterrows()}
+
+def read_manifest(path):
+    '''
+    Read a campaign manifest and expand it into a list of cases.
+    Each case is a (system name, mixture dict, vessel name, reaction name, C_eff, n_points) tuple.
+    '''
+    with open(path) as fh:
+        manifest = json.load(fh)
+
+    base = os.path.dirname(os.path.abspath(path))
+    systems = []
+    for p in manifest["systems"]:
+        p = os.path.join(base, p)
+        # a directory stands for all the system files in it
+        systems.extend(sorted(glob.glob(os.path.join(p, "*_system.csv"))) if os.path.isdir(p) else [p])
+
+    reactors = manifest["reactors"]
+    if reactors == "all":
+        reactors = list(data.reactor_catalog().names)
+
+    reactions = manifest["reactions"]
+    C_eff = float(manifest.get("C_eff", 1.0))
+    n_points = int(manifest.get("n_points", 20))
+
+    mixtures = load_systems(systems)
+    names = [os.path.splitext(os.path.basename(system))[0] for system in systems]
+    return [(name, mixtures[name], vessel, reaction, C_eff, n_points)
+            for name, vessel, reaction in product(names, reactors, reactions)]
+
+def run_case(case):
+    '''
+    Sensitivity sweep for one case. Runs in a worker process, so failures are
+    returned as an error message instead of raised.
+    '''
+    system, mix, vessel, reaction, C_eff, n_points = case
+    label = {"System": system,
+             "Vessel": vessel,
+             "Reaction": reaction}
+    try:
+        reactor_catalog = data.reactor_catalog()
+        record = reactor_catalog.get_by_name(vessel)
+        missing = core.missing_properties(record)
+        if missing:
+            raise ValueError(f"missing reactor properties {missing}")
+        owner, reactor = reactor_catalog.names[vessel]
+        geom = reactor_catalog.geometry(owner, reactor)
+        r = core.reactor_state(record, owner, reactor,
+                               float(record[("Agitation Min", "rpm")]), mix[("Volume", "L")],
+                               geom=geom)
+
+        rxns = data.reactions()
+        k = float(rxns.loc[rxns["Reaction"] == reaction, "Rate"].iloc[0])
+
+        # kLa constants fitted to the vessel's measurements (see kla.py)
+        A, b = data.kla_fits().params(owner, reactor)
+
+        df = core.sensitivity_sweep(r, mix, k * C_eff, n_points=n_points, A=A, b=b, geom=geom)
+        for col, value in reversed(label.items()):
+            df.insert(0, col, value)
+        return df, None
+    except Exception as e:
+        return None, {**label, "Error": f"{type(e).__name__}: {e}"}
+
+def run_campaign(cases, workers=None, chunksize=4):
+    '''
+    Run all cases across a process pool.
+    Returns the consolidated results and a table of failed cases.
+    '''
+    results, errors = [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for df, error in pool.map(run_case, cases, chunksize=chunksize):
+            if error is None:
+                results.append(df)
+            else:
+                errors.append(error)
+
+    results = pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+    return results, pd.DataFrame(errors, columns=["System", "Vessel", "Reaction", "Error"])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run mixing sensitivity sweeps for a campaign manifest.")
+    parser.add_argument("manifest", help="JSON manifest of systems, reactors and reactions")
+    parser.add_argument("-o", "--output", default="campaign_results.csv",
+                        help="consolidated results file (.csv or .parquet)")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="number of worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    cases = read_manifest(args.manifest)
+    start = time.perf_counter()
+    results, errors = run_campaign(cases, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    if args.output.endswith(".parquet"):
+        results.to_parquet(args.output, index=False)
+    else:
+        results.to_csv(args.output, index=False)
+
+    print(f"{len(cases) - len(errors)}/{len(cases)} cases completed in {elapsed:.1f} s -> {args.output}")
+    if not errors.empty:
+        errors_path = os.path.splitext(args.output)[0] + "_errors.csv"
+        errors.to_csv(errors_path, index=False)
+        print(f"{len(errors)} cases failed; see {errors_path}")
+    return 0 if not results.empty else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+'''
+Benchmarks for the correlations and page-level calculations.
+
+Times each case (best of several repeats), measures its peak memory with
+tracemalloc and compares both against a stored baseline. Fixture data come
+from properties/reactors.csv and systems/.
+
+Usage:
+    python bench.py                    # run and compare against bench_baseline.json
+    python bench.py --save-baseline    # run and store the results as the new baseline
+    python bench.py -k sweep           # only cases whose name contains "sweep"
+
+Times are normalized by a fixed numpy calibration workload so a baseline
+recorded on one machine stays usable on another. A case fails if its
+normalized time or its peak memory exceeds the baseline by more than the
+tolerance, also after being re-measured; the exit code is 1 if any case fails.
+Time increases below an absolute floor per call are not counted, so the noise
+of sub-microsecond cases (scalar correlations) does not fail the run.
+'''
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+
+import core
+import data
+import engine as e
+import functions as f
+import mixture
+
+BASELINE_FILE = os.path.join(data.APP_DIR, "bench_baseline.json")
+OUTPUT_FILE = os.path.join(data.APP_DIR, "bench_output.txt")
+SYSTEMS_DIR = os.path.join(data.APP_DIR, "systems")
+
+# array size for the vectorized correlations
+N_ARRAY = 100_000
+# smallest time increase per call counted as a regression [s]
+TIME_FLOOR = 1e-6
+
+# ************************ FIXTURES ************************
+
+def _fixtures():
+    # inputs shared by the cases, built once outside the timings
+    rng = np.random.default_rng(0)
+    catalog = data.reactor_catalog()
+    table = catalog.table
+
+    # complete vessels of the catalog, smallest first
+    complete = [name for name in catalog.names if not core.missing_properties(catalog.get_by_name(name))]
+    complete.sort(key=lambda name: float(catalog.get_by_name(name)[("Volume Max", "L")]))
+    lab, plant = complete[0], complete[-1]
+
+    systems = sorted(os.path.join(SYSTEMS_DIR, name) for name in os.listdir(SYSTEMS_DIR)
+                     if name.endswith("_system.csv"))
+    sys_full = [mixture.complete_system(mixture.read_system(path)) for path in systems]
+    stacked = mixture.read_systems(SYSTEMS_DIR)
+    mix, s = core.split_mixture(mixture.load_mixture(systems[0]))
+
+    owner, reactor = catalog.names[lab]
+    geom = catalog.geometry(owner, reactor)
+    r = core.reactor_state(catalog.get_by_name(lab), owner, reactor,
+                           float(catalog.get_by_name(lab)[("Agitation Min", "rpm")]),
+                           mix[("Volume", "L")], geom=geom)
+
+    return {"table": table,
+            "scales": {"lab": catalog.get_by_name(lab), "commercial": catalog.get_by_name(plant)},
+            "sys_full": sys_full, "stacked": stacked,
+            "mix": mix, "s": s, "r": r, "geom": geom,
+            # random operating points within typical ranges
+            "N": rng.uniform(50, 1000, N_ARRAY),
+            "D": rng.uniform(0.02, 1.5, N_ARRAY),
+            "rho": rng.uniform(700, 1500, N_ARRAY),
+            "mu": rng.uniform(0.3, 50, N_ARRAY),
+            "eps": rng.uniform(0.01, 5, N_ARRAY),
+            "T": rng.uniform(0.05, 3, N_ARRAY)}
+
+# ************************ CASES ************************
+
+def _correlations(x, n):
+    # (name, callable) for the functions.py correlations
+    return [
+        (f"Re_STR {n}", lambda: f.Re_STR(x["rho"], x["D"], x["N"], x["mu"])),
+        (f"power_input {n}", lambda: f.power_input(1.2, x["rho"], x["N"], x["D"])),
+        (f"tm1 {n}", lambda: f.tm1(0.7, 100.0, x["N"], x["D"])),
+        (f"micro_mixing_rate {n}", lambda: f.micro_mixing_rate(x["eps"], 1e-6)),
+        (f"kLa_gas_drawdown {n}", lambda: f.kLa_gas_drawdown(0.07, 0.53, x["eps"], 1.0)),
+        (f"tip_speed {n}", lambda: f.tip_speed(x["N"], x["D"])),
+        (f"Njs_Z {n}", lambda: f.Njs_Z(6.0, 1e-6, x["rho"], 2500.0, 5.0, 1e-4, x["D"])),
+        (f"Njs_GMB {n}", lambda: f.Njs_GMB(8.0, 1.2, x["D"], x["rho"], 2500.0, 2.0, 1e-4, x["D"] / 3)),
+    ]
+
+def cases(fx):
+    '''
+    Benchmark cases as (name, callable, items processed per call)
+    '''
+    scalar = {key: float(fx[key][0]) for key in ["N", "D", "rho", "mu", "eps", "T"]}
+    out = [(name, fn, 1) for name, fn in _correlations(scalar, "scalar")]
+    out += [(name, fn, N_ARRAY) for name, fn in _correlations(fx, "array")]
+
+    dishes = np.resize(np.array(["Hemispherical", "ASME 2:1 Elliptical", "Torispherical", "Flat"]), N_ARRAY)
+    out += [("dish_volume array", lambda: e.dish_volume(dishes, fx["T"], Do=fx["T"] + 0.02, t=10.0,
+                                                        Rk=0.1 * fx["T"]), N_ARRAY),
+            ("mix_system", lambda: [mixture.mix_system(sys_full) for sys_full in fx["sys_full"]],
+             len(fx["sys_full"])),
+            ("mix_systems stacked", lambda: mixture.mix_systems(fx["stacked"]),
+             fx["stacked"].index.get_level_values("System").nunique()),
+            ("sensitivity_sweep", lambda: core.sensitivity_sweep(fx["r"], fx["mix"], 1.0, geom=fx["geom"]), 42),
+            ("scale_sweep", lambda: core.scale_sweep(fx["scales"], fx["mix"][("Density", "kg/m3")], 1.0), 72),
+            ("screen_fleet", lambda: core.screen_fleet(fx["table"], fx["mix"], fx["s"], 1.0),
+             len(fx["table"])),
+            ("monte_carlo", lambda: core.monte_carlo(fx["r"], fx["mix"], fx["s"], 1.0, n_draws=20_000,
+                                                     geom=fx["geom"]), 20_000),
+            ("global_sensitivity", lambda: core.global_sensitivity(fx["r"], fx["mix"], 1.0, n_samples=2**12,
+                                                                   workers=1, geom=fx["geom"]), 2**12 * 9)]
+    return out
+
+# ************************ MEASUREMENT ************************
+
+def calibrate():
+    '''
+    Time [s] of a fixed workload (numpy arrays and scalar arithmetic) used to
+    normalize the case timings
+    '''
+    x = np.linspace(1.0, 2.0, N_ARRAY // 10)
+
+    def workload():
+        np.sum(np.sqrt(x) * np.log(x) + x**0.45)
+        y = 1.0
+        for i in range(2000):
+            y = (y * 1.0001 + i)**0.5
+    return min(timeit.repeat(workload, number=20, repeat=5)) / 20
+
+def measure(fn, min_time=0.2, repeat=5):
+    '''
+    Best time per call [s] and peak traced memory per call [bytes]
+
+    fn: callable to benchmark
+    min_time: minimum duration of each timing run [s]
+    repeat: number of timing runs
+    '''
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+def run(selected=None, names=None):
+    '''
+    Run the benchmark cases.
+
+    selected: substring a case name must contain, default all
+    names: run only these cases, default all
+
+    Returns {"calibration (s)": median calibration time, "cases": {name: results}}.
+    '''
+    fx = _fixtures()
+    results = {}
+    calibrations = []
+    for name, fn, items in cases(fx):
+        if (selected and selected not in name) or (names is not None and name not in names):
+            continue
+        # calibrate next to each case so drifts in machine speed cancel out
+        calibrations.append(calibrate())
+        t, peak = measure(fn)
+        results[name] = {"time (s)": t,
+                         "normalized time": t / calibrations[-1],
+                         "throughput (items/s)": items / t,
+                         "peak memory (bytes)": peak}
+    return {"calibration (s)": float(np.median(calibrations)) if calibrations else np.nan, "cases": results}
+
+def compare(current, baseline, tolerance=0.5, floor=TIME_FLOOR):
+    '''
+    Regressions against a baseline, as a list of messages.
+
+    tolerance: allowed relative increase of normalized time and peak memory [-]
+    floor: time increase per call below which a case does not regress [s]
+    '''
+    regressions = []
+    for name, res in current["cases"].items():
+        base = baseline["cases"].get(name)
+        if base is None:
+            continue
+        # increase of the normalized time back in seconds on this machine
+        excess = (res["normalized time"] - base["normalized time"]) * res["time (s)"] / res["normalized time"]
+        for key in ["normalized time", "peak memory (bytes)"]:
+            if key == "normalized time" and excess <= floor:
+                continue
+            if base[key] > 0 and res[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {res[key]:.4g} vs baseline {base[key]:.4g} "
+                                   f"(+{(res[key] / base[key] - 1) * 100:.0f}%)")
+    return regressions
+
+def report(current, baseline=None):
+    '''
+    Results as a text table, with the change against the baseline if given
+    '''
+    lines = [f"calibration: {current['calibration (s)'] * 1e3:.3f} ms",
+             f"{'case':<28}{'time/call':>14}{'items/s':>14}{'peak MB':>10}{'vs base':>10}"]
+    for name, res in current["cases"].items():
+        change = ""
+        if baseline and name in baseline["cases"]:
+            change = f"{(res['normalized time'] / baseline['cases'][name]['normalized time'] - 1) * 100:+.0f}%"
+        lines.append(f"{name:<28}{res['time (s)'] * 1e6:>11.1f} us{res['throughput (items/s)']:>14.3g}"
+                     f"{res['peak memory (bytes)'] / 1e6:>10.2f}{change:>10}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark correlations and page-level calculations.")
+    parser.add_argument("-k", dest="selected", default=None, help="only run cases whose name contains this")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline results file (JSON)")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed relative increase over the baseline (default 0.5 = 50%%)")
+    parser.add_argument("--floor", type=float, default=TIME_FLOOR * 1e6,
+                        help="smallest time increase per call counted as a regression [us] (default 1)")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="times a regressed case is re-measured before it fails (default 2)")
+    parser.add_argument("-o", "--output", default=OUTPUT_FILE, help="text report file")
+    args = parser.parse_args(argv)
+
+    current = run(args.selected)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+    if args.save_baseline:
+        # cases not run this time keep their stored results
+        saved = {"calibration (s)": current["calibration (s)"],
+                 "cases": {**(baseline["cases"] if baseline else {}), **current["cases"]}}
+        with open(args.baseline, "w") as fh:
+            json.dump(saved, fh, indent=2)
+        baseline = None
+
+    regressions = compare(current, baseline, args.tolerance, args.floor / 1e6) if baseline else []
+    # re-measure failing cases to rule out a momentary slowdown; keep the best runs
+    for _ in range(args.retries):
+        if not regressions:
+            break
+        failing = [name for name in current["cases"] if any(msg.startswith(f"{name}:") for msg in regressions)]
+        retry = run(names=failing)
+        for name, res in retry["cases"].items():
+            if res["normalized time"] < current["cases"][name]["normalized time"]:
+                current["cases"][name] = res
+        regressions = compare(current, baseline, args.tolerance, args.floor / 1e6)
+
+    text = report(current, baseline)
+    if regressions:
+        text += "\n\nREGRESSIONS\n" + "\n".join(regressions)
+    with open(args.output, "w") as fh:
+        fh.write(text + "\n")
+    print(text)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,8 @@ import pandas as pd
 import functions as fx
 # import inspect
 import plotly.express as px
+import core
+import semibatch
 
 st.title("Bourne Protocol")
 
@@ -329,4 +331,42 @@ if st.session_state.bourne_3_done:
                   x=st.session_state.bourne_3_conditions.index, y="KPI", title="KPI vs Feed Location")
     st.plotly_chart(fig)
     
-st.divider()
\ No newline at end of file
+st.divider()
+
+# ************************ IN-SILICO PRE-SCREEN ************************
+
+st.subheader("In-silico Pre-screen")
+st.write("Predicted KPI (yield of the secondary product, X_S) at the conditions of each step, "
+         "from a semi-batch simulation of the Bourne reactions with engulfment micromixing (see semibatch.py).")
+
+with st.expander("Simulation inputs"):
+    sim1, sim2 = st.columns(2)
+    k1 = sim1.number_input("k1 [m3/mol/s]", value=semibatch.K1, min_value=0.0, format="%.4g")
+    k2 = sim2.number_input("k2 [m3/mol/s]", value=semibatch.K2, min_value=0.0, format="%.4g")
+    c_A0 = sim1.number_input("Initial concentration of A [mol/m3]", value=semibatch.C_A0, min_value=0.0,
+                             format="%.4g")
+    feed_ratio = sim2.number_input("Fed volume / initial volume [-]", value=semibatch.FEED_RATIO,
+                                   min_value=0.001, format="%.4g")
+    sim_location = sim1.selectbox("Feed location (Steps 1 and 2)", list(semibatch.FEED_LOCATIONS))
+
+if st.button("Simulate Protocol"):
+    mix = core.split_mixture(st.session_state.mixture)[0]
+    geom = st.session_state['reactor_catalog'].geometry(r[("Owner", "-")], r[("Reactor", "-")])
+    try:
+        predicted = semibatch.protocol(r, mix, st.session_state.bourne_rpm[1], st.session_state.bourne_volume[1],
+                                       feed_mid, PV_factor=PV_factor, feed_factor=feed_factor,
+                                       location=sim_location, k1=k1, k2=k2, c_A0=c_A0,
+                                       feed_ratio=feed_ratio, geom=geom)
+    except (ImportError, RuntimeError) as err:
+        st.error(f"Simulation failed: {err}")
+    else:
+        # same 10% criterion as the measured KPIs, relative to the step's reference condition
+        for step, (ref, title, sensitive) in {1: ("P/V", "Stir Speed", "Mixing Sensitive"),
+                                             2: ("Q", "Feed Rate", "Feed Rate Sensitive"),
+                                             3: ("Surface", "Feed Location", "Mesomixing Sensitive")}.items():
+            df = predicted[step]
+            kpi_ref = df.loc[ref, "X_S"]
+            is_sensitive = bool((abs(df["X_S"] - kpi_ref) / kpi_ref > 0.1).any())
+            st.metric(f"Step {step} Prediction ({title})", sensitive if is_sensitive else f"Not {sensitive}",
+                      border=True)
+            st.dataframe(df)
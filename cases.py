@@ -0,0 +1,158 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+# Columnar store for the mixing cases added to the report.
+# Each column is a Python list, so adding a case is an O(1) append; the report
+# table is built once per change instead of concatenating one frame per case.
+
+# report columns and dtypes, one row per case
+COLUMNS = {
+    "Case": str,
+    "Owner": str,
+    "Reactor": str,
+    "Agitation Speed (rpm)": float,
+    "Agitation Max (rpm)": float,
+    "Liquid Volume (L)": float,
+    "Solid Loading (%)": float,
+    "Njs Zwietering (rpm)": float,
+    "N/Njs Zwietering": float,
+    "Suspension Zwietering": str,
+    "Njs GMB (rpm)": float,
+    "N/Njs GMB": float,
+    "Suspension GMB": str,
+    "Reynolds": float,
+    "Flow Regime": str,
+    "Agitator Power (W)": float,
+    "kLa (1/s)": float,
+    "Da II": float,
+    "Mass Transfer": str,
+    "Mixing Time bulk (s)": float,
+    "Micro-mixing Time (s)": float,
+    "Nmin Gassing (rpm)": float,
+    "N/Nmin Gassing": float,
+    "Gassing": str,
+}
+
+class CaseStore:
+    '''
+    Append-only table of mixing cases.
+
+    append() adds one case; to_frame() and to_parquet() return the typed table
+    (cached until the next append); flush() writes only the cases added since
+    the last flush.
+    '''
+
+    def __init__(self):
+        self._columns = {col: [] for col in COLUMNS}
+        self._frame = None
+        self._parquet = None
+        # (path, number of cases written) of the last flush
+        self._flushed = (None, 0)
+
+    def __len__(self):
+        return len(self._columns["Case"])
+
+    def append(self, **values):
+        '''
+        Add one case. Missing columns are left empty.
+        '''
+        unknown = set(values) - set(COLUMNS)
+        if unknown:
+            raise KeyError(f"unknown report columns {sorted(unknown)}")
+        for col, values_col in self._columns.items():
+            values_col.append(values.get(col))
+        self._frame = self._parquet = None
+
+    def add_case(self, r, s, res):
+        '''
+        Add a mixing case from the reactor state, solids and MixingResult.
+
+        r: reactor state dict
+        s: solid properties dict with loading (empty if no solids)
+        res: core.MixingResult
+        '''
+        self.append(**{"Case": f"{r[('Reactor', '-')]}_{len(self) + 1}",
+                       "Owner": r[("Owner", "-")],
+                       "Reactor": r[("Reactor", "-")],
+                       "Agitation Speed (rpm)": r[("Impeller Speed", "rpm")],
+                       "Agitation Max (rpm)": res.rpm_max,
+                       "Liquid Volume (L)": r[("Liquid Volume", "L")],
+                       "Solid Loading (%)": s[("Loading", "%")] if s else 0,
+                       "Njs Zwietering (rpm)": res.Njs_Z,
+                       "N/Njs Zwietering": res.sus_frac_Z,
+                       "Suspension Zwietering": res.sus_cond_Z,
+                       "Njs GMB (rpm)": res.Njs_GMB,
+                       "N/Njs GMB": res.sus_frac_GMB,
+                       "Suspension GMB": res.sus_cond_GMB,
+                       "Reynolds": res.Re,
+                       "Flow Regime": res.flow_regime,
+                       "Agitator Power (W)": res.P,
+                       "kLa (1/s)": res.kla,
+                       "Da II": res.Da_2,
+                       "Mass Transfer": res.Da_2_result,
+                       "Mixing Time bulk (s)": res.tm_bulk,
+                       "Micro-mixing Time (s)": res.tm_micro,
+                       "Nmin Gassing (rpm)": res.Nmin_gd,
+                       "N/Nmin Gassing": res.gd_frac,
+                       "Gassing": res.gassing_cond})
+
+    def _rows(self, start=0):
+        # typed frame of the cases from start onwards
+        data = {}
+        for col, dtype in COLUMNS.items():
+            values = self._columns[col][start:]
+            if dtype is float:
+                data[col] = np.array([np.nan if v is None else v for v in values], dtype=float)
+            else:
+                data[col] = pd.array(values, dtype="string")
+        return pd.DataFrame(data)
+
+    def to_frame(self):
+        '''
+        Report table, one row per case
+        '''
+        if self._frame is None:
+            self._frame = self._rows()
+        return self._frame
+
+    def to_parquet(self, path=None):
+        '''
+        Write the report as Parquet; returns the bytes if no path is given.
+        '''
+        if path is None:
+            # cached until the next append
+            if self._parquet is None:
+                buffer = io.BytesIO()
+                self.to_frame().to_parquet(buffer, index=False)
+                self._parquet = buffer.getvalue()
+            return self._parquet
+        self.to_frame().to_parquet(path, index=False)
+
+    def flush(self, path):
+        '''
+        Write the cases added since the last flush to path.
+
+        CSV files are appended to. Other paths are Parquet datasets (directories)
+        that get one new part file per flush. The first flush to a path replaces it.
+        '''
+        last_path, written = self._flushed
+        if path != last_path:
+            written = 0
+        rows = self._rows(written)
+
+        if path.endswith(".csv"):
+            rows.to_csv(path, mode="a" if written else "w", header=not written, index=False)
+        else:
+            os.makedirs(path, exist_ok=True)
+            if not written:
+                for name in os.listdir(path):
+                    if name.startswith("part-") and name.endswith(".parquet"):
+                        os.remove(os.path.join(path, name))
+            if len(rows):
+                rows.to_parquet(os.path.join(path, f"part-{written:08d}.parquet"), index=False)
+
+        self._flushed = (path, len(self))
+        return len(rows)
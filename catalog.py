@@ -0,0 +1,88 @@
+import pandas as pd
+
+import geometry
+
+# Reactor catalog built once from the long-format reactors table
+# (owner, reactor, property, units, value) so lookups by vessel or scale
+# do not filter the whole table.
+
+class ReactorCatalog:
+    '''
+    Indexed reactor database.
+
+    records: (owner, reactor) -> {(property, units): value} with numbers as floats
+    table: one row per vessel indexed by (owner, reactor), columns (property, units),
+           numeric properties typed as float
+    '''
+
+    def __init__(self, df_reactors):
+        df = df_reactors.drop_duplicates(subset=["owner", "reactor", "property", "units"], keep="last")
+
+        # pivot to one row per vessel, keeping file order of vessels and properties
+        vessels = pd.MultiIndex.from_frame(df[["owner", "reactor"]].drop_duplicates())
+        wide = df.pivot(index=["owner", "reactor"], columns=["property", "units"], values="value")
+        wide = wide.reindex(index=vessels,
+                            columns=pd.MultiIndex.from_frame(df[["property", "units"]].drop_duplicates()))
+
+        # type numeric properties
+        for col in wide.columns:
+            numeric = pd.to_numeric(wide[col], errors="coerce")
+            if numeric.notna().sum() == wide[col].notna().sum():
+                wide[col] = numeric.astype(float)
+        wide.columns.names = ["Property", "Units"]
+        self.table = wide
+
+        # vessel records keep only the properties listed for that vessel (empty values as NaN)
+        listed = set(zip(df["owner"], df["reactor"], df["property"], df["units"]))
+        self.records = {}
+        for (owner, reactor), row in zip(wide.index, wide.itertuples(index=False)):
+            self.records[(owner, reactor)] = {key: value for key, value in zip(wide.columns, row)
+                                              if (owner, reactor) + key in listed}
+
+        self.names = {f"{owner}-{reactor}": (owner, reactor) for owner, reactor in wide.index}
+
+        self._owners = {}
+        for owner, reactor in wide.index:
+            self._owners.setdefault(owner, []).append(reactor)
+
+        self._scales = {}
+        for (owner, reactor), record in self.records.items():
+            scale = record.get(("Scale", "-"))
+            if isinstance(scale, str):
+                self._scales.setdefault(scale, []).append(f"{owner}-{reactor}")
+
+        # derived geometry, built on first use per vessel
+        self._geometry = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, key):
+        return key in self.records or key in self.names
+
+    def owners(self):
+        '''List of reactor owners/CMOs'''
+        return list(self._owners)
+
+    def reactors(self, owner):
+        '''List of reactor names for an owner'''
+        return list(self._owners.get(owner, []))
+
+    def by_scale(self, scale):
+        '''List of vessel names (owner-reactor) at a scale, e.g. "lab" or "commercial"'''
+        return list(self._scales.get(scale, []))
+
+    def get(self, owner, reactor):
+        '''Reactor record as {(property, units): value}'''
+        return dict(self.records[(owner, reactor)])
+
+    def get_by_name(self, name):
+        '''Reactor record by vessel name (owner-reactor)'''
+        return self.get(*self.names[name])
+
+    def geometry(self, owner, reactor):
+        '''Derived vessel geometry (see geometry.VesselGeometry), memoized per vessel'''
+        key = (owner, reactor)
+        if key not in self._geometry:
+            self._geometry[key] = geometry.VesselGeometry(self.records[key])
+        return self._geometry[key]
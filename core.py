@@ -0,0 +1,1205 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+import pandas as pd
+
+import functions as f
+import engine as e
+import geometry
+
+# UI-free mixing calculations. The Streamlit pages build their inputs from
+# session state, call into here and only handle display.
+
+# minimum properties a reactor record needs for the mixing calculations
+MIN_PROPS = [('Internal Diameter', 'm'),
+             ('Height (tan-tan)', 'm'),
+             ('Bottom Dish Type', '-'),
+             ('Impeller Count', '#'),
+             ('Top Dish Type', '-'),
+             ('Agitation Min', 'rpm'),
+             ('Agitation Max', 'rpm'),
+             ('Impeller 1 Diameter', 'm'),
+             ('Impeller 1 Clearance', 'm'),
+             ('Impeller 1 Height', 'm'),
+             ('Zwietering S parameter', '-'),
+             ('GMB z parameter', '-'),
+             ('Volume Min', 'L'),
+             ('Volume Max', 'L'),
+             ('Impeller 1 Np', '-')]
+
+# ************************ INPUTS ************************
+
+def split_mixture(all_props):
+    '''
+    Get the mixture and (first) solid rows of a mixture table as dicts.
+    The solid dict gets its loading [%] added and is empty if there are no solids.
+    '''
+    mix = all_props[all_props["Compound"] == "Mixture"].to_dict('records')[0]
+    if "Solid" in all_props["Phase"].values:
+        s = all_props[all_props["Phase"] == "Solid"].to_dict('records')[0]
+        s[("Loading", "%")] = s[('Mass', 'kg')] / mix[('Mass', 'kg')] * 100
+    else:
+        s = {}
+    return mix, s
+
+def missing_properties(r):
+    '''
+    List the minimum required reactor properties that are absent or empty.
+    '''
+    missing = []
+    for key in MIN_PROPS:
+        value = r.get(key)
+        if (value == '') or (value is None) or (pd.isna(value)):
+            missing.append(key)
+    return missing
+
+def reactor_state(record, owner, reactor, rpm, V_liquid, geom=None):
+    '''
+    Build the reactor state dict used by every page from a reactor record.
+
+    record: dict of (property, units) -> value
+    rpm: impeller speed [rpm]
+    V_liquid: liquid volume [L]
+    geom: derived vessel geometry (e.g. ReactorCatalog.geometry); built from the record if None
+    '''
+    r = dict(record)
+    r[("Owner", "-")] = owner
+    r[("Reactor", "-")] = reactor
+    r[('Impeller Speed', 'rpm')] = rpm
+    r[("Name", "-")] = f"{owner}-{reactor}"
+
+    # ensure type float where possible
+    for key, value in r.items():
+        try:
+            r[key] = float(value)
+        except (TypeError, ValueError):
+            pass
+
+    if geom is None:
+        geom = geometry.VesselGeometry(r)
+
+    # dish volume [m3]
+    r[('Dish Volume', 'm3')] = geom.V_dish
+
+    # get fill volume from defined mixture
+    r[('Liquid Volume', 'L')] = V_liquid
+
+    # cylinder cross sectional area [m2]
+    r[('Area', 'm2')] = geom.area
+
+    # liquid height [m]
+    r[('Liquid Height', 'm')] = float(geom.liquid_height(V_liquid))
+
+    # highest impeller with level above clearance plus half blade height
+    r[("Impellers submerged", "")] = int(geom.impellers_submerged(V_liquid))
+
+    return r
+
+# ************************ CLASSIFICATION ************************
+
+def suspension_condition(frac):
+    '''
+    Suspension state from the ratio of stir speed to Njs [-]
+    '''
+    if frac >= 1.2:
+        return "Suspended"
+    elif frac >= 1.0:
+        return "Just Suspended"
+    elif frac >= 0.8:
+        return "Maybe Suspended"
+    return "Not Suspended"
+
+def gassing_condition(frac):
+    '''
+    Gas drawdown state from the ratio of stir speed to Nmin [-]
+    '''
+    if frac >= 1.0:
+        return "Gas drawdown"
+    elif frac >= 0.8:
+        return "Possible gas drawdown"
+    return "No gas drawdown"
+
+def mass_transfer_condition(Da_2):
+    '''
+    Rate-limiting step from Da II (reaction/mass transfer) [-]
+    '''
+    if Da_2 > 10:
+        return "Mass Transfer Limited"
+    elif Da_2 < 0.1:
+        return "Kinetically Limited"
+    return "Intermediate"
+
+# ************************ SINGLE CASE ************************
+
+@dataclass
+class MixingResult:
+    '''
+    Results of a single mixing case at the reactor set point.
+    Values that could not be calculated are 0.0 (Njs) or NaN; the reasons are in errors.
+    '''
+    Nsp: float
+    rpm_max: float
+    impeller_diameter: float
+    Njs_Z: float = 0.0
+    sus_frac_Z: float = 0.0
+    sus_cond_Z: str = "Error"
+    Njs_GMB: float = 0.0
+    sus_frac_GMB: float = 0.0
+    sus_cond_GMB: str = "Error"
+    Re: float = math.nan
+    flow_regime: str = ""
+    P: float = math.nan
+    kla: float = math.nan
+    Da_2: float = math.nan
+    Da_2_result: str = ""
+    tm_bulk: float = math.nan
+    tm_micro: float = math.nan
+    Nmin_gd: float | None = None
+    gd_frac: float | None = None
+    gassing_cond: str = ""
+    errors: list = field(default_factory=list)
+
+    @property
+    def rpm_frac_max(self):
+        '''Headroom to maximum agitation [%]'''
+        return (self.rpm_max - self.Nsp) / self.Nsp * 100
+
+    @property
+    def Nmin_gd_delta(self):
+        '''Margin between maximum agitation and gas drawdown speed [%]'''
+        return (self.rpm_max - self.Nmin_gd) / self.rpm_max * 100
+
+def just_suspended_speeds(r, mix, s, geom):
+    '''
+    Just suspended speeds of the bottom impeller [rpm] by Zwietering and GMB.
+    A speed that cannot be calculated is 0.0; the reasons are in the returned errors.
+
+    r: reactor state dict
+    mix: mixture properties dict
+    s: solid properties dict with loading (empty if no solids)
+    geom: derived vessel geometry
+
+    Returns (Njs Zwietering, Njs GMB, errors).
+    '''
+    Njs_Z, Njs_GMB, errors = 0.0, 0.0, []
+    # kinematic viscosity [m2/s]
+    nu = mix[("Kinematic Viscosity", "m2/s")]
+    # liquid density [kg/m3]
+    rho_L = mix[("Density", "kg/m3")]
+    D_bottom = geom.impeller_diameters[0]
+
+    solids_ok = False
+    try:
+        # solid density [kg/m3]
+        rho_S = s[("Density", "kg/m3")]
+        if math.isnan(rho_S):
+            raise ValueError("Solid density is NaN. Did you forget to add a density value?")
+        # particle diameter [m]
+        d_P = s[("Particle Size", "um")] / 1e6
+        solids_ok = True
+    except ValueError as ex:
+        errors.append(str(ex))
+        errors.append("Error with solids properties.")
+    except (KeyError, TypeError):
+        errors.append("Error with solids properties.")
+
+    # Zwietering
+    try:
+        if not solids_ok:
+            raise ValueError
+        S = float(r[("Zwietering S parameter", "-")])
+        # solid mass ratio mS/mL*100 [%]
+        X = s[("Loading", "%")]
+        Njs_Z = f.Njs_Z(S, nu, rho_L, rho_S, X, d_P, D_bottom) * 60
+        if not Njs_Z > 0:
+            raise ValueError
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        Njs_Z = 0.0
+        errors.append("Error calculating Njs (Zwietering). Check system properties and Zwietering parameter.")
+
+    # GMB
+    try:
+        if not solids_ok:
+            raise ValueError
+        z = float(r[("GMB z parameter", "-")])
+        Po = geom.impeller_Np[0]
+        C = geom.impeller_clearances[0]
+        # solids volume fraction Vsol/Vslurry [%]
+        Xv = s[("Volume", "L")]/mix[("Volume", "L")]*100
+        Njs_GMB = f.Njs_GMB(z, Po, D_bottom, rho_L, rho_S, Xv, d_P, C) * 60
+        if not Njs_GMB > 0:
+            raise ValueError
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        Njs_GMB = 0.0
+        errors.append("Error calculating Njs (GMB). Check system properties and GMB parameters.")
+
+    return float(Njs_Z), float(Njs_GMB), errors
+
+def mixing_case(r, mix, s, r_rxn, gas_drawdown=False, rpm_max=None, A=0.07, b=0.53, geom=None):
+    '''
+    Mixing calculations for a reactor at its set point.
+    Power is summed over the submerged impellers, suspension is for the bottom
+    impeller and gas drawdown for the top submerged impeller.
+
+    r: reactor state dict (see reactor_state)
+    mix: mixture properties dict
+    s: solid properties dict with loading (empty if no solids)
+    r_rxn: reaction rate [1/s]
+    gas_drawdown: calculate minimum speed for gas drawdown
+    rpm_max: maximum agitation [rpm], default from reactor
+    A, b: kLa_gas_drawdown constants [-]
+    geom: derived vessel geometry (e.g. ReactorCatalog.geometry); built from r if None
+    '''
+    # dynamic viscosity [mPa.s]
+    mu = mix[("Dynamic Viscosity", "mPa.s")]
+    # kinematic viscosity [m2/s]
+    nu = mix[("Kinematic Viscosity", "m2/s")]
+    # liquid density [kg/m3]
+    rho_L = mix[("Density", "kg/m3")]
+    # liquid volume [L]
+    V_l = mix[("Volume", "L")]
+    # stir speed [rpm]
+    Nsp = r[("Impeller Speed", "rpm")]
+
+    if rpm_max is None:
+        rpm_max = float(r[("Agitation Max", "rpm")])
+    if geom is None:
+        geom = geometry.VesselGeometry(r)
+
+    # impeller diameter for Re and mixing time; largest submerged impeller
+    impeller_diameter = float(e.largest_powered(geom.impeller_diameters, geom.powered(V_l)))
+
+    res = MixingResult(Nsp=Nsp, rpm_max=rpm_max, impeller_diameter=impeller_diameter)
+
+    # *************** SUSPENSION CALCS ***************
+
+    res.Njs_Z, res.Njs_GMB, errors = just_suspended_speeds(r, mix, s, geom)
+    res.errors.extend(errors)
+    if res.Njs_Z > 0:
+        res.sus_frac_Z = Nsp / res.Njs_Z
+        res.sus_cond_Z = suspension_condition(res.sus_frac_Z)
+    if res.Njs_GMB > 0:
+        res.sus_frac_GMB = Nsp / res.Njs_GMB
+        res.sus_cond_GMB = suspension_condition(res.sus_frac_GMB)
+
+    # ************* HYDRODYNAMICS, MASS TRANSFER, MIXING TIMES *************
+
+    # default to vortexing
+    gassing_system = "vortexing"
+    hyd = e.evaluate(Nsp, V_l, rho_L, mu, nu,
+                     Po=geom.impeller_Np, D=geom.impeller_diameters,
+                     T=r[("Internal Diameter", "m")], H=r[("Liquid Height", "m")],
+                     A=A, b=b, C=geom.impeller_clearances, V_cover=geom.cover_volumes,
+                     gas_drawdown=gas_drawdown, gassing_system=gassing_system)
+
+    res.Re = float(hyd["Re"])
+    res.flow_regime = str(hyd["Flow Regime"])
+    res.P = float(hyd["P"])
+    res.kla = float(hyd["kla"])
+    res.tm_bulk = float(hyd["tm_bulk"])
+    res.tm_micro = float(hyd["tm_micro"])
+
+    # ************* GAS DRAWDOWN *************
+
+    if gas_drawdown:
+        res.Nmin_gd = float(hyd["Nmin_gd"])
+        res.gd_frac = Nsp / res.Nmin_gd
+        res.gassing_cond = gassing_condition(res.gd_frac)
+
+    return with_reaction(res, r_rxn)
+
+def with_reaction(res, r_rxn):
+    '''
+    Copy of a mixing case with the Damkohler numbers for a reaction rate.
+    The hydrodynamics do not depend on the reaction, so a new rate only needs this step.
+
+    res: MixingResult
+    r_rxn: reaction rate [1/s]
+    '''
+    # (2) reaction rate vs mass transfer
+    Da_2 = r_rxn / res.kla
+    return replace(res, Da_2=Da_2, Da_2_result=mass_transfer_condition(Da_2), errors=list(res.errors))
+
+# ************************ SWEEPS ************************
+
+def _damkohler(r, mix, r_rxn, V, N, geom, A=0.07, b=0.53):
+    # Damkohler numbers at fill volume(s) V [L] and agitation speed(s) N [rpm]
+    # (broadcast against each other, and against mixture properties given as arrays)
+    # for the sensitivity sweeps and boundary search. Evaluated with engine.evaluate,
+    # as the single case: power per unit mass, liquid height at each fill volume and
+    # the mixing time correlation of the flow regime.
+    V = np.asarray(V, dtype=float)
+    rho = np.asarray(mix[("Density", "kg/m3")], dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        res = e.evaluate(N, V, rho, np.asarray(mix[("Dynamic Viscosity", "mPa.s")], dtype=float),
+                         np.asarray(mix[("Kinematic Viscosity", "m2/s")], dtype=float),
+                         Po=geom.impeller_Np, D=geom.impeller_diameters,
+                         T=geom.T, H=geom.liquid_height(V), A=A, b=b,
+                         V_cover=geom.cover_volumes, r_rxn=r_rxn)
+
+    # Da_micro: micromixing time vs reaction time (Da_micro = tmicro / trxn)
+    # Da_macro: macromixing time vs reaction time (Da_macro = tmacro / trxn)
+    # Da_massT: mass transfer time vs reaction time (Da_massT = tmassT / trxn); tmassT = 1/kla
+    return {"P": res["P"], "M": V * rho / 1000, "kla": res["kla"],
+            "tmicro": res["tm_micro"], "tmacro": res["tm_bulk"],
+            "Da_micro": res["Da_micro"], "Da_macro": res["Da_macro"], "Da_massT": res["Da_massT"]}
+
+def sensitivity_sweep(r, mix, r_rxn, n_points=20, A=0.07, b=0.53, geom=None):
+    '''
+    Damkohler numbers over the agitation range at minimum and maximum fill.
+
+    r: reactor state dict
+    mix: mixture properties dict
+    r_rxn: reaction rate [1/s]
+    n_points: number of agitation intervals
+    geom: derived vessel geometry; built from r if None
+    '''
+    if geom is None:
+        geom = geometry.VesselGeometry(r)
+
+    # get reactor and system properties from state variables
+    Vmin = float(r[('Volume Min', 'L')])
+    Vmax = float(r[('Volume Max', 'L')])
+    Nmin = float(r[('Agitation Min', 'rpm')])
+    Nmax = float(r[('Agitation Max', 'rpm')])
+
+    N_range = np.linspace(Nmin, Nmax, n_points + 1)
+
+    V_series = ['Vmin', 'Vmax']
+    V_vals = [Vmin, Vmax]
+
+    # evaluate the whole volume x agitation grid in one pass
+    V, N = e.grid(V_vals, N_range)
+    res = _damkohler(r, mix, r_rxn, V, N, geom, A=A, b=b)
+    P, M = res["P"], res["M"]
+
+    # **************** Rxn vs Heat Transfer *****************
+    Da_heatT = None
+
+    shape = np.broadcast_shapes(V.shape, N.shape)
+    return pd.DataFrame({"Series": np.repeat(V_series, len(N_range)),
+                         "Volume (L)": np.broadcast_to(V, shape).ravel(),
+                         "Agitation (rpm)": np.broadcast_to(N, shape).ravel(),
+                         "P/M (W/kg)": (P/M).ravel(),
+                         "P/V (W/m3)": (P/(V/1000)).ravel(),
+                         "kla (1/s)": res["kla"].ravel(),
+                         "tmicro (s)": res["tmicro"].ravel(),
+                         "tmacro (s)": res["tmacro"].ravel(),
+                         "Da_micro": res["Da_micro"].ravel(),
+                         "Da_macro": res["Da_macro"].ravel(),
+                         "Da_massT": res["Da_massT"].ravel(),
+                         "Da_heatT": Da_heatT})
+
+def temperature_sweep(r, mix_T, T, r_rxn, N=None, n_points=20, A=0.07, b=0.53, geom=None):
+    '''
+    Damkohler numbers over temperature and agitation at minimum and maximum fill.
+
+    r: reactor state dict
+    mix_T: mixture properties at each temperature, {(property, units): array over T}
+           (see materials.MaterialProperties.mixture_at)
+    T: temperatures [degC]
+    r_rxn: reaction rate [1/s]
+    N: agitation speeds [rpm], default n_points intervals over the agitation range
+    geom: derived vessel geometry; built from r if None
+    '''
+    if geom is None:
+        geom = geometry.VesselGeometry(r)
+    if N is None:
+        N = np.linspace(float(r[('Agitation Min', 'rpm')]), float(r[('Agitation Max', 'rpm')]), n_points + 1)
+
+    V_series = ['Vmin', 'Vmax']
+    # volume x temperature x agitation grid
+    V, T, N = e.grid([float(r[('Volume Min', 'L')]), float(r[('Volume Max', 'L')])], T, N)
+    mix = {key: np.asarray(value, dtype=float)[None, :, None] for key, value in mix_T.items()}
+    res = _damkohler(r, mix, r_rxn, V, N, geom, A=A, b=b)
+
+    shape = np.broadcast_shapes(V.shape, T.shape, N.shape)
+    out = {"Series": np.repeat(V_series, shape[1] * shape[2]),
+           "Volume (L)": np.broadcast_to(V, shape).ravel(),
+           "Temperature (C)": np.broadcast_to(T, shape).ravel(),
+           "Agitation (rpm)": np.broadcast_to(N, shape).ravel(),
+           "Density (kg/m3)": np.broadcast_to(mix[("Density", "kg/m3")], shape).ravel(),
+           "Dynamic Viscosity (mPa.s)": np.broadcast_to(mix[("Dynamic Viscosity", "mPa.s")], shape).ravel(),
+           "kla (1/s)": np.broadcast_to(res["kla"], shape).ravel(),
+           "tmicro (s)": np.broadcast_to(res["tmicro"], shape).ravel(),
+           "tmacro (s)": np.broadcast_to(res["tmacro"], shape).ravel()}
+    for key in ["Da_micro", "Da_macro", "Da_massT"]:
+        out[key] = np.broadcast_to(res[key], shape).ravel()
+    return pd.DataFrame(out)
+
+DA_KEYS = ["Da_micro", "Da_macro", "Da_massT"]
+
+def _critical_rpm(r, mix, r_rxn, V, Nmin, Nmax, tol, geom, A, b):
+    # lowest agitation [rpm] with Da <= 1 at each fill volume, by simultaneous
+    # bisection over all volumes and Damkohler numbers (each Da falls with rpm).
+    # Returns {Da key: rpm array} (NaN where Da > 1 up to Nmax or Da cannot be evaluated),
+    # {Da key: cannot be evaluated} and the number of evaluations.
+    V = np.asarray(V, dtype=float)
+    lo = {key: np.full(V.shape, Nmin) for key in DA_KEYS}
+    hi = {key: np.full(V.shape, Nmax) for key in DA_KEYS}
+
+    ends = _damkohler(r, mix, r_rxn, V[:, None], np.array([Nmin, Nmax]), geom, A=A, b=b)
+    n_evals = 2 * V.size
+    # Da cannot be evaluated even at Nmax (e.g. laminar flow throughout, no submerged impeller
+    # or fill within the bottom dish); below a speed where it can, an unknown Da is laminar
+    # flow without a mixing time correlation and counts as limited
+    unknown = {key: np.isnan(ends[key][:, 1]) for key in DA_KEYS}
+    # limited at every speed: no crossover; never limited: boundary at Nmin
+    always = {key: ends[key][:, 1] > 1 for key in DA_KEYS}
+    never = {key: ends[key][:, 0] <= 1 for key in DA_KEYS}
+
+    n_iter = max(int(np.ceil(np.log2((Nmax - Nmin) / tol))), 0) if Nmax > Nmin else 0
+    for _ in range(n_iter):
+        # one evaluation per volume serves all Damkohler numbers at their own midpoints
+        mids = {key: (lo[key] + hi[key]) / 2 for key in DA_KEYS}
+        N_mid = np.stack([mids[key] for key in DA_KEYS], axis=1)
+        res = _damkohler(r, mix, r_rxn, V[:, None], N_mid, geom, A=A, b=b)
+        n_evals += N_mid.size
+        for i, key in enumerate(DA_KEYS):
+            above = ~(res[key][:, i] <= 1)
+            lo[key] = np.where(above, mids[key], lo[key])
+            hi[key] = np.where(above, hi[key], mids[key])
+
+    N_crit = {key: np.where(always[key] | unknown[key], np.nan, np.where(never[key], Nmin, hi[key]))
+              for key in DA_KEYS}
+    return N_crit, unknown, n_evals
+
+def da_boundary(r, mix, r_rxn, tol=1.0, max_depth=4, A=0.07, b=0.53, geom=None):
+    '''
+    Locate the Da = 1 boundary in fill volume x agitation space.
+
+    The critical agitation at each volume is found by bisection to within tol.
+    Starting from Vmin and Vmax, volume intervals are halved wherever the critical
+    agitation of any Damkohler number changes by more than tol across the interval,
+    up to max_depth times.
+
+    r: reactor state dict
+    mix: mixture properties dict
+    r_rxn: reaction rate [1/s]
+    tol: agitation tolerance [rpm]
+    max_depth: maximum number of volume refinements
+    geom: derived vessel geometry; built from r if None
+
+    Returns one row per volume and Damkohler number with the lowest agitation
+    at which Da <= 1 ("N at Da=1 (rpm)") and its Status: "Not limited" (Da <= 1
+    at minimum agitation), "Limited below" (Da > 1, or laminar without a mixing
+    time, below the boundary), "Limited" (Da > 1 up to maximum agitation) or
+    "No data" (Da cannot be evaluated at maximum agitation); and the number of
+    model evaluations used.
+    '''
+    Vmin = float(r[('Volume Min', 'L')])
+    Vmax = float(r[('Volume Max', 'L')])
+    Nmin = float(r[('Agitation Min', 'rpm')])
+    Nmax = float(r[('Agitation Max', 'rpm')])
+
+    if geom is None:
+        geom = geometry.VesselGeometry(r)
+
+    V = np.unique([Vmin, Vmax])
+    N_crit, unknown, n_evals = _critical_rpm(r, mix, r_rxn, V, Nmin, Nmax, tol, geom, A, b)
+
+    for _ in range(max_depth):
+        # refine volume intervals where the boundary moves (or appears/disappears)
+        coarse = np.zeros(len(V) - 1, dtype=bool)
+        for key in DA_KEYS:
+            Nc = np.where(np.isnan(N_crit[key]), Nmax + 2 * tol, N_crit[key])
+            coarse |= np.abs(np.diff(Nc)) > tol
+        if not coarse.any():
+            break
+        V_new = (V[:-1][coarse] + V[1:][coarse]) / 2
+        N_new, unknown_new, n = _critical_rpm(r, mix, r_rxn, V_new, Nmin, Nmax, tol, geom, A, b)
+        n_evals += n
+
+        order = np.argsort(np.concatenate([V, V_new]))
+        V = np.concatenate([V, V_new])[order]
+        N_crit = {key: np.concatenate([N_crit[key], N_new[key]])[order] for key in DA_KEYS}
+        unknown = {key: np.concatenate([unknown[key], unknown_new[key]])[order] for key in DA_KEYS}
+
+    boundary = pd.concat([pd.DataFrame({"Da": key,
+                                        "Volume (L)": V,
+                                        "N at Da=1 (rpm)": N_crit[key],
+                                        "Status": np.select([unknown[key], np.isnan(N_crit[key]),
+                                                             N_crit[key] == Nmin],
+                                                            ["No data", "Limited", "Not limited"],
+                                                            "Limited below")})
+                          for key in DA_KEYS], ignore_index=True)
+    return boundary, n_evals
+
+def scale_sweep(reactors, rho, r_rxn, n_points=5, A=0.07, b=0.53):
+    '''
+    kLa and Da over a volume x agitation grid for several reactors.
+
+    reactors: dict of scale label -> reactor record dict
+    rho: liquid density [kg/m3]
+    r_rxn: reaction rate [1/s]
+    n_points: number of volume and agitation intervals
+    A, b: kLa_gas_drawdown constants [-], or dicts of scale label -> constant
+    '''
+    scale_results = []
+    for scale, rs in reactors.items():
+        A_s = A[scale] if isinstance(A, dict) else A
+        b_s = b[scale] if isinstance(b, dict) else b
+        # get volume and agitation ranges for scale
+        Vmin = float(rs[("Volume Min", "L")])
+        Vmax = float(rs[("Volume Max", "L")])
+        Nmin = float(rs[("Agitation Min", "rpm")])
+        Nmax = float(rs[("Agitation Max", "rpm")])
+        # calculate kla for every volume-agitation speed combination at once
+        V, N = e.grid(np.linspace(Vmin, Vmax, n_points + 1),
+                      np.linspace(Nmin, Nmax, n_points + 1))
+        # get mass [kg]
+        M = V * rho / 1000
+        # calculate power input P [W], summed over impellers submerged at each volume
+        geom = geometry.VesselGeometry(rs)
+        P = e.total_power(geom.impeller_Np, rho, N, geom.impeller_diameters, geom.powered(V))
+        kla = f.kLa_gas_drawdown(A=A_s, b=b_s, P=P, M=M)
+        # calculate Damkohler number for mass transfer to reaction (Da = r_rxn / kla)
+        with np.errstate(divide="ignore"):
+            Da1 = np.where(kla > 0, r_rxn / kla, float('inf'))
+
+        shape = np.broadcast_shapes(V.shape, N.shape)
+        scale_results.append(pd.DataFrame({"Scale": scale,
+                                           "Volume (L)": np.broadcast_to(V, shape).ravel(),
+                                           "Agitation (rpm)": np.broadcast_to(N, shape).ravel(),
+                                           "P/M (W/kg)": (P/M).ravel(),
+                                           "kla (1/s)": kla.ravel(),
+                                           "Da_1": Da1.ravel()}))
+
+    return pd.concat(scale_results, ignore_index=True)
+
+# ************************ OPERATING WINDOW ************************
+
+# constraints bounding the window from below and above
+LOWER_LIMITS = ["Agitation Min", "Suspension", "Da_massT"]
+UPPER_LIMITS = ["Agitation Max", "Gas drawdown"]
+
+def operating_window(r, mix, s, r_rxn, Da_max=1.0, suspension="Zwietering", margin=1.2,
+                     avoid_gas_drawdown=False, rpm_min=None, rpm_max=None, n_points=50,
+                     A=0.07, b=0.53, geom=None):
+    '''
+    Agitation x fill volume window satisfying all mixing constraints.
+
+    At each fill volume between Volume Min and Volume Max the window is the
+    agitation range N min..N max with
+    - N >= margin * Njs of the bottom impeller (Zwietering or GMB; none without solids)
+    - Da_massT = r_rxn / kLa <= Da_max
+    - N below the gas drawdown speed of the top submerged impeller, if avoid_gas_drawdown
+    - Agitation Min <= N <= Agitation Max
+    Each bound is a closed-form speed, so volumes are only sampled to trace the
+    boundary; the fill volumes where impellers become submerged (and the bounds
+    jump) are always included.
+
+    r: reactor state dict
+    mix: mixture properties dict
+    s: solid properties dict with loading (empty if no solids)
+    r_rxn: reaction rate [1/s]
+    Da_max: highest acceptable Da_massT [-], positive
+    suspension: Njs correlation, "Zwietering" or "GMB"
+    margin: required N/Njs [-]
+    avoid_gas_drawdown: keep agitation below the gas drawdown speed
+    rpm_min, rpm_max: agitation range [rpm], default from reactor
+    n_points: number of volume intervals
+    geom: derived vessel geometry; built from r if None
+
+    Returns one row per volume with the bound from each constraint, the window
+    ("N min (rpm)", "N max (rpm)"), the binding constraints and whether the
+    window is open ("Feasible"); and the errors of the suspension calculation.
+    '''
+    if Da_max <= 0:
+        raise ValueError("Da_max must be positive")
+    if geom is None:
+        geom = geometry.VesselGeometry(r)
+    if rpm_min is None:
+        rpm_min = float(r[('Agitation Min', 'rpm')])
+    if rpm_max is None:
+        rpm_max = float(r[('Agitation Max', 'rpm')])
+    Vmin = float(r[('Volume Min', 'L')])
+    Vmax = float(r[('Volume Max', 'L')])
+
+    # sampled volumes plus both sides of each impeller cover volume
+    covers = geom.cover_volumes[(geom.cover_volumes >= Vmin) & (geom.cover_volumes < Vmax)]
+    V = np.unique(np.concatenate([np.linspace(Vmin, Vmax, n_points + 1), covers,
+                                  np.nextafter(covers, np.inf)]))
+    powered = geom.powered(V)
+
+    # just suspended speed does not depend on fill (same solids loading)
+    errors = []
+    N_sus = np.full(V.shape, np.nan)
+    if s:
+        Njs_Z, Njs_GMB, errors = just_suspended_speeds(r, mix, s, geom)
+        Njs = Njs_GMB if suspension == "GMB" else Njs_Z
+        if Njs > 0:
+            N_sus[:] = margin * Njs
+
+    # speed at which kLa reaches r_rxn / Da_max
+    N_Da = e.speed_for_kla(r_rxn / Da_max, V, geom.impeller_Np, geom.impeller_diameters, powered, A=A, b=b)
+
+    N_gd = np.full(V.shape, np.nan)
+    if avoid_gas_drawdown:
+        # submergence of the top impeller below the liquid surface [m]
+        H_sub = geom.liquid_height(V) - e.top_powered(geom.impeller_clearances, powered)
+        N_gd = e.Nmin_gas_drawdown(e.top_powered(geom.impeller_diameters, powered), H_sub)
+
+    lower = np.stack([np.full(V.shape, rpm_min), N_sus, N_Da])
+    upper = np.stack([np.full(V.shape, rpm_max), N_gd])
+    N_low = np.nanmax(lower, axis=0)
+    N_high = np.nanmin(upper, axis=0)
+
+    window = pd.DataFrame({"Volume (L)": V,
+                           "N suspension (rpm)": N_sus,
+                           "N Da_massT (rpm)": N_Da,
+                           "Nmin Gassing (rpm)": N_gd,
+                           "N min (rpm)": N_low,
+                           "N max (rpm)": N_high,
+                           "Lower limit": np.array(LOWER_LIMITS)[np.nanargmax(lower, axis=0)],
+                           "Upper limit": np.array(UPPER_LIMITS)[np.nanargmin(upper, axis=0)],
+                           # Da_massT cannot be evaluated without impeller data
+                           "Feasible": (N_low <= N_high) & ~np.isnan(N_Da)})
+    return window, errors
+
+# ************************ FLEET SCREENING ************************
+
+def _column(table, key, numeric=True):
+    # column of the catalog table as an array (NaN if no vessel has the property)
+    if key not in table.columns:
+        return np.full(len(table), np.nan if numeric else None, dtype=float if numeric else object)
+    col = table[key]
+    return col.to_numpy(dtype=float, na_value=np.nan) if numeric else col.to_numpy(dtype=object)
+
+def _impeller_columns(table, name, units):
+    # per-impeller property as a vessel x impeller array, NaN beyond each vessel's impeller count
+    n = 1
+    while (f"Impeller {n + 1} {name}", units) in table.columns:
+        n += 1
+    values = np.stack([_column(table, (f"Impeller {i} {name}", units)) for i in range(1, n + 1)], axis=1)
+    count = _column(table, ("Impeller Count", "#"))
+    with np.errstate(invalid="ignore"):
+        return np.where(np.arange(1, n + 1) <= count[:, None], values, np.nan)
+
+def _fleet(table):
+    # vessel arrays of the catalog table for the fleet calculations
+    complete = np.ones(len(table), dtype=bool)
+    for key in MIN_PROPS:
+        if key not in table.columns:
+            complete[:] = False
+        else:
+            complete &= table[key].notna().to_numpy()
+
+    T = _column(table, ("Internal Diameter", "m"))
+    V_dish = e.dish_volume(_column(table, ("Bottom Dish Type", "-"), numeric=False), T,
+                           Do=_column(table, ("Outside Diameter", "m")),
+                           t=_column(table, ("Wall Thickness", "mm")),
+                           Rk=_column(table, ("Knuckle Radius", "m")))
+
+    # vessel x impeller arrays; impellers without a power number are taken to be
+    # the same type as the one below (as in geometry.VesselGeometry)
+    Po = pd.DataFrame(_impeller_columns(table, "Np", "-")).ffill(axis=1).to_numpy()
+    C = _impeller_columns(table, "Clearance", "m")
+    # fill volume above which each impeller is submerged [L]
+    V_cover = ((C + _impeller_columns(table, "Height", "m")/2) * (np.pi * (T/2)**2)[:, None]
+               + V_dish[:, None]) * 1e3
+
+    return {"complete": complete,
+            "Vmin": _column(table, ("Volume Min", "L")),
+            "Vmax": _column(table, ("Volume Max", "L")),
+            "Nmin": _column(table, ("Agitation Min", "rpm")),
+            "Nmax": _column(table, ("Agitation Max", "rpm")),
+            "T": T, "V_dish": V_dish,
+            "Po": Po, "D": _impeller_columns(table, "Diameter", "m"), "C": C, "V_cover": V_cover}
+
+def _fleet_solids(table, mix, s, vessel):
+    # solids arguments of engine.evaluate for the fleet (empty without solids);
+    # vessel indexes the per-vessel parameters into the grid
+    if not s or pd.isna(s.get(("Density", "kg/m3"))):
+        return {}
+    return dict(S=_column(table, ("Zwietering S parameter", "-"))[vessel],
+                z=_column(table, ("GMB z parameter", "-"))[vessel],
+                rho_S=s[("Density", "kg/m3")],
+                d_P=s[("Particle Size", "um")] / 1e6,
+                X=s[("Loading", "%")],
+                Xv=s[("Volume", "L")] / mix[("Volume", "L")] * 100)
+
+def screen_fleet(table, mix, s, r_rxn, n_points=10, A=0.07, b=0.53):
+    '''
+    Screen a mixture and reaction against every vessel in the catalog in one
+    array pass over a vessel x volume x agitation grid, and rank the vessels.
+
+    table: catalog table, one row per (owner, reactor)
+    mix: mixture properties dict
+    s: solid properties dict with loading (empty if no solids)
+    r_rxn: reaction rate [1/s]
+    n_points: number of volume and agitation intervals per vessel
+    A, b: kLa_gas_drawdown constants [-], scalars or arrays aligned with the table rows
+
+    Returns one row per vessel sorted by best achievable Da_massT. Vessels missing
+    required properties are listed last with Status "Incomplete data".
+    '''
+    fleet = _fleet(table)
+    complete, Vmin, Vmax, Nmax = fleet["complete"], fleet["Vmin"], fleet["Vmax"], fleet["Nmax"]
+    Nmin, T, V_dish = fleet["Nmin"], fleet["T"], fleet["V_dish"]
+    Po, D, C, V_cover = fleet["Po"], fleet["D"], fleet["C"], fleet["V_cover"]
+
+    # vessel x volume x agitation grid scaled to each vessel's operating range
+    u = np.linspace(0, 1, n_points + 1)
+    vessel = (slice(None), None, None)
+    impeller = (slice(None), None, None, slice(None))
+    V = Vmin[vessel] + (Vmax - Vmin)[vessel] * u[None, :, None]
+    N = Nmin[vessel] + (Nmax - Nmin)[vessel] * u[None, None, :]
+    H = e.liquid_height(V, V_dish[vessel], T[vessel])
+    A = np.asarray(A, dtype=float)
+    b = np.asarray(b, dtype=float)
+    if A.ndim:
+        A = A[vessel]
+    if b.ndim:
+        b = b[vessel]
+
+    solids = _fleet_solids(table, mix, s, vessel)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        res = e.evaluate(N, V, mix[("Density", "kg/m3")], mix[("Dynamic Viscosity", "mPa.s")],
+                         mix[("Kinematic Viscosity", "m2/s")],
+                         Po=Po[impeller], D=D[impeller], T=T[vessel], H=H,
+                         A=A, b=b, C=C[impeller], V_cover=V_cover[impeller],
+                         r_rxn=r_rxn, **solids)
+
+    def best(key, fn):
+        # best value over each vessel's grid, ignoring incomplete cells
+        with np.errstate(invalid="ignore"):
+            vals = np.where(np.isfinite(res[key]), res[key], np.nan).reshape(len(table), -1)
+            out = np.full(len(table), np.nan)
+            ok = ~np.all(np.isnan(vals), axis=1)
+            out[ok] = fn(vals[ok], axis=1)
+        return out
+
+    screen = pd.DataFrame({"Vessel": [f"{owner}-{reactor}" for owner, reactor in table.index],
+                           "Scale": _column(table, ("Scale", "-"), numeric=False),
+                           "Volume Min (L)": Vmin,
+                           "Volume Max (L)": Vmax,
+                           "Agitation Max (rpm)": Nmax,
+                           "kla max (1/s)": best("kla", np.nanmax),
+                           "Da_massT min": best("Da_massT", np.nanmin),
+                           "Da_micro min": best("Da_micro", np.nanmin),
+                           "Da_macro min": best("Da_macro", np.nanmin),
+                           "tmicro min (s)": best("tm_micro", np.nanmin),
+                           "tmacro min (s)": best("tm_bulk", np.nanmin)})
+
+    if "Njs_Z" in res:
+        Njs_Z = res["Njs_Z"][:, 0, 0]
+        screen["Njs Zwietering (rpm)"] = Njs_Z
+        # suspension margin at maximum agitation
+        screen["Nmax/Njs"] = Nmax / Njs_Z
+    if "Njs_GMB" in res:
+        screen["Njs GMB (rpm)"] = res["Njs_GMB"][:, 0, 0]
+
+    suitable = screen["Da_massT min"] < 1
+    if "Nmax/Njs" in screen:
+        suitable &= screen["Nmax/Njs"] >= 1.2
+    screen["Status"] = np.where(~complete, "Incomplete data",
+                                np.where(suitable, "Suitable", "Limited"))
+
+    screen["_complete"] = complete
+    screen = screen.sort_values(["_complete", "Da_massT min", "kla max (1/s)"],
+                                ascending=[False, True, False], na_position="last")
+    screen = screen.drop(columns="_complete").reset_index(drop=True)
+    screen.index = screen.index + 1
+    screen.index.name = "Rank"
+    return screen
+
+# ************************ SCALE-UP ************************
+
+# scale-up criteria -> column of the equivalent agitation
+SCALE_UP_CRITERIA = {"P/V": "N P/V (rpm)",
+                     "Tip speed": "N tip speed (rpm)",
+                     "Njs Zwietering": "N Njs Zwietering (rpm)",
+                     "Njs GMB": "N Njs GMB (rpm)",
+                     "kLa": "N kLa (rpm)",
+                     "Mixing time": "N mixing time (rpm)"}
+
+def scale_up(lab, N, V, table, mix, s, fill=None, A=0.07, b=0.53, A_lab=None, b_lab=None):
+    '''
+    Equivalent agitation in every vessel of the fleet for a lab operating point,
+    in one array pass with the closed-form speed for each criterion:
+    constant P/V, tip speed, N/Njs (Zwietering, GMB), kLa and bulk mixing time (tm2).
+
+    lab: reactor record of the lab vessel
+    N: lab agitation [rpm]
+    V: lab fill volume [L]
+    table: catalog table, one row per (owner, reactor)
+    mix: mixture properties dict
+    s: solid properties dict with loading (empty if no solids)
+    fill: target fill as a fraction of Volume Max, default the lab fill fraction
+          (limited to each vessel's volume range)
+    A, b: kLa_gas_drawdown constants of the fleet [-], scalars or arrays aligned with the table rows
+    A_lab, b_lab: kLa_gas_drawdown constants of the lab vessel [-], default A and b (needed if those are arrays)
+
+    Returns one row per vessel with the agitation for each criterion (NaN if it
+    cannot be calculated) and the number of criteria within the agitation range;
+    and the lab values of the criteria.
+    '''
+    rho = mix[("Density", "kg/m3")]
+    mu = mix[("Dynamic Viscosity", "mPa.s")]
+    nu = mix[("Kinematic Viscosity", "m2/s")]
+
+    # lab operating point
+    geom = geometry.VesselGeometry(lab)
+    A_lab = A if A_lab is None else A_lab
+    b_lab = b if b_lab is None else b_lab
+    ref = e.evaluate(N, V, rho, mu, nu, Po=geom.impeller_Np, D=geom.impeller_diameters,
+                     T=geom.T, H=geom.liquid_height(V), A=A_lab, b=b_lab,
+                     C=geom.impeller_clearances, V_cover=geom.cover_volumes)
+    Njs_Z, Njs_GMB, _ = just_suspended_speeds(lab, mix, s, geom) if s else (0.0, 0.0, [])
+    reference = {"P/V (W/m3)": float(ref["P/V"]),
+                 "Tip Speed (m/s)": float(ref["Tip Speed"]),
+                 "N/Njs Zwietering": N / Njs_Z if Njs_Z > 0 else np.nan,
+                 "N/Njs GMB": N / Njs_GMB if Njs_GMB > 0 else np.nan,
+                 "kla (1/s)": float(ref["kla"]),
+                 "Mixing Time bulk (s)": float(ref["tm_bulk"])}
+
+    # target fill volumes and submerged impellers
+    fleet = _fleet(table)
+    Po, D, C = fleet["Po"], fleet["D"], fleet["C"]
+    if fill is None:
+        fill = V / float(lab[("Volume Max", "L")])
+    V_t = np.clip(fill * fleet["Vmax"], fleet["Vmin"], fleet["Vmax"])
+    powered = e.powered_impellers(V_t, fleet["V_cover"])
+    H_t = e.liquid_height(V_t, fleet["V_dish"], fleet["T"])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        N_t = {"P/V": e.speed_for_power_per_mass(reference["P/V (W/m3)"] / rho, V_t, Po, D, powered),
+               "Tip speed": reference["Tip Speed (m/s)"] * 60 / (np.pi * e.largest_powered(D, powered)),
+               "kLa": e.speed_for_kla(reference["kla (1/s)"], V_t, Po, D, powered, A=A, b=b),
+               "Mixing time": e.speed_for_tm2(reference["Mixing Time bulk (s)"], V_t, H_t, fleet["T"],
+                                              Po, D, powered, rho, mu)}
+
+        # same margin to the just suspended speed of each bottom impeller
+        solids = _fleet_solids(table, mix, s, slice(None))
+        N_t["Njs Zwietering"] = np.full(len(table), np.nan)
+        N_t["Njs GMB"] = np.full(len(table), np.nan)
+        if solids:
+            N_t["Njs Zwietering"] = reference["N/Njs Zwietering"] * 60 * f.Njs_Z(
+                solids["S"], nu, rho, solids["rho_S"], solids["X"], solids["d_P"], D[:, 0])
+            N_t["Njs GMB"] = reference["N/Njs GMB"] * 60 * f.Njs_GMB(
+                solids["z"], Po[:, 0], D[:, 0], rho, solids["rho_S"], solids["Xv"], solids["d_P"], C[:, 0])
+
+    scaled = pd.DataFrame({"Vessel": [f"{owner}-{reactor}" for owner, reactor in table.index],
+                           "Scale": _column(table, ("Scale", "-"), numeric=False),
+                           "Volume (L)": V_t,
+                           "Agitation Min (rpm)": fleet["Nmin"],
+                           "Agitation Max (rpm)": fleet["Nmax"]})
+    in_range = np.zeros(len(table), dtype=int)
+    for criterion, col in SCALE_UP_CRITERIA.items():
+        values = np.where(fleet["complete"] & np.isfinite(N_t[criterion]), N_t[criterion], np.nan)
+        scaled[col] = values
+        with np.errstate(invalid="ignore"):
+            in_range += (values >= fleet["Nmin"]) & (values <= fleet["Nmax"])
+    scaled["Criteria in range"] = in_range
+    scaled["Status"] = np.where(fleet["complete"], "", "Incomplete data")
+    return scaled, reference
+
+# ************************ UNCERTAINTY ************************
+
+# uncertain input -> (distribution, spread) with spread the relative standard
+# deviation (normal), the standard deviation of ln (lognormal) or the relative
+# half width (uniform) around the nominal value
+UNCERTAINTY = {"Particle Size": ("lognormal", 0.3),
+               "Dynamic Viscosity": ("lognormal", 0.2),
+               "Density": ("normal", 0.02),
+               "Zwietering S": ("normal", 0.15),
+               "GMB z": ("normal", 0.15),
+               "kLa A": ("lognormal", 0.3),
+               "kLa b": ("normal", 0.1)}
+
+# sampled metric -> engine.evaluate output
+UNCERTAIN_METRICS = {"Njs Zwietering (rpm)": "Njs_Z",
+                     "Njs GMB (rpm)": "Njs_GMB",
+                     "kLa (1/s)": "kla",
+                     "Mixing Time bulk (s)": "tm_bulk",
+                     "Micro-mixing Time (s)": "tm_micro",
+                     "Da II": "Da_massT"}
+
+# histogram resolution of the chunked mode: bins per decade over 10^LOG_RANGE
+BINS_PER_DECADE = 200
+LOG_RANGE = (-12, 12)
+
+def sample_inputs(nominal, uncertainty, n, rng):
+    '''
+    Random draws of the uncertain inputs around their nominal values.
+
+    nominal: input -> nominal value
+    uncertainty: input -> (distribution, spread), see UNCERTAINTY; inputs not listed stay nominal
+    n: number of draws
+    rng: numpy Generator
+
+    Returns input -> array of n draws.
+    '''
+    draws = {}
+    for name, value in nominal.items():
+        kind, spread = uncertainty.get(name, ("fixed", 0.0))
+        if kind == "lognormal":
+            draws[name] = value * np.exp(spread * rng.standard_normal(n))
+        elif kind == "normal":
+            draws[name] = value * (1 + spread * rng.standard_normal(n))
+        elif kind == "uniform":
+            draws[name] = value * rng.uniform(1 - spread, 1 + spread, n)
+        else:
+            draws[name] = np.full(n, value, dtype=float)
+    return draws
+
+class _LogHistogram:
+    # counts of positive values in log-spaced bins, for percentiles of a stream
+    def __init__(self):
+        self.edges = np.logspace(LOG_RANGE[0], LOG_RANGE[1],
+                                 (LOG_RANGE[1] - LOG_RANGE[0]) * BINS_PER_DECADE + 1)
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+
+    def add(self, values):
+        values = np.clip(values[np.isfinite(values) & (values > 0)], self.edges[0], self.edges[-1])
+        self.counts += np.histogram(values, bins=self.edges)[0]
+
+    def percentiles(self, q):
+        # log-linear interpolation within the bin holding each percentile
+        cum = np.cumsum(self.counts)
+        if cum[-1] == 0:
+            return np.full(len(q), np.nan)
+        target = np.asarray(q, dtype=float) / 100 * cum[-1]
+        i = np.minimum(np.searchsorted(cum, target, side="left"), len(self.counts) - 1)
+        below = np.where(i > 0, cum[i - 1], 0)
+        frac = np.where(self.counts[i] > 0, (target - below) / np.maximum(self.counts[i], 1), 0.5)
+        log_edges = np.log10(self.edges)
+        return 10**(log_edges[i] + frac * (log_edges[i + 1] - log_edges[i]))
+
+def monte_carlo(r, mix, s, r_rxn, uncertainty=UNCERTAINTY, n_draws=20_000, chunk_size=100_000,
+                percentiles=(5, 50, 95), seed=0, A=0.07, b=0.53, geom=None):
+    '''
+    Propagate input uncertainty through the mixing correlations at the reactor set point.
+    Draws are evaluated with engine.evaluate in array passes of chunk_size, so memory
+    stays bounded for any number of draws. Up to chunk_size draws the percentiles are
+    exact; above, they come from a log-spaced histogram (to within the 1.2% bin width).
+
+    r: reactor state dict (see reactor_state)
+    mix: mixture properties dict
+    s: solid properties dict with loading (empty if no solids)
+    r_rxn: reaction rate [1/s]
+    uncertainty: input -> (distribution, spread), see UNCERTAINTY
+    n_draws: number of draws
+    chunk_size: draws evaluated per array pass
+    percentiles: percentiles to report [%]
+    seed: random seed
+    A, b: nominal kLa_gas_drawdown constants [-]
+    geom: derived vessel geometry; built from r if None
+
+    Returns (percentiles: one row per metric with the nominal value, the share of valid
+    draws and the percentiles; probabilities: one row per condition with the share of
+    draws in it).
+    '''
+    if geom is None:
+        geom = geometry.VesselGeometry(r)
+    N = float(r[("Impeller Speed", "rpm")])
+    V = mix[("Volume", "L")]
+
+    nominal = {"Dynamic Viscosity": mix[("Dynamic Viscosity", "mPa.s")],
+               "Density": mix[("Density", "kg/m3")],
+               "kLa A": A, "kLa b": b}
+    solids = {}
+    if s and not pd.isna(s.get(("Density", "kg/m3"))):
+        nominal.update({"Particle Size": s[("Particle Size", "um")] / 1e6,
+                        "Zwietering S": float(r[("Zwietering S parameter", "-")]),
+                        "GMB z": float(r[("GMB z parameter", "-")])})
+        solids = dict(rho_S=s[("Density", "kg/m3")],
+                      X=s[("Loading", "%")],
+                      Xv=s[("Volume", "L")] / mix[("Volume", "L")] * 100)
+
+    metrics = {name: key for name, key in UNCERTAIN_METRICS.items() if solids or not key.startswith("Njs")}
+    exact = n_draws <= chunk_size
+    values = {name: [] for name in metrics}
+    hists = {name: _LogHistogram() for name in metrics}
+    valid = dict.fromkeys(metrics, 0)
+    conditions = {}
+
+    def count(label, hits):
+        conditions[label] = conditions.get(label, 0) + int(np.count_nonzero(hits))
+
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_draws, chunk_size):
+        n = min(chunk_size, n_draws - start)
+        x = sample_inputs(nominal, uncertainty, n, rng)
+        if solids:
+            solids.update(S=x["Zwietering S"], z=x["GMB z"], d_P=x["Particle Size"])
+        # kinematic viscosity follows the sampled dynamic viscosity and density
+        nu = mix[("Kinematic Viscosity", "m2/s")] * (x["Dynamic Viscosity"] / nominal["Dynamic Viscosity"]) \
+            / (x["Density"] / nominal["Density"])
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            res = e.evaluate(N, V, x["Density"], x["Dynamic Viscosity"], nu,
+                             Po=geom.impeller_Np, D=geom.impeller_diameters,
+                             T=geom.T, H=geom.liquid_height(V), A=x["kLa A"], b=x["kLa b"],
+                             C=geom.impeller_clearances, V_cover=geom.cover_volumes,
+                             r_rxn=r_rxn, **solids)
+
+        for name, key in metrics.items():
+            out = np.asarray(res[key], dtype=float)
+            valid[name] += int(np.count_nonzero(np.isfinite(out)))
+            if exact:
+                values[name].append(out)
+            else:
+                hists[name].add(out)
+
+        # conditions with the thresholds of the single case classification
+        for label, key in [("Zwietering", "N/Njs_Z"), ("GMB", "N/Njs_GMB")]:
+            if key in res:
+                frac = res[key]
+                count(f"Not Suspended ({label})", frac < 0.8)
+                count(f"Maybe Suspended ({label})", (frac >= 0.8) & (frac < 1.0))
+                count(f"Just Suspended ({label})", (frac >= 1.0) & (frac < 1.2))
+                count(f"Suspended ({label})", frac >= 1.2)
+        Da_2 = res["Da_massT"]
+        count("Mass Transfer Limited", Da_2 > 10)
+        count("Intermediate", (Da_2 >= 0.1) & (Da_2 <= 10))
+        count("Kinetically Limited", Da_2 < 0.1)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        point = e.evaluate(N, V, nominal["Density"], nominal["Dynamic Viscosity"],
+                           mix[("Kinematic Viscosity", "m2/s")],
+                           Po=geom.impeller_Np, D=geom.impeller_diameters, T=geom.T,
+                           H=geom.liquid_height(V), A=A, b=b, C=geom.impeller_clearances,
+                           V_cover=geom.cover_volumes, r_rxn=r_rxn,
+                           **({**solids, "S": nominal["Zwietering S"], "z": nominal["GMB z"],
+                               "d_P": nominal["Particle Size"]} if solids else {}))
+
+    rows = []
+    for name, key in metrics.items():
+        if exact:
+            out = np.concatenate(values[name])
+            out = out[np.isfinite(out)]
+            pct = np.percentile(out, percentiles) if len(out) else np.full(len(percentiles), np.nan)
+        else:
+            pct = hists[name].percentiles(percentiles)
+        rows.append({"Metric": name, "Nominal": float(point[key]), "Valid (%)": valid[name] / n_draws * 100,
+                     **{f"P{q:g}": value for q, value in zip(percentiles, pct)}})
+
+    probabilities = pd.DataFrame({"Condition": list(conditions),
+                                  "Probability (%)": [hits / n_draws * 100 for hits in conditions.values()]})
+    return pd.DataFrame(rows).set_index("Metric"), probabilities.set_index("Condition")
+
+# ************************ GLOBAL SENSITIVITY ************************
+
+# rows of the Saltelli design evaluated per batch (and per worker task)
+GSA_BATCH = 65_536
+
+def gsa_ranges(r, mix, r_rxn, A=0.07, b=0.53):
+    '''
+    Default input ranges of the global sensitivity analysis:
+    the vessel's agitation and volume ranges, and spans around the nominal
+    viscosity, density, reaction rate and kLa constants.
+
+    Returns input -> (low, high, scale) with scale "linear" or "log".
+    '''
+    mu = mix[("Dynamic Viscosity", "mPa.s")]
+    rho = mix[("Density", "kg/m3")]
+    return {"Agitation (rpm)": (float(r[("Agitation Min", "rpm")]), float(r[("Agitation Max", "rpm")]), "linear"),
+            "Volume (L)": (float(r[("Volume Min", "L")]), float(r[("Volume Max", "L")]), "linear"),
+            "Dynamic Viscosity (mPa.s)": (mu / 2, mu * 2, "log"),
+            "Density (kg/m3)": (rho * 0.9, rho * 1.1, "linear"),
+            "Reaction rate (1/s)": (r_rxn / 10, r_rxn * 10, "log"),
+            "kLa A": (A / 2, A * 2, "log"),
+            "kLa b": (b * 0.8, b * 1.2, "linear")}
+
+def _gsa_inputs(u, ranges):
+    # unit hypercube rows -> input values, one column per range
+    x = {}
+    for j, (name, (low, high, scale)) in enumerate(ranges.items()):
+        if scale == "log":
+            x[name] = np.exp(np.log(low) + u[:, j] * (np.log(high) - np.log(low)))
+        else:
+            x[name] = low + u[:, j] * (high - low)
+    return x
+
+def _gsa_batch(args):
+    # log10 Damkohler numbers of a batch of design rows; runs in worker processes
+    r, mix, geom, ranges, u = args
+    x = _gsa_inputs(u, ranges)
+    mu = mix[("Dynamic Viscosity", "mPa.s")]
+    rho = mix[("Density", "kg/m3")]
+    # kinematic viscosity follows the sampled dynamic viscosity and density
+    mix_x = {("Density", "kg/m3"): x["Density (kg/m3)"],
+             ("Dynamic Viscosity", "mPa.s"): x["Dynamic Viscosity (mPa.s)"],
+             ("Kinematic Viscosity", "m2/s"): mix[("Kinematic Viscosity", "m2/s")]
+             * (x["Dynamic Viscosity (mPa.s)"] / mu) / (x["Density (kg/m3)"] / rho)}
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        res = _damkohler(r, mix_x, x["Reaction rate (1/s)"], x["Volume (L)"], x["Agitation (rpm)"], geom,
+                         A=x["kLa A"], b=x["kLa b"])
+        return np.column_stack([np.log10(res[key]) for key in DA_KEYS])
+
+def _sobol_design(n, k, seed):
+    # two independent n x k quasi-random matrices (scrambled Sobol, random if scipy is missing)
+    try:
+        from scipy.stats import qmc
+    except ImportError:
+        u = np.random.default_rng(seed).random((n, 2 * k))
+    else:
+        u = qmc.Sobol(d=2 * k, scramble=True, seed=seed).random_base2(int(np.log2(n)))
+    return u[:, :k], u[:, k:]
+
+def global_sensitivity(r, mix, r_rxn, ranges=None, n_samples=2**14, seed=0, workers=None,
+                       A=0.07, b=0.53, geom=None):
+    '''
+    Sobol indices of log10(Da_micro), log10(Da_macro) and log10(Da_massT) with all
+    inputs varied at once (Saltelli design, n_samples x (inputs + 2) evaluations;
+    first-order indices by the Saltelli 2010 estimator, total indices by Jansen).
+    The Damkohler numbers are the ones of the sensitivity sweep (see sensitivity_sweep).
+
+    r: reactor state dict
+    mix: mixture properties dict
+    r_rxn: nominal reaction rate [1/s]
+    ranges: input -> (low, high, "linear" or "log"), default gsa_ranges()
+    n_samples: base sample size, rounded up to a power of 2
+    seed: random seed of the scrambled Sobol sequence
+    workers: worker processes for large designs, default all cores; 1 evaluates in this process
+    A, b: nominal kLa_gas_drawdown constants [-]
+    geom: derived vessel geometry; built from r if None
+
+    Returns one row per output and input with the first-order (S1) and total (ST) index,
+    and the number of model evaluations.
+    '''
+    if geom is None:
+        geom = geometry.VesselGeometry(r)
+    if ranges is None:
+        ranges = gsa_ranges(r, mix, r_rxn, A=A, b=b)
+    names = list(ranges)
+    k = len(names)
+    n = 2**int(np.ceil(np.log2(max(n_samples, 2))))
+
+    # rows: A, B, then A with column i from B for every input i
+    uA, uB = _sobol_design(n, k, seed)
+    design = [uA, uB]
+    for i in range(k):
+        uABi = uA.copy()
+        uABi[:, i] = uB[:, i]
+        design.append(uABi)
+    design = np.concatenate(design)
+
+    tasks = [(r, mix, geom, ranges, design[start:start + GSA_BATCH])
+             for start in range(0, len(design), GSA_BATCH)]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            y = np.concatenate(list(pool.map(_gsa_batch, tasks)))
+    else:
+        y = np.concatenate([_gsa_batch(task) for task in tasks])
+    y = y.reshape(k + 2, n, len(DA_KEYS))
+    yA, yB, yAB = y[0], y[1], y[2:]
+
+    rows = []
+    for j, key in enumerate(DA_KEYS):
+        # drop base samples with a non-finite output in any of their evaluations
+        ok = np.isfinite(yA[:, j]) & np.isfinite(yB[:, j]) & np.all(np.isfinite(yAB[:, :, j]), axis=0)
+        fA, fB, fAB = yA[ok, j], yB[ok, j], yAB[:, ok, j]
+        var = np.var(np.concatenate([fA, fB]))
+        for i, name in enumerate(names):
+            S1 = np.mean(fB * (fAB[i] - fA)) / var if var > 0 else math.nan
+            ST = 0.5 * np.mean((fA - fAB[i])**2) / var if var > 0 else math.nan
+            rows.append({"Output": key, "Input": name, "S1": S1, "ST": ST})
+    return pd.DataFrame(rows), len(design)
@@ -0,0 +1,132 @@
+import os
+import threading
+
+import pandas as pd
+
+import catalog
+import kla
+from materials import MaterialProperties
+
+# Process-wide cache of the property and measurement files.
+# Each file is parsed once with explicit dtypes and re-read only when its
+# modification time changes. The returned frames are shared between all
+# sessions and are not protected: filter or derive from them, never modify
+# them in place (take a .copy() before assigning to a column or cell).
+
+# paths relative to the app directory so batch jobs can run from anywhere
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+MATERIALS_FILE = os.path.join(APP_DIR, "properties", "materials.csv")
+REACTIONS_FILE = os.path.join(APP_DIR, "properties", "reactions.csv")
+REACTORS_FILE = os.path.join(APP_DIR, "properties", "reactors.csv")
+EQUATIONS_FILE = os.path.join(APP_DIR, "properties", "equations.csv")
+KLA_FILE = os.path.join(APP_DIR, "data", "measured_kla.csv")
+TMIX_FILE = os.path.join(APP_DIR, "data", "measured_tmix.csv")
+
+DTYPES = {
+    MATERIALS_FILE: {"material": str, "phase": str, "temperature": float,
+                     "property": str, "value": float, "units": str, "source": str},
+    REACTIONS_FILE: {"Reaction": str, "Category": str, "Rate": float, "dH [kJ/mol]": float,
+                     "Endo/Exo": str, "Rate OoM": float, "Explanation": str},
+    # reactor values mix numbers and text (e.g. dish type) so stay as text
+    REACTORS_FILE: {"owner": str, "reactor": str, "property": str, "units": str,
+                    "value": str, "source": str},
+    EQUATIONS_FILE: {"No.": int, "Description": str, "Source": str, "Equation": str},
+    KLA_FILE: {"owner": str, "reactor": str, "stir_speed_rpm": float,
+               "volume_fill_L": float, "kLa_per_sec": float},
+    TMIX_FILE: {"owner": str, "reactor": str, "stir_speed_rpm": float,
+                "volume_fill_L": float, "tmix_s": float},
+}
+
+_cache = {}
+_lock = threading.Lock()
+
+def _prepare_reactors(df):
+    # vessel name column for easier selection in scaling page
+    df["name"] = df["owner"] + "-" + df["reactor"]
+    return df
+
+PREPARE = {REACTORS_FILE: _prepare_reactors}
+
+def load(path):
+    '''
+    Load a CSV file through the cache.
+
+    path: file path
+    '''
+    mtime = os.path.getmtime(path)
+    with _lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        df = pd.read_csv(path, dtype=DTYPES.get(path), encoding="utf-8-sig")
+        if path in PREPARE:
+            df = PREPARE[path](df)
+        _cache[path] = (mtime, df)
+        return df
+
+def clear():
+    '''
+    Drop all cached frames.
+    '''
+    with _lock:
+        _cache.clear()
+
+def materials():
+    return load(MATERIALS_FILE)
+
+def reactions():
+    return load(REACTIONS_FILE)
+
+def reactors():
+    return load(REACTORS_FILE)
+
+def equations():
+    return load(EQUATIONS_FILE)
+
+def measured_kla():
+    return load(KLA_FILE)
+
+def measured_tmix():
+    return load(TMIX_FILE)
+
+def reactor_catalog():
+    '''
+    Indexed reactor catalog, rebuilt only when reactors.csv changes.
+    '''
+    df = reactors()
+    with _lock:
+        cached = _cache.get("catalog")
+        if cached is not None and cached[0] is df:
+            return cached[1]
+        cat = catalog.ReactorCatalog(df)
+        _cache["catalog"] = (df, cat)
+        return cat
+
+def material_properties():
+    '''
+    Temperature-dependent material properties, refitted only when materials.csv changes.
+    '''
+    df = materials()
+    with _lock:
+        cached = _cache.get("material_properties")
+        if cached is not None and cached[0] is df:
+            return cached[1]
+        props = MaterialProperties(df)
+        _cache["material_properties"] = (df, props)
+        return props
+
+def kla_fits():
+    '''
+    Per-vessel kLa fits, refitted only when measured_kla.csv or reactors.csv changes.
+    '''
+    df = measured_kla()
+    cat = reactor_catalog()
+    with _lock:
+        cached = _cache.get("kla_fits")
+        if cached is not None and cached[0] is df and cached[1] is cat:
+            return cached[2]
+        fits = kla.KlaFits(df, cat)
+        _cache["kla_fits"] = (df, cat, fits)
+        return fits
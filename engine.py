@@ -0,0 +1,324 @@
+import numpy as np
+import functions as f
+
+# Batched versions of the correlations in functions.py.
+# Every function here accepts scalars or NumPy arrays and broadcasts, so a whole
+# rpm x volume x reactor grid is evaluated in a single call. Branches that are
+# `if` chains in functions.py are done with masks.
+
+# ************************ GRIDS ************************
+
+def grid(*axes):
+    '''
+    Open (sparse) mesh of 1-D axes for broadcasting, e.g.
+    N, V = grid(rpm_values, volume_values) gives shapes (n, 1) and (1, m).
+    '''
+    return np.ix_(*[np.atleast_1d(np.asarray(a, dtype=float)) for a in axes])
+
+# ************************ GEOMETRY ************************
+
+# dish volume [m3]
+def dish_volume(dish, Di, Do=np.nan, t=np.nan, Rk=np.nan):
+    '''
+    Dish volume for arrays of vessels [m3]
+
+    dish: bottom dish type(s) [-]
+    Di: internal diameter [m]
+    Do: outside diameter [m] (torispherical dishes only)
+    t: wall thickness [mm] (torispherical dishes only)
+    Rk: knuckle radius [m] (ASME torispherical only)
+
+    Flat dishes have zero volume; unknown dish types return NaN.
+    '''
+    dish = np.asarray(dish, dtype=object)
+    Di = np.asarray(Di, dtype=float)
+    Do = np.asarray(Do, dtype=float)
+    t = np.asarray(t, dtype=float) / 1e3
+    Rk = np.asarray(Rk, dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        C_asme_tori = 0.30939 + 1.7197*(Rk-0.06*Do)/Di - 0.16116*t/Do + 0.98997*(t/Do)**2
+        C_din_tori = 0.37802 + 0.05073*(t/Do) + 1.3762
+
+    C = np.select([dish == "ASME 2:1 Elliptical",
+                   dish == "Hemispherical",
+                   (dish == "ASME Torispherical") | (dish == "Torispherical"),
+                   dish == "DIN Torispherical",
+                   dish == "Flat"],
+                  [1/2, 1, C_asme_tori, C_din_tori, 0.0],
+                  default=np.nan)
+
+    return (Di**3 * C * np.pi / 12)
+
+# liquid height [m]
+def liquid_height(V, V_dish, T):
+    '''
+    Liquid height above the bottom tangent line plus dish [m]
+
+    V: liquid volume [L]
+    V_dish: bottom dish volume [m3]
+    T: tank diameter [m]
+    '''
+    return (np.asarray(V, dtype=float)/1e3 - V_dish) / (np.pi * (T/2)**2)
+
+# ************************ FLUID DYNAMICS ************************
+
+def flow_regime(Re):
+    '''
+    Flow regime for arrays of Reynolds numbers [-]
+    Turbulent: Re >= 10,000; Transitional: 10 <= Re < 10,000; Laminar: Re < 10
+    '''
+    Re = np.asarray(Re, dtype=float)
+    return np.select([Re >= 10_000, Re >= 10],
+                     ["Turbulent", "Transitional"],
+                     default="Laminar")
+
+# Mixing time (from Dynochem) [s]
+def tm2(H, T, D, V, eps, mu, rho_L, regime="Turbulent"):
+    '''
+    Masked version of functions.tm2; regime may be an array of regime names.
+    Laminar (or unknown) regimes return NaN.
+
+    H: height of liquid [m]
+    T: tank diameter [m]
+    D: impeller diameter [m]
+    V: liquid volume [m3]
+    eps: power per unit mass [W/kg]
+    mu: viscosity [Pa.s]
+    rho_L: liquid density [kg/m3]
+    '''
+    regime = np.asarray(regime)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fill_ratio = V/(T**2 * H)
+        tm_turb = 5.4 * (H/T)**1.4 / fill_ratio**(1/3) * eps**(-1/3) * (T/D)**(1/3) * T**(2/3)
+        tm_trans = 38025 / fill_ratio**(2/3) * eps**(-2/3) * (mu/rho_L) * (T/D)**(2/3) * T**(-2/3)
+
+    return np.select([regime == "Turbulent", regime == "Transitional"],
+                     [tm_turb, tm_trans],
+                     default=np.nan)
+
+# *************** MASS TRANSFER: G-L GAS DRAWDOWN ***************
+
+def Nmin_gas_drawdown(D, H_sub, gassing_system="vortexing", g=9.81):
+    '''
+    Masked version of functions.Nmin_gas_drawdown [rpm]
+
+    D: diameter of upper impeller [m]
+    H_sub: submergence of upper impeller [m]
+    gassing_system: "vortexing" or "self-aspirating" (may be an array)
+    '''
+    gassing_system = np.asarray(gassing_system)
+    Fr = np.select([gassing_system == "vortexing", gassing_system == "self-aspirating"],
+                   [0.15, 0.20], default=np.nan)
+    with np.errstate(invalid="ignore"):
+        return (Fr * g * H_sub/(D**2))**0.5 * 60
+
+# ************************ IMPELLERS ************************
+# Impeller properties are arrays with the impellers along the last axis,
+# Impeller 1 (bottom) first; a scalar is a single impeller.
+
+def powered_impellers(V, V_cover):
+    '''
+    Mask of impellers that add power at fill volume(s) V, impellers along the last axis.
+    The bottom impeller always counts so an underfilled vessel is not reported as unpowered.
+
+    V: liquid volume [L]
+    V_cover: fill volume above which each impeller is submerged [L] (NaN for absent impellers)
+    '''
+    with np.errstate(invalid="ignore"):
+        powered = np.asarray(V, dtype=float)[..., None] > np.atleast_1d(V_cover)
+    powered[..., 0] = True
+    return powered
+
+def total_power(Po, rho_L, N, D, powered):
+    '''
+    Power input summed over the powered impellers [W]
+
+    Po: impeller power numbers [-]
+    rho_L: liquid density [kg/m3]
+    N: impeller speed [rpm]
+    D: impeller diameters [m]
+    powered: mask from powered_impellers
+    '''
+    P = f.power_input(np.atleast_1d(Po), np.asarray(rho_L, dtype=float)[..., None],
+                      np.asarray(N, dtype=float)[..., None], np.atleast_1d(D))
+    return np.sum(np.where(powered, P, 0.0), axis=-1)
+
+def largest_powered(D, powered):
+    '''
+    Largest powered impeller diameter [m]
+    '''
+    return np.max(np.where(powered, np.atleast_1d(D), -np.inf), axis=-1)
+
+def top_powered(values, powered):
+    '''
+    Value for the highest powered impeller, e.g. its diameter or clearance
+    '''
+    values = np.broadcast_to(np.atleast_1d(values), powered.shape)
+    top = powered.shape[-1] - 1 - np.argmax(powered[..., ::-1], axis=-1)
+    return np.take_along_axis(values, top[..., None], axis=-1)[..., 0]
+
+# ************************ INVERSIONS ************************
+# Closed-form speeds at which a power-law correlation reaches a target value.
+
+def speed_for_power_per_mass(eps, V, Po, D, powered):
+    '''
+    Impeller speed [rpm] giving a power per unit mass, P/M = sum(Po N^3 D^5) / V
+    (liquid density cancels)
+
+    eps: power per unit mass [W/kg]
+    V: liquid volume [L]
+    Po: impeller power numbers [-]
+    D: impeller diameters [m]
+    powered: mask from powered_impellers
+    '''
+    PoD5 = np.sum(np.where(powered, np.atleast_1d(Po) * np.atleast_1d(D)**5, 0.0), axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 60 * (eps * np.asarray(V, dtype=float) / 1000 / PoD5)**(1/3)
+
+def speed_for_kla(kla, V, Po, D, powered, A=0.07, b=0.53):
+    '''
+    Impeller speed [rpm] giving kLa [1/s] with functions.kLa_gas_drawdown, kla = A (P/M)^b
+
+    kla: target kLa [1/s]
+    V: liquid volume [L]
+    Po: impeller power numbers [-]
+    D: impeller diameters [m]
+    powered: mask from powered_impellers
+    A, b: kLa_gas_drawdown constants [-]
+    '''
+    return speed_for_power_per_mass((np.asarray(kla, dtype=float) / A)**(1/b), V, Po, D, powered)
+
+def speed_for_tm2(tm, V, H, T, Po, D, powered, rho_L, mu):
+    '''
+    Impeller speed [rpm] giving a bulk mixing time with tm2 (largest powered impeller).
+    tm2 falls as 1/N in turbulent and 1/N^2 in transitional flow; the speed is
+    the one whose Reynolds number is in the regime it was solved for (NaN if none).
+
+    tm: target bulk mixing time [s]
+    V: liquid volume [L]
+    H: liquid height [m]
+    T: tank diameter [m]
+    Po: impeller power numbers [-]
+    D: impeller diameters [m]
+    powered: mask from powered_impellers
+    rho_L: liquid density [kg/m3]
+    mu: dynamic viscosity [mPa.s]
+    '''
+    V = np.asarray(V, dtype=float)
+    D_max = largest_powered(D, powered)
+    # power per unit mass at 60 rpm [W/kg]
+    PoD5 = np.sum(np.where(powered, np.atleast_1d(Po) * np.atleast_1d(D)**5, 0.0), axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        eps_60 = PoD5 / (V / 1000)
+        tm_60 = {regime: tm2(H, T, D_max, V/1e3, eps_60, mu/1000, rho_L, regime=regime)
+                 for regime in ["Turbulent", "Transitional"]}
+        N_turb = 60 * tm_60["Turbulent"] / tm
+        N_trans = 60 * (tm_60["Transitional"] / tm)**0.5
+
+    return np.select([flow_regime(f.Re_STR(rho_L, D_max, N_turb, mu)) == "Turbulent",
+                      flow_regime(f.Re_STR(rho_L, D_max, N_trans, mu)) == "Transitional"],
+                     [N_turb, N_trans], default=np.nan)
+
+# ************************ ALL METRICS ************************
+
+def evaluate(N, V, rho_L, mu, nu, Po, D, T, H,
+             A=0.07, b=0.53,
+             S=None, z=None, C=None, rho_S=None, d_P=None, X=None, Xv=None,
+             V_cover=None, gas_drawdown=False, gassing_system="vortexing",
+             r_rxn=None):
+    '''
+    Evaluate every derived mixing quantity over broadcastable inputs.
+    Solids, gas drawdown and Damkohler outputs are only returned when their
+    inputs are given.
+
+    Po, D and C are impeller arrays (impellers along the last axis, see IMPELLERS).
+    Power is summed over the submerged impellers; Reynolds number, tip speed and
+    bulk mixing time use the largest of them. Suspension uses the bottom impeller
+    and gas drawdown the top submerged one.
+
+    N: impeller speed [rpm]
+    V: liquid volume [L]
+    rho_L: liquid density [kg/m3]
+    mu: dynamic viscosity [mPa.s]
+    nu: kinematic viscosity [m2/s]
+    Po: impeller power numbers [-]
+    D: impeller diameters [m]
+    T: tank diameter [m]
+    H: liquid height [m]
+    A, b: kLa_gas_drawdown constants [-]
+    S: Zwietering S parameter [-]
+    z: GMB z parameter [-]
+    C: impeller clearances [m]
+    rho_S: solid density [kg/m3]
+    d_P: particle diameter [m]
+    X: solid to liquid mass ratio [%]
+    Xv: solid volume fraction [%]
+    V_cover: fill volume above which each impeller is submerged [L]; all impellers count if None
+    gas_drawdown: calculate minimum speed for gas drawdown (needs C)
+    r_rxn: reaction rate [1/s]
+
+    Returns a dict of arrays.
+    '''
+    N = np.asarray(N, dtype=float)
+    V = np.asarray(V, dtype=float)
+    Po = np.atleast_1d(np.asarray(Po, dtype=float))
+    D = np.atleast_1d(np.asarray(D, dtype=float))
+    if V_cover is None:
+        V_cover = np.full(D.shape[-1], -np.inf)
+    powered = powered_impellers(V, V_cover)
+
+    # liquid mass [kg]
+    M = V * rho_L / 1000
+
+    D_max = largest_powered(D, powered)
+    Re = f.Re_STR(rho_L, D_max, N, mu)
+    regime = flow_regime(Re)
+    P = total_power(Po, rho_L, N, D, powered)
+    # power per unit mass [W/kg]
+    eps = P / M
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kla = f.kLa_gas_drawdown(A, b, P, M)
+        tm_micro = 1 / f.micro_mixing_rate(eps, nu)
+    tm_bulk = tm2(H, T, D_max, V/1e3, eps, mu=mu/1000, rho_L=rho_L, regime=regime)
+
+    res = {"Re": Re,
+           "Flow Regime": regime,
+           "P": P,
+           "P/M": eps,
+           "P/V": P / (V/1000),
+           "Tip Speed": f.tip_speed(N, D_max),
+           "kla": kla,
+           "tm_bulk": tm_bulk,
+           "tm_micro": tm_micro}
+
+    if C is not None:
+        C = np.atleast_1d(np.asarray(C, dtype=float))
+
+    # particle suspension by the bottom impeller [rpm]
+    if rho_S is not None and d_P is not None:
+        if S is not None and X is not None:
+            res["Njs_Z"] = f.Njs_Z(S, nu, rho_L, rho_S, X, d_P, D[..., 0]) * 60
+            res["N/Njs_Z"] = N / res["Njs_Z"]
+        if z is not None and Xv is not None and C is not None:
+            res["Njs_GMB"] = f.Njs_GMB(z, Po[..., 0], D[..., 0], rho_L, rho_S, Xv, d_P, C[..., 0]) * 60
+            res["N/Njs_GMB"] = N / res["Njs_GMB"]
+
+    # gas drawdown by the top submerged impeller [rpm]
+    if gas_drawdown and C is not None:
+        # submergence of the top impeller below the liquid surface [m]
+        H_sub = H - top_powered(C, powered)
+        res["Nmin_gd"] = Nmin_gas_drawdown(top_powered(D, powered), H_sub, gassing_system=gassing_system)
+        res["N/Nmin_gd"] = N / res["Nmin_gd"]
+
+    # Damkohler numbers [-]
+    if r_rxn is not None:
+        res["Da_micro"] = tm_micro * r_rxn
+        res["Da_macro"] = tm_bulk * r_rxn
+        with np.errstate(divide="ignore"):
+            res["Da_massT"] = np.where(kla > 0, r_rxn / np.where(kla > 0, kla, 1.0), np.inf)
+
+    # broadcast every output to the full grid shape
+    shape = np.broadcast_shapes(*(np.shape(v) for v in res.values()))
+    return {k: np.broadcast_to(v, shape) for k, v in res.items()}
@@ -0,0 +1,74 @@
+import numpy as np
+
+import engine as e
+
+# Derived geometry of a vessel, computed once from its reactor record.
+# Instances are memoized per vessel by ReactorCatalog.geometry and rebuilt only
+# when reactors.csv (and so the record) changes.
+
+class VesselGeometry:
+    '''
+    Fixed geometry of a vessel and fill-volume lookups.
+
+    V_dish: bottom dish volume [m3]
+    area: cylinder cross-sectional area [m2]
+    impeller_diameters, impeller_clearances, impeller_heights [m], impeller_Np [-]:
+        per-impeller arrays, Impeller 1 (bottom) first
+    cover_volumes: fill volume [L] above which each impeller is submerged
+    submergence_volumes: monotone table of the fill volume [L] above which
+        1, 2, ... impellers count as submerged
+    '''
+
+    def __init__(self, record):
+        def value(key):
+            v = record.get(key, np.nan)
+            try:
+                return float(v)
+            except (TypeError, ValueError):
+                return v
+
+        self.T = value(('Internal Diameter', 'm'))
+        self.height = value(('Height (tan-tan)', 'm'))
+        self.V_dish = float(e.dish_volume(record.get(('Bottom Dish Type', '-')), self.T,
+                                          Do=value(('Outside Diameter', 'm')),
+                                          t=value(('Wall Thickness', 'mm')),
+                                          Rk=value(('Knuckle Radius', 'm'))))
+        self.area = np.pi * (self.T / 2)**2
+
+        n = int(value(('Impeller Count', '#')))
+        impellers = range(1, n + 1)
+        self.impeller_diameters = np.array([value((f"Impeller {i} Diameter", "m")) for i in impellers])
+        self.impeller_clearances = np.array([value((f"Impeller {i} Clearance", "m")) for i in impellers])
+        self.impeller_heights = np.array([value((f"Impeller {i} Height", "m")) for i in impellers])
+        self.impeller_Np = np.array([value((f"Impeller {i} Np", "-")) for i in impellers])
+        # impellers without a power number are taken to be the same type as the one below
+        for i in range(1, n):
+            if np.isnan(self.impeller_Np[i]):
+                self.impeller_Np[i] = self.impeller_Np[i-1]
+
+        # an impeller is submerged once the level is above its clearance plus half blade height
+        self.cover_volumes = ((self.impeller_clearances + self.impeller_heights/2) * self.area + self.V_dish) * 1e3
+        # the count is the highest submerged impeller, so take the running minimum from the top
+        self.submergence_volumes = np.minimum.accumulate(self.cover_volumes[::-1])[::-1]
+
+    def liquid_height(self, V):
+        '''
+        Liquid height above the dish [m] (linear in volume)
+
+        V: liquid volume(s) [L]
+        '''
+        return e.liquid_height(V, self.V_dish, self.T)
+
+    def impellers_submerged(self, V):
+        '''
+        Number of submerged impellers
+
+        V: liquid volume(s) [L]
+        '''
+        return np.searchsorted(self.submergence_volumes, V, side="left")
+
+    def powered(self, V):
+        '''
+        Mask of impellers adding power at fill volume(s) V [L], impellers along the last axis
+        '''
+        return e.powered_impellers(V, self.cover_volumes)
@@ -0,0 +1,146 @@
+import hashlib
+import math
+import pickle
+
+import core
+import kla
+
+# Dependency-tracked calculation graph for the interactive pages.
+# Pages set the inputs they own (system, vessel, speed, reaction) on every
+# rerun and read the nodes they display. A node re-evaluates only when one of
+# its inputs has changed, and a node whose new output equals the old one does
+# not invalidate the nodes below it (e.g. editing a solid property leaves the
+# liquid mass, and so the heat of reaction, untouched).
+
+def fingerprint(value):
+    '''
+    Content hash of a value (frames, dicts, arrays, dataclasses)
+    '''
+    return hashlib.blake2b(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), digest_size=16).digest()
+
+class CalcGraph:
+    '''
+    Lazily evaluated graph of cached calculations.
+
+    Inputs and nodes carry a version that changes only when their value does.
+    Each node caches its output with the versions of its dependencies.
+
+    evaluations: node name -> number of times the node was evaluated
+    '''
+
+    def __init__(self):
+        # name -> (function, dependency names)
+        self._nodes = {}
+        # name -> [value, fingerprint, version]
+        self._values = {}
+        # node name -> dependency versions of the cached value
+        self._keys = {}
+        self.evaluations = {}
+
+    def __contains__(self, name):
+        return name in self._values
+
+    def node(self, name, fn, deps):
+        '''
+        Add a calculation node.
+
+        name: node name
+        fn: function of the dependency values, in order
+        deps: names of the inputs and nodes it depends on
+        '''
+        self._nodes[name] = (fn, tuple(deps))
+        self.evaluations[name] = 0
+
+    def set(self, name, value):
+        '''
+        Set an input; the dependent nodes are invalidated only if the value changed.
+        '''
+        self._store(name, value)
+
+    def get(self, name):
+        '''
+        Value of an input or node, evaluating stale nodes on the way
+        '''
+        self._update(name)
+        return self._values[name][0]
+
+    def _store(self, name, value):
+        fp = fingerprint(value)
+        cached = self._values.get(name)
+        if cached is None:
+            self._values[name] = [value, fp, 0]
+        elif cached[1] != fp:
+            self._values[name] = [value, fp, cached[2] + 1]
+        else:
+            # same content: keep the version so dependents stay cached
+            cached[0] = value
+
+    def _update(self, name):
+        # bring a node up to date and return its version
+        if name not in self._nodes:
+            if name not in self._values:
+                raise KeyError(f"input '{name}' has not been set")
+            return self._values[name][2]
+
+        fn, deps = self._nodes[name]
+        key = tuple(self._update(dep) for dep in deps)
+        if self._keys.get(name) != key:
+            self._store(name, fn(*(self._values[dep][0] for dep in deps)))
+            self._keys[name] = key
+            self.evaluations[name] += 1
+        return self._values[name][2]
+
+# ************************ APP GRAPH ************************
+
+def _mixture_mass(mix):
+    # liquid mass [kg], NaN if the mixture has not been calculated
+    return mix.get(("Mass", "kg"), math.nan)
+
+def app_graph(reactor_catalog, kla_fits=None):
+    '''
+    Calculation graph of the app pages.
+
+    Inputs:
+    - mixture: system table with the Mixture row (system page)
+    - vessel: (owner, reactor), rpm: impeller speed [rpm] (reactor page)
+    - k, C_eff, dH_rxn: rate constant, effective concentration, heat of reaction [kJ/mol] (reaction page)
+    - gas_drawdown, rpm_max: mixing settings (mixing page)
+
+    Nodes:
+    mixture -> mix, solids -> liquid volume, mass
+    vessel -> record -> geometry -> reactor (+ rpm, liquid volume)
+    vessel -> kla_params (fitted kLa constants A, b)
+    reactor, mix, solids, kla_params -> hydrodynamics -> mixing (+ r_rxn)
+    k, C_eff -> r_rxn -> Q (+ dH_rxn, mass)
+
+    reactor_catalog: catalog.ReactorCatalog
+    kla_fits: kla.KlaFits, literature kLa constants for every vessel if None
+    '''
+    g = CalcGraph()
+    g.node("split", core.split_mixture, ["mixture"])
+    g.node("mix", lambda split: split[0], ["split"])
+    g.node("solids", lambda split: split[1], ["split"])
+    g.node("liquid_volume", lambda mix: mix[("Volume", "L")], ["mix"])
+    g.node("mass", _mixture_mass, ["mix"])
+
+    g.node("record", lambda vessel: reactor_catalog.get(*vessel), ["vessel"])
+    g.node("geometry", lambda vessel, record: reactor_catalog.geometry(*vessel), ["vessel", "record"])
+    g.node("reactor",
+           lambda vessel, record, rpm, V_l, geom: core.reactor_state(record, *vessel, rpm, V_l, geom=geom),
+           ["vessel", "record", "rpm", "liquid_volume", "geometry"])
+
+    g.node("kla_params",
+           lambda vessel: kla_fits.params(*vessel) if kla_fits is not None else (kla.DEFAULT_A, kla.DEFAULT_B),
+           ["vessel"])
+
+    g.node("r_rxn", lambda k, C_eff: k * C_eff, ["k", "C_eff"])
+    # heat generated [kW]
+    g.node("Q", lambda r_rxn, dH_rxn, mass: r_rxn * dH_rxn * mass * (-1), ["r_rxn", "dH_rxn", "mass"])
+
+    g.node("hydrodynamics",
+           lambda r, mix, s, gas_drawdown, rpm_max, geom, params: core.mixing_case(
+               r, mix, s, math.nan, gas_drawdown=gas_drawdown, rpm_max=rpm_max,
+               A=params[0], b=params[1], geom=geom),
+           ["reactor", "mix", "solids", "gas_drawdown", "rpm_max", "geometry", "kla_params"])
+    g.node("mixing", core.with_reaction, ["hydrodynamics", "r_rxn"])
+    return g
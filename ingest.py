@@ -0,0 +1,205 @@
+'''
+Streaming ingestion of probe logs into the measured-data store.
+
+Reduces raw probe time series (DCS exports, tens of millions of rows) to one
+kLa or mixing time per experiment in two chunked passes over the file, so
+memory use does not grow with the log size, and appends the results to the
+store read by the reactors page (data/measured_kla.csv, data/measured_tmix.csv).
+
+Usage:
+    python ingest.py probe_log.csv --kind kla          # dissolved oxygen traces -> kLa
+    python ingest.py tracer_log.csv --kind tmix        # conductivity traces -> mixing time
+    python ingest.py probe_log.csv --kind kla --dry-run   # print the results only
+
+Log (CSV), one row per sample, samples of an experiment in time order:
+    experiment,owner,reactor,stir_speed_rpm,volume_fill_L,time_s,value
+
+kLa (dynamic gassing-in): the probe signal C rises from C0 to the saturation
+C*, ln((C* - C) / (C* - C0)) = -kLa (t - t0). C* is the mean of the last
+samples of the experiment; kLa is the least-squares slope over the part of the
+response between FIT_RANGE.
+
+tmix (tracer): time from the first sample (tracer addition) until the signal
+stays within BAND of its final change, |C - C_end| <= BAND |C_end - C0|.
+'''
+import argparse
+import collections
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import data
+
+LOG_DTYPES = {"experiment": str, "owner": str, "reactor": str, "stir_speed_rpm": float,
+              "volume_fill_L": float, "time_s": float, "value": float}
+
+# kind -> (store file, result column)
+STORES = {"kla": (data.KLA_FILE, "kLa_per_sec"),
+          "tmix": (data.TMIX_FILE, "tmix_s")}
+
+STORE_COLUMNS = ["owner", "reactor", "stir_speed_rpm", "volume_fill_L"]
+
+# kind -> result columns of reduce() and their types, after the experiment, its conditions and samples
+RESULT_COLUMNS = {"kla": {"kLa_per_sec": float, "points": int, "R2": float},
+                  "tmix": {"tmix_s": float}}
+
+# rows read per chunk
+CHUNKSIZE = 1_000_000
+# samples averaged for the final (saturation) value of each experiment
+TAIL = 100
+# fraction of the response used for the kLa fit [-]
+FIT_RANGE = (0.1, 0.9)
+# mixing time band around the final value, as a fraction of the response [-]
+BAND = 0.05
+
+def read_log(path, chunksize=CHUNKSIZE):
+    '''
+    Probe log in chunks of rows, samples without time or value dropped
+    '''
+    for chunk in pd.read_csv(path, dtype=LOG_DTYPES, usecols=list(LOG_DTYPES),
+                             chunksize=chunksize, encoding="utf-8-sig"):
+        yield chunk.dropna(subset=["experiment", "time_s", "value"])
+
+def scan(path, chunksize=CHUNKSIZE, tail=TAIL):
+    '''
+    First pass: conditions, start and final value of every experiment.
+
+    Returns {experiment: dict} with owner, reactor, stir_speed_rpm, volume_fill_L,
+    samples, t0, C0, C_end (mean of the last tail samples) and response (C_end - C0).
+    '''
+    experiments = {}
+    tails = {}
+    for chunk in read_log(path, chunksize):
+        for exp, group in chunk.groupby("experiment", sort=False):
+            state = experiments.get(exp)
+            if state is None:
+                first = group.iloc[0]
+                state = experiments[exp] = {key: first[key] for key in STORE_COLUMNS}
+                state.update(samples=0, t0=float(first["time_s"]), C0=float(first["value"]))
+                tails[exp] = collections.deque(maxlen=tail)
+            state["samples"] += len(group)
+            tails[exp].extend(group["value"].to_numpy()[-tail:])
+
+    for exp, state in experiments.items():
+        state["C_end"] = float(np.mean(tails[exp]))
+        state["response"] = state["C_end"] - state["C0"]
+    return experiments
+
+def _kla_sums(group, state, fit_range):
+    # regression sums of ln(1 - f) on t - t0 over the fitted part of the response
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frac = (group["value"].to_numpy() - state["C0"]) / state["response"]
+    ok = (frac >= fit_range[0]) & (frac <= fit_range[1])
+    x = group["time_s"].to_numpy()[ok] - state["t0"]
+    y = np.log(1 - frac[ok])
+    return np.array([len(x), x.sum(), y.sum(), (x * x).sum(), (x * y).sum(), (y * y).sum()])
+
+def reduce(path, experiments, kind, chunksize=CHUNKSIZE, fit_range=FIT_RANGE, band=BAND):
+    '''
+    Second pass: kLa [1/s] or mixing time [s] of every experiment from scan().
+
+    kind: "kla" or "tmix"
+
+    Returns one row per experiment with its conditions, the number of samples
+    and the result (NaN if it cannot be estimated); kLa rows also have the
+    number of fitted points and R2.
+    '''
+    acc = {exp: np.zeros(6) for exp in experiments} if kind == "kla" else \
+          {exp: -math.inf for exp in experiments}
+    for chunk in read_log(path, chunksize):
+        for exp, group in chunk.groupby("experiment", sort=False):
+            state = experiments[exp]
+            if state["response"] == 0:
+                continue
+            if kind == "kla":
+                acc[exp] += _kla_sums(group, state, fit_range)
+            else:
+                outside = np.abs(group["value"].to_numpy() - state["C_end"]) > band * abs(state["response"])
+                if outside.any():
+                    acc[exp] = max(acc[exp], float(group["time_s"].to_numpy()[outside].max()))
+
+    rows = []
+    for exp, state in experiments.items():
+        row = {"experiment": exp, **{key: state[key] for key in STORE_COLUMNS}, "samples": state["samples"]}
+        if kind == "kla":
+            n, Sx, Sy, Sxx, Sxy, Syy = acc[exp]
+            Dx, Dy = n * Sxx - Sx**2, n * Syy - Sy**2
+            slope = (n * Sxy - Sx * Sy) / Dx if n >= 3 and Dx > 0 else math.nan
+            row.update({"kLa_per_sec": -slope,
+                        "points": int(n),
+                        "R2": (n * Sxy - Sx * Sy)**2 / (Dx * Dy) if n >= 3 and Dx > 0 and Dy > 0 else math.nan})
+        else:
+            # never outside the band: mixed by the first sample
+            row["tmix_s"] = (acc[exp] - state["t0"] if np.isfinite(acc[exp]) else 0.0) \
+                if state["response"] != 0 else math.nan
+        rows.append(row)
+    # explicit columns, so a log without valid samples gives an empty table of the same layout
+    results = pd.DataFrame(rows, columns=["experiment"] + STORE_COLUMNS + ["samples"] + list(RESULT_COLUMNS[kind]))
+    return results.astype({"samples": int, **RESULT_COLUMNS[kind]})
+
+def append_to_store(results, kind, path=None):
+    '''
+    Append the valid results (positive and finite) to the measured-data store.
+    Returns the number of rows written.
+    '''
+    store, col = STORES[kind]
+    path = path or store
+    rows = results.loc[np.isfinite(results[col]) & (results[col] > 0), STORE_COLUMNS + [col]]
+    if rows.empty:
+        return 0
+
+    exists = os.path.exists(path) and os.path.getsize(path) > 0
+    if exists:
+        # the store may not end with a newline (edited by hand)
+        with open(path, "rb") as fh:
+            fh.seek(-1, os.SEEK_END)
+            newline = fh.read(1) not in (b"\n", b"\r")
+        with open(path, "a", newline="") as fh:
+            if newline:
+                fh.write("\n")
+            rows.to_csv(fh, header=False, index=False, lineterminator="\n")
+    else:
+        rows.to_csv(path, index=False, lineterminator="\n")
+    return len(rows)
+
+def ingest(path, kind, chunksize=CHUNKSIZE, store=None, dry_run=False):
+    '''
+    Reduce a probe log to per-experiment results and append them to the store.
+
+    path: probe log (CSV)
+    kind: "kla" or "tmix"
+    chunksize: rows read per chunk
+    store: store file, default the one for the kind (STORES)
+    dry_run: do not write to the store
+
+    Returns the results per experiment.
+    '''
+    experiments = scan(path, chunksize)
+    results = reduce(path, experiments, kind, chunksize)
+    if not dry_run:
+        append_to_store(results, kind, store)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reduce probe logs to kLa or mixing times per experiment.")
+    parser.add_argument("log", help="probe log (CSV)")
+    parser.add_argument("--kind", choices=list(STORES), required=True,
+                        help="kla: dissolved oxygen traces, tmix: tracer (conductivity) traces")
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE, help="rows read per chunk")
+    parser.add_argument("--store", default=None, help="store file to append to (default data/measured_<kind>.csv)")
+    parser.add_argument("--dry-run", action="store_true", help="print the results without storing them")
+    args = parser.parse_args(argv)
+
+    results = ingest(args.log, args.kind, chunksize=args.chunksize, store=args.store, dry_run=args.dry_run)
+    print(results.to_string(index=False))
+    col = STORES[args.kind][1]
+    n_valid = int((np.isfinite(results[col]) & (results[col] > 0)).sum()) if len(results) else 0
+    print(f"{n_valid}/{len(results)} experiments reduced"
+          + ("" if args.dry_run else f" -> {args.store or STORES[args.kind][0]}"))
+    return 0 if n_valid else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+import engine as e
+
+# kLa correlations fitted to the measurements in data/measured_kla.csv.
+# Each vessel is fitted once when the table is built (see data.kla_fits, which
+# refits only when the measurement file or the reactor catalog changes);
+# kLa evaluations take the vessel's constants from here and fall back to the
+# literature values for vessels without enough measurements.
+
+# kLa_gas_drawdown constants used without measurements [-]
+DEFAULT_A = 0.07
+DEFAULT_B = 0.53
+
+# confidence level of the parameter intervals [-]
+CONFIDENCE = 0.95
+
+COLUMNS = ["Points", "A", "A low", "A high", "b", "b low", "b high", "R2",
+           "C", "b (sub)", "e", "e low", "e high", "R2 (sub)"]
+
+def t_quantile(dof, confidence=CONFIDENCE):
+    '''
+    Two-sided Student t quantile, normal quantile if scipy is not installed
+
+    dof: degrees of freedom [-]
+    confidence: confidence level [-]
+    '''
+    q = 0.5 + confidence / 2
+    try:
+        from scipy import stats
+    except ImportError:
+        from statistics import NormalDist
+        return NormalDist().inv_cdf(q)
+    return float(stats.t.ppf(q, dof))
+
+def power_per_mass(N, V, geom):
+    '''
+    Power per unit mass [W/kg] of the impellers powered at fill volume V.
+    P/M = sum(Po N^3 D^5) / V, independent of the liquid density.
+
+    N: impeller speed [rpm]
+    V: liquid volume [L]
+    geom: geometry.VesselGeometry
+    '''
+    V = np.asarray(V, dtype=float)
+    # at 1000 kg/m3 the liquid mass [kg] equals the volume [L]
+    P = e.total_power(geom.impeller_Np, 1000.0, N, geom.impeller_diameters, geom.powered(V))
+    return P / V
+
+def submergence_ratio(V, geom):
+    '''
+    Submergence of the top powered impeller over its diameter, H_sub/D [-]
+
+    V: liquid volume [L]
+    geom: geometry.VesselGeometry
+    '''
+    V = np.asarray(V, dtype=float)
+    powered = geom.powered(V)
+    H_sub = geom.liquid_height(V) - e.top_powered(geom.impeller_clearances, powered)
+    return H_sub / e.top_powered(geom.impeller_diameters, powered)
+
+def log_fit(X, y):
+    '''
+    Least squares fit of y = X p with confidence intervals.
+
+    X: design matrix [points, parameters]
+    y: observations [points]
+
+    Returns (parameters, half widths of the confidence intervals, R2); the
+    half widths are NaN without residual degrees of freedom.
+    '''
+    p, _, rank, _ = np.linalg.lstsq(X, y, rcond=None)
+    n, k = X.shape
+    resid = y - X @ p
+    ss_tot = np.sum((y - y.mean())**2)
+    R2 = 1 - np.sum(resid**2) / ss_tot if ss_tot > 0 else math.nan
+    if rank < k or n <= k:
+        return p, np.full(k, math.nan), R2
+    s2 = np.sum(resid**2) / (n - k)
+    se = np.sqrt(np.diag(s2 * np.linalg.inv(X.T @ X)))
+    return p, t_quantile(n - k) * se, R2
+
+class KlaFits:
+    '''
+    Per-vessel fits of the gas drawdown kLa correlations to measured kLa:
+    - kLa_gas_drawdown, ln(kLa) = ln(A) + b ln(P/M)
+    - kLa_gas_drawdown_2, ln(kLa) = ln(C) + b ln(P/M) + e ln(H_sub/D), if the
+      measurements cover more than one submergence
+    P/M and H_sub/D follow from the measured speed and fill volume and the
+    vessel geometry. Intervals are at the CONFIDENCE level (A and C are
+    log-normal, so their intervals are not symmetric).
+
+    table: one row per fitted vessel indexed by (owner, reactor), COLUMNS
+    '''
+
+    def __init__(self, df_kla, reactor_catalog):
+        df = df_kla.dropna(subset=["owner", "reactor", "stir_speed_rpm", "volume_fill_L", "kLa_per_sec"])
+        rows = {}
+        for (owner, reactor), group in df.groupby(["owner", "reactor"], sort=False):
+            if (owner, reactor) not in reactor_catalog:
+                continue
+            try:
+                geom = reactor_catalog.geometry(owner, reactor)
+            except (KeyError, ValueError):
+                # vessel without the geometry needed for P/M
+                continue
+            N = group["stir_speed_rpm"].to_numpy(dtype=float)
+            V = group["volume_fill_L"].to_numpy(dtype=float)
+            kla = group["kLa_per_sec"].to_numpy(dtype=float)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                eps = power_per_mass(N, V, geom)
+                sub = submergence_ratio(V, geom)
+            ok = (kla > 0) & (eps > 0) & np.isfinite(eps)
+            # two parameters need a third point for an interval
+            if np.count_nonzero(ok) < 3 or np.ptp(np.log(eps[ok])) == 0:
+                continue
+
+            y = np.log(kla[ok])
+            x = np.log(eps[ok])
+            p, half, R2 = log_fit(np.column_stack([np.ones_like(x), x]), y)
+            row = {"Points": int(np.count_nonzero(ok)),
+                   "A": math.exp(p[0]), "A low": math.exp(p[0] - half[0]), "A high": math.exp(p[0] + half[0]),
+                   "b": p[1], "b low": p[1] - half[1], "b high": p[1] + half[1], "R2": R2}
+
+            ok_sub = ok & (sub > 0) & np.isfinite(sub)
+            if np.count_nonzero(ok_sub) >= 4 and np.ptp(np.log(sub[ok_sub])) > 0:
+                x_sub = np.log(sub[ok_sub])
+                p, half, R2 = log_fit(np.column_stack([np.ones_like(x_sub), np.log(eps[ok_sub]), x_sub]),
+                                      np.log(kla[ok_sub]))
+                row.update({"C": math.exp(p[0]), "b (sub)": p[1],
+                            "e": p[2], "e low": p[2] - half[2], "e high": p[2] + half[2], "R2 (sub)": R2})
+            rows[(owner, reactor)] = row
+
+        self.table = pd.DataFrame.from_dict(rows, orient="index", columns=COLUMNS)
+        self.table.index = pd.MultiIndex.from_tuples(list(rows), names=["owner", "reactor"])
+
+    def __contains__(self, key):
+        return key in self.table.index
+
+    def params(self, owner, reactor):
+        '''
+        kLa_gas_drawdown constants (A, b) of a vessel, the defaults if it has no fit
+        '''
+        if (owner, reactor) not in self:
+            return DEFAULT_A, DEFAULT_B
+        row = self.table.loc[(owner, reactor)]
+        return float(row["A"]), float(row["b"])
+
+    def submergence_params(self, owner, reactor):
+        '''
+        kLa_gas_drawdown_2 constants (C, b, e) of a vessel, None if its
+        measurements do not cover more than one submergence
+        '''
+        if (owner, reactor) not in self:
+            return None
+        row = self.table.loc[(owner, reactor)]
+        if pd.isna(row["e"]):
+            return None
+        return float(row["C"]), float(row["b (sub)"]), float(row["e"])
+
+    def arrays(self, index):
+        '''
+        kLa_gas_drawdown constants A and b as arrays aligned with a vessel index
+        (e.g. the catalog table), the defaults for vessels without a fit
+
+        index: (owner, reactor) pairs
+        '''
+        fitted = self.table.reindex(pd.MultiIndex.from_tuples(list(index)))
+        return (fitted["A"].fillna(DEFAULT_A).to_numpy(dtype=float),
+                fitted["b"].fillna(DEFAULT_B).to_numpy(dtype=float))
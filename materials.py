@@ -0,0 +1,163 @@
+import numpy as np
+
+import mixture
+
+# Temperature-dependent material properties from properties/materials.csv.
+# Each material property is fitted once when the table is built; queries are
+# closed-form evaluations over arrays of temperatures.
+
+# kelvin offset [K]
+T_ABS = 273.15
+# temperature of the system table values [degC]
+T_REF = 25.0
+
+# material property -> system table column
+SYSTEM_COLUMNS = {"density": "Density [kg/m3]",
+                  "dynamic viscosity": "Dynamic Viscosity [mPa.s]",
+                  "surface tension": "Surface Tension [N/m]"}
+
+class MaterialProperties:
+    '''
+    Property-at-temperature service.
+
+    Fits per (material, property):
+    - dynamic viscosity: Andrade/Arrhenius, ln(mu) = A + B/T [T in K]
+    - density: linear in T
+    - other properties: linear interpolation between measured temperatures
+    Properties measured at one temperature only are constant.
+
+    fits: (material, property) -> (kind, parameters)
+    units: (material, property) -> units
+    '''
+
+    def __init__(self, df_materials):
+        df = df_materials.dropna(subset=["material", "property", "temperature", "value"])
+        self.fits = {}
+        self.units = {}
+        for (material, prop), group in df.groupby(["material", "property"], sort=False):
+            # average repeated measurements at the same temperature
+            points = group.groupby("temperature")["value"].mean()
+            T = points.index.to_numpy(dtype=float)
+            values = points.to_numpy(dtype=float)
+            self.units[(material, prop)] = group["units"].iloc[0]
+
+            if len(T) == 1:
+                self.fits[(material, prop)] = ("constant", values[0])
+            elif prop == "dynamic viscosity":
+                # least squares on ln(mu) vs 1/T
+                B, A = np.polyfit(1 / (T + T_ABS), np.log(values), 1)
+                self.fits[(material, prop)] = ("andrade", (A, B))
+            elif prop == "density":
+                self.fits[(material, prop)] = ("linear", tuple(np.polyfit(T, values, 1)))
+            else:
+                self.fits[(material, prop)] = ("table", (T, values))
+
+    def __contains__(self, key):
+        return key in self.fits
+
+    def materials(self):
+        '''List of materials with at least one property'''
+        return list(dict.fromkeys(material for material, _ in self.fits))
+
+    def value(self, material, prop, T):
+        '''
+        Property of a material at temperature(s) T [degC], in the units of materials.csv
+
+        material: material name
+        prop: property name, e.g. "dynamic viscosity"
+        T: temperature(s) [degC]
+        '''
+        kind, params = self.fits[(material, prop)]
+        T = np.asarray(T, dtype=float)
+        if kind == "constant":
+            return np.full(T.shape, params)
+        if kind == "andrade":
+            A, B = params
+            return np.exp(A + B / (T + T_ABS))
+        if kind == "linear":
+            return np.polyval(params, T)
+        return np.interp(T, *params)
+
+    def ratio(self, material, prop, T, T_ref=T_REF):
+        '''
+        Change of a property from T_ref to temperature(s) T, f(T) / f(T_ref) [-].
+        1 for properties without a temperature dependence (not in the table, or
+        measured at one temperature only).
+
+        material: material name
+        prop: property name
+        T: temperature(s) [degC]
+        T_ref: reference temperature [degC]
+        '''
+        T = np.asarray(T, dtype=float)
+        if self.fits.get((material, prop), ("constant",))[0] == "constant":
+            return np.ones(T.shape)
+        return self.value(material, prop, T) / self.value(material, prop, T_ref)
+
+    def system_at(self, sys_full, T, T_ref=T_REF):
+        '''
+        Component properties of a completed system table (see mixture.complete_system)
+        at temperature(s) T [degC].
+
+        The system table values hold at T_ref; density, dynamic viscosity and surface
+        tension are scaled by the fitted change from T_ref (see ratio), so components
+        without a temperature dependence in the materials table keep their values.
+        Kinematic viscosity follows the dynamic viscosity over density.
+
+        Returns {system column: array [temperatures, components]}.
+        '''
+        T = np.atleast_1d(np.asarray(T, dtype=float))
+        props = {}
+        for prop, col in SYSTEM_COLUMNS.items():
+            base = sys_full[col].to_numpy(dtype=float, na_value=np.nan)
+            scale = np.stack([self.ratio(material, prop, T, T_ref) for material in sys_full["Compound"]], axis=-1)
+            props[col] = base * scale
+
+        nu = sys_full["Kinematic Viscosity [m2/s]"].to_numpy(dtype=float, na_value=np.nan)
+        props["Kinematic Viscosity [m2/s]"] = nu * np.stack(
+            [self.ratio(m, "dynamic viscosity", T, T_ref) / self.ratio(m, "density", T, T_ref)
+             for m in sys_full["Compound"]], axis=-1)
+        return props
+
+    def mixture_at(self, sys_full, T, T_ref=T_REF):
+        '''
+        Mixture properties at temperature(s) T [degC].
+
+        The liquid-phase components are mixed with the rules of mixture.mix_system at
+        T and at T_ref; the mixture of the system table (mixture.mix_system) is scaled
+        by that change, so it is returned unchanged at T_ref and solids stay constant.
+
+        sys_full: completed system table (see mixture.complete_system)
+        T: temperature(s) [degC]
+        T_ref: temperature of the system table values [degC]
+
+        Returns {(property, units): array over T}.
+        '''
+        T = np.atleast_1d(np.asarray(T, dtype=float))
+        liquid = sys_full[sys_full["Phase"] == "Liquid"]
+        liquid_T = self._liquid_mixture(liquid, np.append(T, T_ref), T_ref)
+        nominal = mixture.mix_system(sys_full)[0].iloc[-1]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return {key: float(nominal[key]) * values[:-1] / values[-1] for key, values in liquid_T.items()}
+
+    def _liquid_mixture(self, liquid, T, T_ref):
+        # mixing rules of mixture.mix_system over the liquid components at temperatures T
+        props = self.system_at(liquid, T, T_ref)
+        w = liquid["Mass [kg]"].to_numpy(dtype=float)
+        w = w / w.sum()
+
+        cols = list(props)
+        log_mix = [col.rsplit('[', 1)[0].strip() in mixture.LOG_MIXING for col in cols]
+        avg = mixture.mixing_rule(np.stack([props[col] for col in cols], axis=-1), w, log_mix)
+        mix = {tuple(p.strip().rstrip(']') for p in col.rsplit('[', 1)): avg[:, j] for j, col in enumerate(cols)}
+
+        # volume-additive density, total mass / sum of component volumes
+        rho = props["Density [kg/m3]"]
+        valid = ~np.isnan(rho)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mix[("Density", "kg/m3")] = (np.sum(np.where(valid, w, 0.0), axis=-1)
+                                         / np.sum(np.where(valid, w / rho, 0.0), axis=-1))
+        mix[("Kinematic Viscosity", "m2/s")] = mixture.kinematic_viscosity(
+            mix[("Dynamic Viscosity", "mPa.s")], mix[("Density", "kg/m3")], mix[("Kinematic Viscosity", "m2/s")])
+        return mix
@@ -3,43 +3,37 @@ import streamlit as st
 import numpy as np
 import plotly.express as px
 import functions as f
-import math
+import core
+import cases
+import timing
 
 st.logo("assets/logo.png")
 st.header("Reactor Mixing Calculations")
 
 # get global variables needed here
 all_props = st.session_state.mixture
-mix = all_props[all_props["Compound"] == "Mixture"].to_dict('records')[0]
+calc = st.session_state['calc_graph']
+calc.set("mixture", all_props)
+mix, s = calc.get("mix"), calc.get("solids")
 st.write(mix)
 
-# get solids properties
-if "Solid" in all_props["Phase"].values:
-    s = all_props[all_props["Phase"] == "Solid"].to_dict('records')[0]
-    s[("Loading", "%")] = s[('Mass','kg')] / mix[('Mass','kg')] * 100
-else:
-    s = {}
+if not s:
     st.warning("No solids found in mixture. Dependent calcs will return errors.")
 
 r = st.session_state.reactor
 rxn = st.session_state.rxn_rate
+calc.set("vessel", (r[("Owner", "-")], r[("Reactor", "-")]))
+calc.set("rpm", r[("Impeller Speed", "rpm")])
+for key in ("k", "C_eff", "dH_rxn"):
+    calc.set(key, rxn[key])
 
 # compile mixing case and add to report
 def add_case():
     if 'report' not in st.session_state:
-        st.session_state.report = []
-
-    case_dict = {
-        'Owner' : r[("Owner", "-")],
-        'Agitation Speed (rpm)' : r[("Impeller Speed", "rpm")],
-        'Liquid Volume (L)' : r[("Liquid Volume", "L")],
-        'Solid Loading (%)' : s[("Loading", "%")] if s else 0
-    }
-    case_no = len(st.session_state.report) + 1
-    case_name = f"{r[("Reactor", "-")]}_{case_no}"
-    df = pd.DataFrame.from_dict(case_dict, orient='index', columns=[case_name])
+        st.session_state.report = cases.CaseStore()
 
-    st.session_state.report.append(df)
+    # one row per case with every metric shown on this page
+    st.session_state.report.add_case(r, s, res)
 
 mix1, mix2 = st.columns(2)
 
@@ -47,39 +41,13 @@ mix1, mix2 = st.columns(2)
 
 # dynamic viscosity [mPa.s]
 mu = mix[("Dynamic Viscosity", "mPa.s")]
-# kinematic viscosity [m2/s]
-nu = mix[("Kinematic Viscosity", "m2/s")]
 # liquid density [kg/m3]
 rho_L = mix[("Density", "kg/m3")]
 # liquid volume [L]
 V_l = mix[("Volume", "L")]
-# stir speed [rpm]
-Nsp = r[("Impeller Speed", "rpm")]
-# tank diameter [m]
-T = r[("Internal Diameter", "m")]
-# liquid height [m]
-H = r[("Liquid Height", "m")]
-
-# get solids properties
-try:
-    # solid density [kg/m3]
-    rho_S = s[("Density", "kg/m3")]
-    if math.isnan(rho_S):
-        st.toast("Solid density is NaN. Did you forget to add a density value?")
-        raise ValueError("Solid density is NaN.")
-    # particle diameter [m]
-    d_P = s[("Particle Size", "um")] / 1e6
-except:
-    st.error("Error with solids properties.")
 
 rpm_min = float(r[("Agitation Min", "rpm")])
 rpm_max = float(r[("Agitation Max", "rpm")])
-impellers = int(r[("Impeller Count", "#")])
-impeller_diameters = [float(r[(f"Impeller {i} Diameter", "m")]) for i in range(1, impellers + 1)]
-impeller_clearances = [float(r[(f"Impeller {i} Clearance", "m")]) for i in range(1, impellers + 1)]
-
-# impeller diameter for calculations; use max diameter if multiple impellers
-impeller_diameter = max(impeller_diameters)
 
 # x inputs
 try:
@@ -96,6 +64,7 @@ except ValueError:
 cbx1, cbx2, cbx3 = st.columns(3)
 
 gas_drawdown = cbx1.checkbox("Gas drawdown", value=False)
+avoid_gas_drawdown = cbx2.checkbox("Avoid gas drawdown", value=False)
 
 st.button("Add to Report", on_click=add_case)
 
@@ -105,88 +74,38 @@ st.button("Add to Report", on_click=add_case)
 
 st.subheader("Mixing Summary")
 
-# *************** SUSPENSION CALCS ***************
-
-res1, res2, res3 = st.columns(3)
+# *************** MIXING CALCS ***************
 
-# calculate Njs using different correlations
-# Zwietering
-try:
-    S = float(r["Zwietering S parameter", "-"])
-    # calculate solid mass ratio mS/mL*100 [%]
-    X = s[("Loading", "%")]
-    Njs_Z = f.Njs_Z(S, nu, rho_L, rho_S, X, d_P, impeller_diameter) * 60
-
-    Nsp_sus_frac = Nsp / Njs_Z
-
-    if Nsp_sus_frac >= 1.2:
-        sus_cond_Z = "Suspended"
-    elif Nsp_sus_frac >= 1.0:
-        sus_cond_Z = "Just Suspended"
-    elif Nsp_sus_frac >= 0.8:
-        sus_cond_Z = "Maybe Suspended"
-    else:
-        sus_cond_Z = "Not Suspended"
+# hydrodynamics are re-evaluated only when the system, vessel, speed or settings change;
+# a new reaction rate only updates the Damkohler numbers
+calc.set("gas_drawdown", gas_drawdown)
+calc.set("rpm_max", rpm_max)
+r = calc.get("reactor")
+res = calc.get("mixing")
+timing.lap("mixing case")
+for msg in res.errors:
+    st.error(msg)
 
-except:
-    Njs_Z = 0.0
-    Nsp_sus_frac = 0.0
-    sus_cond_Z = "Error"
-    st.error("Error calculating Njs (Zwietering). Check system properties and Zwietering parameter.")
-
-res1.metric("Njs Zwietering (rpm)", f"{round(Njs_Z, 0):.0f}",
-            delta=f"{Nsp_sus_frac:.2f}*Njs | {sus_cond_Z}",
-            border=True)
+impeller_diameter = res.impeller_diameter
 
-# GMB
-try:
-    # get reactor parameters
-    z = float(r[("GMB z parameter", "-")])
-    Po = float(r[("Impeller 1 Np", "-")])
-    C = float(r[("Impeller 1 Clearance", "m")])
-    # calculate solids volume fraction Vsol/Vslurry [%]
-    Xv = s[("Volume", "L")]/mix[("Volume", "L")]*100
-
-    Njs_GMB = f.Njs_GMB(z, Po, impeller_diameter, rho_L, rho_S, Xv, d_P, C) * 60
-
-    Nsp_sus_frac_GMB = Nsp / Njs_GMB
-
-    if Nsp_sus_frac_GMB >= 1.2:
-        sus_cond_GMB = "Suspended"
-    elif Nsp_sus_frac_GMB >= 1.0:
-        sus_cond_GMB = "Just Suspended"
-    elif Nsp_sus_frac_GMB >= 0.8:
-        sus_cond_GMB = "Maybe Suspended"
-    else:
-        sus_cond_GMB = "Not Suspended"
+res1, res2, res3 = st.columns(3)
 
-except:
-    Njs_GMB = 0.0
-    Nsp_sus_frac_GMB = 0.0
-    sus_cond_GMB = "Error"
-    st.error("Error calculating Njs (GMB). Check system properties and GMB parameters.")
+# *************** SUSPENSION ***************
 
-res2.metric("Njs GMB (rpm)", f"{round(Njs_GMB, 0):.0f}",
-            delta=f"{Nsp_sus_frac_GMB:.2f}*Njs | {sus_cond_GMB}",
+res1.metric("Njs Zwietering (rpm)", f"{round(res.Njs_Z, 0):.0f}",
+            delta=f"{res.sus_frac_Z:.2f}*Njs | {res.sus_cond_Z}",
             border=True)
 
-rpm_frac_max = (rpm_max - Nsp) / Nsp * 100
+res2.metric("Njs GMB (rpm)", f"{round(res.Njs_GMB, 0):.0f}",
+            delta=f"{res.sus_frac_GMB:.2f}*Njs | {res.sus_cond_GMB}",
+            border=True)
 
 # display set-point rpm
-res3.metric("Impeller Speed (rpm)", f"{Nsp:.0f}", delta=f"{rpm_frac_max:.0f}% to capacity"
+res3.metric("Impeller Speed (rpm)", f"{res.Nsp:.0f}", delta=f"{res.rpm_frac_max:.0f}% to capacity"
             , border=True)
 
 # ************* GLOBAL DIMENSIONLESS NUMBERS *************
 
-Re = f.Re_STR(rho_L, impeller_diameter, Nsp, mu)
-
-if Re >= 10_000:
-    flow_regime= "Turbulent"
-elif Re < 10_000 and Re >= 10:
-    flow_regime = "Transitional"
-else:
-    flow_regime = "Laminar"
-
 # format Re values
 def format_k(value):
     if abs(value) >= 1_000_000:
@@ -196,20 +115,14 @@ def format_k(value):
     else:
         return str(int(value))
 
-Re_str = format_k(Re)
+Re_str = format_k(res.Re)
 
-res1.metric("Reynolds", Re_str, delta=f"{flow_regime}",
+res1.metric("Reynolds", Re_str, delta=f"{res.flow_regime}",
             border=True, delta_color="off")
 
 # ************* FREE-SURFACE GAS-LIQUID MASS TRANSFER *************
 
-# calculate impeller power input [W]
-# TODO: sum power for multiple impellers
-P_imp = f.power_input(r[("Impeller 1 Np", "-")], rho_L, Nsp, impeller_diameter)
-
-# kla = A(P/M)^B = f(A,B,P,M)
-kla_agitation = f.kLa_gas_drawdown(0.07, 0.53, P_imp, mix[("Mass", "kg")])
-res2.metric("kLa (free-surface) (1/s)", f"{kla_agitation:.3f}", delta="Based on agitation only",
+res2.metric("kLa (free-surface) (1/s)", f"{res.kla:.3f}", delta="Based on agitation only",
         border=True, delta_color="off")
 
 # ************* DAMKOHLER NUMBERS *************
@@ -217,65 +130,101 @@ res2.metric("kLa (free-surface) (1/s)", f"{kla_agitation:.3f}", delta="Based on
 # (1) reaction rate vs convective mixing
 
 # (2) reaction rate vs mass transfer
-Da_2 = rxn['r_rxn'] / kla_agitation
-Da_2_result = "Mass Transfer Limited" if Da_2 > 10 else "Kinetically Limited" if Da_2 < 0.1 else "Intermediate"
-res3.metric("Da II (reaction/mass transfer)", f"{Da_2:.3f}", delta=f"{Da_2_result}",
+res3.metric("Da II (reaction/mass transfer)", f"{res.Da_2:.3f}", delta=f"{res.Da_2_result}",
         border=True, delta_color="off")
 
 # ************* GAS DRAWDOWN *************
 
 if gas_drawdown:
-    # calculate gas drawdown
-    if ("Gassing System", "-") not in r:
-        gassing_system = "vortexing"
-    else:
-        # default to vortexing
-        gassing_system = "vortexing"
-
-    Nmin_gd = f.Nmin_gas_drawdown(impeller_diameters[-1],
-                                impeller_clearances[-1],
-                                 gassing_system=gassing_system)
-
-    Nmin_gd_frac = Nsp / Nmin_gd
-
-    if Nmin_gd_frac >= 1.0:
-        gassing_cond = "Gas drawdown"
-    elif Nmin_gd_frac >= 0.8:
-        gassing_cond = "Possible gas drawdown"
-    else:
-        gassing_cond = "No gas drawdown"
-
-    Nmin_gd_delta = (rpm_max - Nmin_gd)/rpm_max*100
-
-    res2.metric("Nmin Gassing (rpm)", f"{round(Nmin_gd, 0):.0f}",
-                delta=f"{Nmin_gd_delta:.0f}% {gassing_cond}",
+    res2.metric("Nmin Gassing (rpm)", f"{round(res.Nmin_gd, 0):.0f}",
+                delta=f"{res.Nmin_gd_delta:.0f}% {res.gassing_cond}",
                 border=True)
 
 # *************** MIXING TIMES ***************
-eps = P_imp / (mix[("Mass", "kg")])  # power per unit mass [W/kg]
-
-# calculate bulk mixing time at selected stir speed [s]
-tm_bulk = f.tm2(H, T, impeller_diameter, V_l/1e3,
-                eps, mu=mu/1000, rho_L=rho_L, regime=flow_regime)
-
-# calculate micro-mixing rate [1/s]
-tau_micro = f.micro_mixing_rate(eps, nu)
-
-# calculate micro-mixing time [s]
-tm_micro = 1 / tau_micro
 
-res1.metric("Agitator Power [W]", f"{P_imp:.2f}", delta=f"",
+res1.metric("Agitator Power [W]", f"{res.P:.2f}", delta=f"",
             border=True, delta_color="off")
 
-res2.metric("Mixing Time (bulk) [s]", f"{tm_bulk:.2f}", delta="",
+res2.metric("Mixing Time (bulk) [s]", f"{res.tm_bulk:.2f}", delta="",
             border=True)
 
-res3.metric("Micro-mixing Time [s]", f"{tm_micro:.2f}", delta="",
+res3.metric("Micro-mixing Time [s]", f"{res.tm_micro:.2f}", delta="",
             border=True)
 
 # TODO: circulation time (TODO: max flow calc)
 # TODO: local mixing constant
 
+timing.lap("render")
+
+# *************** OPERATING WINDOW ***************
+
+st.subheader("Operating Window")
+
+win1, win2 = st.columns(2)
+suspension = win1.selectbox("Suspension correlation", ["Zwietering", "GMB"])
+Da_max = win2.number_input("Max Da II (reaction/mass transfer)", value=1.0, min_value=0.01, step=0.1)
+
+# feasible agitation range at each fill volume (closed-form bounds)
+kla_A, kla_b = calc.get("kla_params")
+window, window_errors = core.operating_window(r, mix, s, rxn['r_rxn'], Da_max=Da_max,
+                                              suspension=suspension,
+                                              avoid_gas_drawdown=avoid_gas_drawdown,
+                                              rpm_min=rpm_min, rpm_max=rpm_max,
+                                              A=kla_A, b=kla_b, geom=calc.get("geometry"))
+timing.lap("operating window")
+for msg in window_errors:
+    st.warning(f"Operating window without suspension limit: {msg}")
+
+# the bounds vary with volume, so the speed range is given at the set-point fill only
+if not window["Feasible"].any():
+    st.error("No agitation speed and fill volume satisfies all constraints.")
+elif not window["Volume (L)"].min() <= V_l <= window["Volume (L)"].max():
+    st.warning(f"Set-point fill ({V_l:.3g} L) is outside the vessel's volume range.")
+else:
+    N_low = np.interp(V_l, window["Volume (L)"], window["N min (rpm)"])
+    N_high = np.interp(V_l, window["Volume (L)"], window["N max (rpm)"])
+    if N_low <= N_high:
+        st.write(f"Feasible at the set-point fill of {V_l:.3g} L for {N_low:.0f} - {N_high:.0f} rpm.")
+    else:
+        st.warning(f"No agitation speed satisfies all constraints at the set-point fill of {V_l:.3g} L.")
+
+fig_window = px.line(window, x="Volume (L)", y=["N min (rpm)", "N max (rpm)"],
+                     title="Operating window", labels={"value": "RPM", "variable": "Bound"})
+fig_window.add_scatter(x=[V_l], y=[res.Nsp], mode="markers", name="Set point")
+st.plotly_chart(fig_window)
+
+with st.expander("Window boundaries"):
+    st.dataframe(window)
+
+# *************** UNCERTAINTY ***************
+
+st.subheader("Uncertainty")
+
+# input distributions around the nominal values (see core.UNCERTAINTY)
+uncertainty_df = pd.DataFrame([(name, kind, spread) for name, (kind, spread) in core.UNCERTAINTY.items()],
+                              columns=["Input", "Distribution", "Spread"])
+uncertainty_df = st.data_editor(uncertainty_df, hide_index=True, disabled=["Input"],
+                                column_config={"Distribution": st.column_config.SelectboxColumn(
+                                                   options=["normal", "lognormal", "uniform", "fixed"]),
+                                               "Spread": st.column_config.NumberColumn(min_value=0.0, step=0.05)})
+n_draws = st.number_input("Monte Carlo draws", value=20_000, min_value=100, step=10_000)
+
+if st.button("Run Monte Carlo"):
+    uncertainty = {row.Input: (row.Distribution, float(row.Spread)) for row in uncertainty_df.itertuples()}
+    mc_percentiles, mc_probabilities = core.monte_carlo(r, mix, s, rxn['r_rxn'], uncertainty=uncertainty,
+                                                        n_draws=int(n_draws), A=kla_A, b=kla_b,
+                                                        geom=calc.get("geometry"))
+    timing.lap("monte carlo")
+
+    mc1, mc2, mc3 = st.columns(3)
+    for col, label in [(mc1, "Not Suspended (Zwietering)"), (mc2, "Not Suspended (GMB)"),
+                       (mc3, "Mass Transfer Limited")]:
+        if label in mc_probabilities.index:
+            col.metric(f"P({label})", f"{mc_probabilities.loc[label, 'Probability (%)']:.1f}%", border=True)
+    st.dataframe(mc_percentiles)
+    with st.expander("Probability of each condition"):
+        st.dataframe(mc_probabilities)
+
 # *************** SCAN FOR TRANSITION SCALE ***************
 # TODO: calculate when mixing time becomes an issue
 
@@ -300,6 +249,9 @@ fig2 = px.line(x=x, y=y_tm, title="tm vs rpm",
               labels={'x': "RPM",
                       'y': "s"})
 
+timing.lap("figure build")
+
 # show plots
 st.plotly_chart(fig1)
 st.plotly_chart(fig2)
+timing.lap("render")
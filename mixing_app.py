@@ -1,6 +1,10 @@
+import contextlib
 import pandas as pd
 import streamlit as st
 import numpy as np
+import data
+import graph
+import timing
 
 st.logo("assets/logo.png")
 
@@ -34,17 +38,44 @@ pg = st.navigation([main_pg,
 # set page icon
 st.set_page_config(page_title="Mixing App", page_icon="➕")
 
-# import data files
-try:
-    st.session_state['materials_df'] = pd.read_csv("properties/materials.csv")
-    st.session_state['reactions_df'] = pd.read_csv("properties/reactions.csv")
-    st.session_state['reactors_df'] = pd.read_csv("properties/reactors.csv")
-    st.session_state['data_kla_df'] = pd.read_csv("data/measured_kla.csv")
+# opt-in timing of page reruns (see timing.py)
+timed = st.sidebar.toggle("Timing", value=timing.ENABLED)
+if timed and 'profiler' not in st.session_state:
+    st.session_state['profiler'] = timing.Profiler()
 
-    # create vessel name column for easier selection in scaling page
-    st.session_state['reactors_df']["name"] = st.session_state['reactors_df']["owner"] + "-" + st.session_state['reactors_df']["reactor"]
-except Exception as e:
-    st.error(f"Data import error! {e}")
+with timing.rerun(st.session_state['profiler'], pg.title) if timed else contextlib.nullcontext():
+    # import data files; parsed once per process and shared read-only between sessions
+    with timing.section("data load"):
+        try:
+            st.session_state['materials_df'] = data.materials()
+            st.session_state['reactions_df'] = data.reactions()
+            st.session_state['reactors_df'] = data.reactors()
+            st.session_state['reactor_catalog'] = data.reactor_catalog()
+            st.session_state['data_kla_df'] = data.measured_kla()
+            st.session_state['data_tmix_df'] = data.measured_tmix()
+            st.session_state['kla_fits'] = data.kla_fits()
+            # per-session calculation graph, rebuilt when the reactor catalog or kLa fits change
+            sources = (st.session_state['reactor_catalog'], st.session_state['kla_fits'])
+            if st.session_state.get('calc_graph_sources') != sources:
+                st.session_state['calc_graph'] = graph.app_graph(*sources)
+                st.session_state['calc_graph_sources'] = sources
+        except Exception as e:
+            st.error(f"Data import error! {e}")
 
-pg.run()
+    # timings of the previous reruns
+    if timed:
+        profiler = st.session_state['profiler']
+        with st.sidebar.expander("Timing"):
+            st.caption(f"Last {pg.title} rerun")
+            st.dataframe(profiler.last(pg.title)[["Section", "Time (s)"]], hide_index=True)
+            st.caption("This session")
+            st.dataframe(profiler.stats(), hide_index=True)
+            st.caption(f"All sessions ({timing.process.reruns} reruns)")
+            st.dataframe(timing.process.stats(), hide_index=True)
+            st.download_button("Download profile", data=profiler.to_json(),
+                               file_name="mixing_app_profile.json", mime="application/json")
+            if st.button("Reset timings"):
+                profiler.clear()
 
+    timing.lap("app")
+    pg.run()
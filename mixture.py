@@ -0,0 +1,292 @@
+import csv
+import glob
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+# UI-free system/mixture calculations used by the System page and batch jobs.
+# Systems are tables with one row per component and flat 'Name [units]' columns;
+# mixtures add a 'Mixture' row and use (Property, Units) MultiIndex columns.
+
+# units of the system file columns; files are checked against these on import
+SYSTEM_UNITS = {"Compound": "",
+                "Phase": "",
+                "Volume": "L",
+                "Mass": "kg",
+                "Density": "kg/m3",
+                "Dynamic Viscosity": "mPa.s",
+                "Kinematic Viscosity": "m2/s",
+                "Surface Tension": "N/m",
+                "Particle Size": "um",
+                "Mass Frac.": "-",
+                "Volume Frac.": "-"}
+
+# cols to exclude from averaging
+COLS_NOT_AVG = ["Compound", "Phase", "Mass Frac. [-]",
+                "Volume Frac. [-]", "Volume [L]", "Mass [kg]"]
+
+# create multi-index for name>unit hierarchy
+def create_new_cols(df):
+    columns = df.columns
+    names = []
+    units = []
+
+    for col in columns:
+        # Split on the last occurrence of '[' to handle names with spaces
+        if '[' in col:
+            name, unit = col.rsplit('[', 1)
+        else:
+            name, unit = col, ''
+        name = name.strip()  # Remove trailing/leading spaces
+        unit = unit.rstrip(']').strip()  # Remove ']' and any spaces
+        names.append(name)
+        units.append(unit)
+
+    # Step 2: Create a MultiIndex from the names and units
+    df.columns = pd.MultiIndex.from_arrays([names, units], names=['Property', 'Units'])
+
+    return df
+
+def read_system(file):
+    '''
+    Read a system file with a two-row (name, units) header as a system table.
+    Any 'Mixture' row is dropped.
+
+    file: path or file-like object
+    '''
+    df = pd.read_csv(file, header=[0, 1], encoding="utf-8-sig")
+    # combine two column headers into one string 'A [B]'
+    df.columns = [f"{col[0]} [{col[1]}]" if ("Unnamed" not in col[1]) else col[0] for col in df.columns]
+    # drop rows where Compound is mixture
+    return df[df['Compound'] != 'Mixture']
+
+def _system_columns(header):
+    # flat 'Name [units]' column names from the (names, units) header rows, checking units
+    names, units = header
+    columns = []
+    for name, unit in zip(names, units):
+        name, unit = name.strip(), unit.strip()
+        expected = SYSTEM_UNITS.get(name)
+        if expected is not None and unit != expected:
+            raise ValueError(f"{name} must be in [{expected or 'no units'}], got [{unit}]")
+        columns.append(f"{name} [{unit}]" if unit else name)
+    return columns
+
+def read_systems(path, pattern="*_system.csv"):
+    '''
+    Read a directory of system files into one stacked table.
+
+    Rows are indexed by (System, Component) where System is the file name
+    without extension; 'Mixture' rows are dropped. Files are grouped by header;
+    each header is parsed once and its units checked against SYSTEM_UNITS, and
+    the rows of each group are parsed in a single read with numeric columns as float.
+
+    path: directory (or list of files)
+    pattern: file name pattern within the directory
+    '''
+    files = sorted(glob.glob(os.path.join(path, pattern))) if isinstance(path, str) else list(path)
+    if not files:
+        raise FileNotFoundError(f"no system files matching {pattern} in {path}")
+
+    # header -> (system names, row counts, data lines)
+    groups = {}
+    for file in files:
+        with open(file, newline="", encoding="utf-8-sig") as fh:
+            lines = fh.read().splitlines()
+        header = tuple(tuple(row) for row in csv.reader(lines[:2]))
+        body = [line for line in lines[2:] if line.strip()]
+        names, counts, rows = groups.setdefault(header, ([], [], []))
+        names.append(os.path.splitext(os.path.basename(file))[0])
+        counts.append(len(body))
+        rows.extend(body)
+
+    frames = []
+    for header, (names, counts, rows) in groups.items():
+        try:
+            columns = _system_columns(header)
+        except ValueError as e:
+            raise ValueError(f"{names[0]}: {e}") from None
+        dtype = {col: str if col in ("Compound", "Phase") else float for col in columns}
+        df = pd.read_csv(io.StringIO("\n".join(rows)), header=None, names=columns, dtype=dtype)
+        df.insert(0, "System", np.repeat(names, counts))
+        frames.append(df)
+
+    systems = pd.concat(frames, ignore_index=True)
+    systems = systems[systems["Compound"] != "Mixture"]
+    systems["Component"] = systems.groupby("System", sort=False).cumcount()
+    return systems.set_index(["System", "Component"])
+
+def complete_system(sys_mod):
+    '''
+    Fill missing mass, volume and density from the other two and add
+    mass and volume fractions. Particle size is zeroed if there are no solids.
+    '''
+    sys_mod = sys_mod.copy()
+
+    # complete missing cells
+    sys_mod['Mass [kg]'] = np.where(sys_mod['Mass [kg]'].isna(),
+                                     (sys_mod['Volume [L]']/1e3)*sys_mod['Density [kg/m3]'],
+                                     sys_mod['Mass [kg]'])
+
+    sys_mod['Volume [L]'] = np.where(sys_mod['Volume [L]'].isna(),
+                                      (sys_mod['Mass [kg]'] / sys_mod['Density [kg/m3]']) * 1e3,
+                                      sys_mod['Volume [L]'])
+
+    sys_mod['Density [kg/m3]'] = np.where(sys_mod['Density [kg/m3]'].isna(),
+                                           (sys_mod['Mass [kg]'] / (sys_mod['Volume [L]']/1e3)),
+                                           sys_mod['Density [kg/m3]'])
+
+    if "Solid" not in sys_mod['Phase'].values:
+        # make particle size 0 for all rows
+        sys_mod['Particle Size [um]'] = 0.
+
+    total_mass = sys_mod['Mass [kg]'].sum()
+    total_volume = sys_mod['Volume [L]'].sum()
+
+    # calculate mass and volume fractions
+    sys_mod["Mass Frac. [-]"] = sys_mod['Mass [kg]'] / total_mass
+    sys_mod["Volume Frac. [-]"] = sys_mod['Volume [L]'] / total_volume
+
+    return sys_mod
+
+# log-mixing (Arrhenius) rule for these properties instead of the linear mass-weighted mean
+LOG_MIXING = ["Dynamic Viscosity", "Kinematic Viscosity"]
+
+def mixing_rule(X, w, log_mix):
+    '''
+    Mass-weighted mixture properties of stacked components, ignoring missing values.
+    Linear mean, or mean of logs for log-mixed properties.
+
+    X: component properties [..., components, properties] (NaN where missing)
+    w: mass fractions [..., components]
+    log_mix: bool per property, True for log-mixing
+    '''
+    X = np.asarray(X, dtype=float)
+    log_mix = np.asarray(log_mix, dtype=bool)
+    valid = ~np.isnan(X)
+    W = np.where(valid, np.asarray(w, dtype=float)[..., None], 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        Xm = np.where(valid, np.where(log_mix, np.log(X), X), 0.0)
+        mean = np.sum(Xm * W, axis=-2) / np.sum(W, axis=-2)
+    return np.where(log_mix, np.exp(np.where(log_mix, mean, 0.0)), mean)
+
+def kinematic_viscosity(mu, rho, fallback=np.nan):
+    '''
+    Kinematic viscosity [m2/s] of a mixture from its dynamic viscosity and density,
+    the fallback (e.g. the log-mixed component values) where either is missing.
+
+    mu: dynamic viscosity [mPa.s]
+    rho: density [kg/m3]
+    fallback: kinematic viscosity used where mu or rho is missing [m2/s]
+    '''
+    with np.errstate(divide="ignore", invalid="ignore"):
+        nu = np.asarray(mu, dtype=float) / 1000 / np.asarray(rho, dtype=float)
+    return np.where(np.isfinite(nu), nu, fallback)
+
+def mix_system(sys_mod):
+    '''
+    Mixture properties of a completed system table (see complete_system).
+    Returns the components plus a 'Mixture' row with MultiIndex columns,
+    and a list of columns that could not be averaged.
+
+    Properties are mass-weighted over the components that define them, dynamic
+    viscosity is log-mixed, density is volume-additive (total mass / total volume)
+    and kinematic viscosity follows from the mixture's dynamic viscosity and density
+    (log-mixed only where those are missing).
+    '''
+    errors = []
+
+    # stack the numeric property columns into a components x properties array
+    avg_cols, values = [], []
+    for col in sys_mod.columns:
+        if col in COLS_NOT_AVG:
+            continue
+        try:
+            values.append(sys_mod[col].to_numpy(dtype=float, na_value=np.nan))
+            avg_cols.append(col)
+        except (TypeError, ValueError) as e:
+            errors.append(f"Error calculating average for {col}: {e}")
+
+    row = {col: 0 for col in sys_mod.columns if col not in COLS_NOT_AVG}
+    if avg_cols:
+        log_mix = [col.rsplit('[', 1)[0].strip() in LOG_MIXING for col in avg_cols]
+        avg = mixing_rule(np.stack(values, axis=1), sys_mod["Mass Frac. [-]"].to_numpy(dtype=float), log_mix)
+        row.update(zip(avg_cols, avg))
+
+    row.update({'Compound': 'Mixture',
+                'Phase': 'Liquid',
+                'Volume [L]': sys_mod['Volume [L]'].sum(),
+                'Mass [kg]': sys_mod['Mass [kg]'].sum(),
+                'Mass Frac. [-]': sys_mod['Mass Frac. [-]'].sum(),
+                'Volume Frac. [-]': sys_mod['Volume Frac. [-]'].sum()})
+    row['Density [kg/m3]'] = row['Mass [kg]'] / (row['Volume [L]']/1e3)
+    if 'Kinematic Viscosity [m2/s]' in row:
+        row['Kinematic Viscosity [m2/s]'] = kinematic_viscosity(row.get('Dynamic Viscosity [mPa.s]', np.nan),
+                                                                row['Density [kg/m3]'],
+                                                                row['Kinematic Viscosity [m2/s]'])
+
+    mixture = pd.concat([sys_mod, pd.DataFrame([row], columns=sys_mod.columns)], axis=0)
+
+    # create new column names for mixture by extracting the units from [units] and making a tuple (columns, units)
+    mixture = create_new_cols(mixture)
+
+    return mixture, errors
+
+def mix_systems(systems):
+    '''
+    Mixture properties of every system in a stacked table (see read_systems),
+    with the same rules as complete_system and mix_system, in one array pass.
+    Returns one row per system with (Property, Units) columns.
+    '''
+    systems = systems.copy()
+    by_system = systems.groupby(level="System", sort=False)
+
+    # complete missing cells
+    V, M, rho = systems['Volume [L]'], systems['Mass [kg]'], systems['Density [kg/m3]']
+    M = M.where(M.notna(), V/1e3 * rho)
+    V = V.where(V.notna(), M / rho * 1e3)
+    rho = rho.where(rho.notna(), M / (V/1e3))
+    systems['Volume [L]'], systems['Mass [kg]'], systems['Density [kg/m3]'] = V, M, rho
+
+    # particle size 0 for systems without solids
+    if 'Particle Size [um]' in systems:
+        has_solid = (systems['Phase'] == "Solid").groupby(level="System", sort=False).transform("any")
+        systems['Particle Size [um]'] = systems['Particle Size [um]'].where(has_solid, 0.)
+
+    w = M / by_system['Mass [kg]'].transform("sum")
+
+    # pad to a systems x components x properties array
+    names = list(by_system.groups)
+    avg_cols = [col for col in systems.columns if col not in COLS_NOT_AVG]
+    code = pd.Categorical(systems.index.get_level_values("System"), categories=names).codes
+    comp = systems.index.get_level_values("Component").to_numpy()
+    X = np.full((len(names), comp.max() + 1, len(avg_cols)), np.nan)
+    W = np.zeros((len(names), comp.max() + 1))
+    X[code, comp] = systems[avg_cols].to_numpy(dtype=float, na_value=np.nan)
+    W[code, comp] = w.to_numpy(dtype=float)
+
+    log_mix = [col.rsplit('[', 1)[0].strip() in LOG_MIXING for col in avg_cols]
+    mixture = pd.DataFrame(mixing_rule(X, W, log_mix), columns=avg_cols, index=pd.Index(names, name="System"))
+
+    mixture.insert(0, 'Compound', 'Mixture')
+    mixture.insert(1, 'Phase', 'Liquid')
+    mixture['Volume [L]'] = V.groupby(level="System", sort=False).sum()
+    mixture['Mass [kg]'] = M.groupby(level="System", sort=False).sum()
+    mixture['Density [kg/m3]'] = mixture['Mass [kg]'] / (mixture['Volume [L]']/1e3)
+    if 'Kinematic Viscosity [m2/s]' in mixture:
+        mixture['Kinematic Viscosity [m2/s]'] = kinematic_viscosity(
+            mixture.get('Dynamic Viscosity [mPa.s]', np.nan), mixture['Density [kg/m3]'],
+            mixture['Kinematic Viscosity [m2/s]'])
+    mixture['Mass Frac. [-]'] = 1.0
+    mixture['Volume Frac. [-]'] = 1.0
+
+    return create_new_cols(mixture[[col for col in systems.columns if col in mixture]])
+
+def load_mixture(file):
+    '''
+    Read a system file and return its mixture table.
+    '''
+    mixture, _ = mix_system(complete_system(read_system(file)))
+    return mixture
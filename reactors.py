@@ -2,9 +2,11 @@ import os
 import streamlit as st
 import numpy as np
 import math
-import matplotlib.pyplot as plt
 import plotly.express as px
-import functions as f
+import core
+import assets
+import schematic
+import timing
 import pandas as pd
 
 st.header("Reactor Selection")
@@ -29,33 +31,35 @@ except:
 if "Solid" in all_props["Phase"].values:
     s = all_props[all_props["Phase"] == "Solid"].iloc[0].to_dict()
 
-# get reactors dataframe
-df_reactors = st.session_state['reactors_df'].copy()
-# get kla data
-df_kla = st.session_state['data_kla_df'].copy()
+# get indexed reactor catalog
+reactor_catalog = st.session_state['reactor_catalog']
+# get kla and mixing time data (see ingest.py for adding probe logs)
+df_kla = st.session_state['data_kla_df']
+df_tmix = st.session_state['data_tmix_df']
 # get list of reactor owners/CMOs
-owners = df_reactors["owner"].unique().tolist()
+owners = reactor_catalog.owners()
 
 # get current selection of owner>reactor if available
 if len(r) > 0:
     owner_idx = owners.index(r[("Owner", "-")])
     owner = r[("Owner", "-")]
-    reactors = df_reactors[df_reactors["owner"]==owner]["reactor"].unique().tolist()
+    reactors = reactor_catalog.reactors(owner)
     reactor_idx = reactors.index(r[("Reactor", "-")])
 else:
     default_owner = "Takeda"
     owner_idx = owners.index(default_owner) if default_owner in owners else 0
     default_reactor = "EasyMax 102 Pressure"
-    reactors = df_reactors[df_reactors["owner"]==default_owner]["reactor"].unique().tolist()
+    reactors = reactor_catalog.reactors(default_owner)
     reactor_idx = reactors.index(default_reactor) if default_reactor in reactors else 0
 
-owner = col1.selectbox("Select owner/location:", df_reactors["owner"].unique(),
+owner = col1.selectbox("Select owner/location:", owners,
                        index=owner_idx)
 
-reactor = col2.selectbox("Select reactor:", df_reactors[df_reactors["owner"]==owner]["reactor"].unique(),
+reactor = col2.selectbox("Select reactor:", reactor_catalog.reactors(owner),
                         index=reactor_idx)
 
 df_kla_selection = df_kla[(df_kla["owner"]==owner) & (df_kla["reactor"]==reactor)].copy()
+df_tmix_selection = df_tmix[(df_tmix["owner"]==owner) & (df_tmix["reactor"]==reactor)]
 
 selected_vessel_name = f"{owner}-{reactor}"
 
@@ -69,53 +73,24 @@ try:
 except:
     st.error("Agitation speed value error!")
 
-# get properties of chosen vessel
-df_selection = df_reactors[(df_reactors["owner"]==owner) & (df_reactors["reactor"]==reactor)].copy()
-
-# store selected reactor props as dict
-r = dict(zip(zip(df_selection["property"], df_selection["units"]), df_selection["value"]))
-
-# add selected properties back to dict
-r[("Owner", "-")] = owner
-r[("Reactor", "-")] = reactor
-r[('Impeller Speed', 'rpm')] = rpm
-r[("Name", "-")] = f"{owner}-{reactor}"
-
-min_lst = [('Internal Diameter', 'm'),
-('Height (tan-tan)', 'm'),
-('Bottom Dish Type', '-'),
-('Impeller Count', '#'),
-('Top Dish Type', '-'),
-('Agitation Min', 'rpm'),
-('Agitation Max', 'rpm'),
-('Impeller 1 Diameter', 'm'),
-('Impeller 1 Clearance', 'm'),
-('Impeller 1 Height', 'm'),
-('Zwietering S parameter', '-'),
-('GMB z parameter', '-'),
-('Volume Min', 'L'),
-('Volume Max', 'L'),
-('Impeller 1 Np', '-')]
-
-# check if any of the minimum required properties have a null value in the dict
-try:
-    for key in min_lst:
-        if (r[key] == '') or (r[key] is None) or (pd.isna(r[key])):
-            st.error(f"Error: Missing value for {key[0]} ({key[1]}). Please check reactor properties.")
-            st.stop()
-except KeyError as e:
-    st.error(f"Error: Missing property {e} in reactor data. Please check data file.")
-    st.stop()
+timing.lap("inputs")
+
+# get properties of chosen vessel as dict
+calc = st.session_state['calc_graph']
+calc.set("mixture", all_props)
+calc.set("vessel", (owner, reactor))
+calc.set("rpm", rpm)
+record = calc.get("record")
 
-# ensure type float where possible
-for key, value in r.items():
-    try:
-        r[key] = float(value)
-    except:
-        pass
+# check if any of the minimum required properties are missing or have a null value
+missing = core.missing_properties(record)
+if missing:
+    for key in missing:
+        st.error(f"Error: Missing value for {key[0]} ({key[1]}). Please check reactor properties.")
+    st.stop()
 
-# calculate dish volume [m3]
-r[('Dish Volume', 'm3')] = f.dish_volume(r)
+# calculate derived geometry (dish volume, liquid height, submerged impellers)
+r = calc.get("reactor")
 
 # easy variable names
 D = r[('Internal Diameter', 'm')]
@@ -123,15 +98,6 @@ H = r[('Height (tan-tan)', 'm')]
 bottom_dish = r[('Bottom Dish Type', '-')]
 top_dish = r[('Top Dish Type', '-')]
 
-# get fill volume from defined mixture
-r[('Liquid Volume', 'L')] = mix[('Volume', 'L')]
-
-# cylinder cross sectional area [m2]
-r[('Area', 'm2')] = np.pi * (r[('Internal Diameter', 'm')] / 2)**2
-
-# liquid height [m]
-r[('Liquid Height', 'm')] = (r[('Liquid Volume', 'L')]/1e3 - r[('Dish Volume', 'm3')]) / r[('Area', 'm2')]
-
 # round off volume and display
 n_dec = np.log10(r[('Liquid Volume', 'L')])
 if n_dec < 0:
@@ -146,12 +112,6 @@ col2.metric("Liquid Volume [L]", f"{r[('Liquid Volume', 'L')]:.{n_dec}f}")
 if r[('Liquid Volume', 'L')] > r[("Volume Max", "L")]:
     st.warning("Warning: Liquid volume exceeds maximum vessel capacity!")
 
-r[("Impellers submerged", "")] = 0
-for i in range(1, int(r[("Impeller Count", "#")])+1):
-    # check if level above clearance plus half blade height
-    if (r[(f"Impeller {i} Clearance", "m")] + r[(f"Impeller {i} Height", "m")]/2) < r[('Liquid Height', 'm')]:
-        r[("Impellers submerged", "")] = i
-
 # convert to dataframe for display
 r_df = pd.DataFrame(r.values(), index=pd.MultiIndex.from_tuples(r.keys()), columns=["Value"])
 # sort by category (property type)
@@ -162,35 +122,41 @@ st.dataframe(r_df)
 
 # set reactor properties as global variable
 st.session_state.reactor = r.copy()
+timing.lap("reactor table")
 
 # ************* Display CAD Renderings *************
-# get file path for isometric rendering based on selection
+# renderings and CFD images from the asset index, shown as cached thumbnails
+asset_index = assets.index()
 for pic in ["iso", "side"]:
-    file_path_iso = f"{'assets/reactors/'}{owner}_{reactor}_{pic}.png"
+    file_path_iso = asset_index.view(owner, reactor, pic)
     # display rendering if file exists
-    try:
-        st.image(file_path_iso,
+    if file_path_iso is not None:
+        st.image(assets.thumbnail(file_path_iso, 250),
                  caption=f"{selected_vessel_name} {pic} view",
                  width=250)
-    except:
+    else:
         st.warning(f"No {pic} rendering found for {selected_vessel_name}.")
 
 
+timing.lap("CAD images")
+
 # ************* Plot Hydrodynamics from CFD/Measurements *************
 st.subheader("Vessel Hydrodynamics")
 
 # get CFD images if available
 try:
     # get all images in CFD folder for this vessel
-    cfd_files = [f for f in os.listdir("assets/CFD/") if f.startswith(f"{owner}_{reactor}")]
+    cfd_files = asset_index.cfd_images(owner, reactor)
     for cfd_file in cfd_files:
-        st.image(f"assets/CFD/{cfd_file}", caption=f"{cfd_file}",
+        st.image(assets.thumbnail(cfd_file, 300), caption=f"{os.path.basename(cfd_file)}",
                  width=300)
     if len(cfd_files) == 0:
         st.warning(f"No CFD images found for {selected_vessel_name}.")
 except:
     st.warning(f"Failed to import CFD images for {selected_vessel_name}.")
 
+timing.lap("CFD images")
+
 # plot kLa for each fill volume
 if not df_kla_selection.empty:
     fig_kla = px.scatter(df_kla_selection, x="stir_speed_rpm", y="kLa_per_sec", color="volume_fill_L",
@@ -205,107 +171,50 @@ if not df_kla_selection.empty:
 
     fig_kla.update_layout(legend_title_text='Fill Volume (L)')
 
+    timing.lap("figure build")
     st.plotly_chart(fig_kla, use_container_width=True)
+    timing.lap("render")
+
+    # fitted kLa_gas_drawdown constants with confidence intervals (see kla.py)
+    kla_fits = st.session_state['kla_fits']
+    if (owner, reactor) in kla_fits:
+        fit = kla_fits.table.loc[(owner, reactor)]
+        st.caption(f"Fitted kLa = A (P/M)^b from {int(fit['Points'])} points: "
+                   f"A = {fit['A']:.3g} ({fit['A low']:.3g} to {fit['A high']:.3g}), "
+                   f"b = {fit['b']:.3g} ({fit['b low']:.3g} to {fit['b high']:.3g}), R² = {fit['R2']:.2f}")
+        sub = kla_fits.submergence_params(owner, reactor)
+        if sub is not None:
+            st.caption(f"With submergence, kLa = C (P/M)^b (H_sub/D)^e: C = {sub[0]:.3g}, b = {sub[1]:.3g}, "
+                       f"e = {sub[2]:.3g} ({fit['e low']:.3g} to {fit['e high']:.3g}), R² = {fit['R2 (sub)']:.2f}")
+    else:
+        st.caption("Too few kLa measurements to fit; using literature constants.")
 else:
     st.warning(f"No kLa data found for {selected_vessel_name}.")
 
-#  ************* DRAW VESSEL SCHEMATIC *************
+# plot mixing time for each fill volume
+if not df_tmix_selection.empty:
+    fig_tmix = px.scatter(df_tmix_selection, x="stir_speed_rpm", y="tmix_s", color="volume_fill_L",
+                          title=f"Measured mixing time data for {selected_vessel_name}",
+                          labels={"stir_speed_rpm": "Agitation Speed (rpm)",
+                                  "tmix_s": "Mixing Time (s)",
+                                  "volume_fill_L": "Fill Volume (L)"},
+                          color_continuous_scale="Turbo")
+    fig_tmix.update_traces(marker=dict(size=10))
+    st.plotly_chart(fig_tmix, use_container_width=True)
+    timing.lap("mixing time plot")
 
-def draw_vessel(ax, diameter, height, bottom_dish, top_dish, dish_ratio):
-    radius = diameter / 2
-    
-    # Draw cylindrical body
-    rect_x = -radius
-    rect_y = 0
-    rect_width = diameter
-    rect_height = height
-    ax.add_patch(plt.Rectangle((rect_x, rect_y), rect_width, rect_height, fill=False, edgecolor='black', linewidth=2))
-
-    # Draw bottom dish
-    if bottom_dish == "Hemispherical":
-        # Simple semicircle
-        theta = np.linspace(np.pi, 2 * np.pi, 100)
-        x_bottom = radius * np.cos(theta)
-        y_bottom = radius * np.sin(theta)
-        ax.plot(x_bottom, y_bottom, color='black', linewidth=2)
-    elif bottom_dish == "ASME 2:1 Elliptical":
-        # Elliptical dish approximation (simplified)
-        dish_height = radius * dish_ratio
-        theta = np.linspace(np.pi, 2 * np.pi, 100)
-        x_bottom = radius * np.cos(theta)
-        y_bottom = dish_height * np.sin(theta)
-        ax.plot(x_bottom, y_bottom, color='black', linewidth=2)
-    elif bottom_dish == "Torispherical":
-        # Torispherical dish is more complex, here's a highly simplified representation
-        # You'd typically need to calculate knuckle and crown radii.
-        # For a basic schematic, you might approximate with a flatter ellipse or a series of arcs.
-        dish_height = radius * dish_ratio * 0.75 # Slightly flatter for visual distinction
-        theta = np.linspace(np.pi, 2 * np.pi, 100)
-        x_bottom = radius * np.cos(theta)
-        y_bottom = dish_height * np.sin(theta)
-        ax.plot(x_bottom, y_bottom, color='black', linewidth=2)
-    else:
-        st.toast("Unknown bottom dish type. Skipping drawing.")
-
-    # Draw top dish (same logic, shifted up)
-    if top_dish == "Hemispherical":
-        theta = np.linspace(0, np.pi, 100)
-        x_top = radius * np.cos(theta)
-        y_top = height + radius * np.sin(theta)
-        ax.plot(x_top, y_top, color='black', linewidth=2)
-    elif top_dish == "ASME 2:1 Elliptical":
-        dish_height = radius * dish_ratio
-        theta = np.linspace(0, np.pi, 100)
-        x_top = radius * np.cos(theta)
-        y_top = height + dish_height * np.sin(theta)
-        ax.plot(x_top, y_top, color='black', linewidth=2)
-    elif top_dish == "Torispherical":
-        dish_height = radius * dish_ratio * 0.75
-        theta = np.linspace(0, np.pi, 100)
-        x_top = radius * np.cos(theta)
-        y_top = height + dish_height * np.sin(theta)
-        ax.plot(x_top, y_top, color='black', linewidth=2)
-    else:
-        st.toast("Unknown top dish type. Skipping drawing.")
-
-    # Add dimensions as text
-    font_size = 8
-    ax.text(0, height/2, f'H: {height:.2f}m',
-            verticalalignment='center',
-            horizontalalignment='center',
-            fontsize=font_size)
-    ax.text(0, height/2*0.8, f'D: {diameter:.2f}m',
-            horizontalalignment='center',
-            fontsize=font_size)
-
-    ax.set_aspect('equal', adjustable='box')
-    ax.set_xlabel("X (m)", fontsize=font_size)
-    ax.set_ylabel("Y (m)", fontsize=font_size)
-    ax.set_title(f"{selected_vessel_name} Schematic", fontsize=font_size)
-    ax.tick_params(axis='x', labelsize=font_size)
-    ax.tick_params(axis='y', labelsize=font_size)
-    ax.grid(False)
-    
-    # Adjust limits to fit the vessel
-    max_dim = max(diameter, height)
-    ax.set_xlim(-diameter * 0.75, diameter * 0.75) # Adjust based on your preferred padding
-    ax.set_ylim(-radius * 1.5, height + radius * 1.5) # Adjust based on your preferred padding
-
-
-if st.button("Draw Vessel"):
-    # Define a consistent figure size in inches
-    # Adjust these values (e.g., 5, 8) based on your desired output size
-    # and the aspect ratio that best fits your largest vessel.
-    desired_fig_width_inches = 2
-    desired_fig_height_inches = 4
-    fig, ax = plt.subplots(figsize=(desired_fig_width_inches, desired_fig_height_inches))
-
-    # Apply a tight layout engine to handle margins consistently
-    # 'constrained' is often better than 'tight' for complex layouts with labels
-    fig.set_layout_engine('constrained') # or 'tight'
-
-    draw_vessel(ax, D, H, bottom_dish, top_dish, 0.5)
+#  ************* DRAW VESSEL SCHEMATIC *************
 
-    # Ensure use_container_width is False to respect figsize
-    st.pyplot(fig, use_container_width=False)
-    plt.close(fig)
+if st.toggle("Draw Vessel"):
+    show_fill = st.checkbox("Show liquid level and impellers", value=True)
+    geom = calc.get("geometry")
+    V_fill = r[('Liquid Volume', 'L')] if show_fill else None
+    # drawings are cached per geometry and fill level, so reruns only show the stored image
+    title = f"{selected_vessel_name} Schematic"
+    png = schematic.render(geom, bottom_dish, top_dish, title, V=V_fill)
+    timing.lap("figure build")
+
+    st.image(png, width=200)
+    st.download_button("Download SVG", schematic.render(geom, bottom_dish, top_dish, title, V=V_fill, fmt="svg"),
+                       file_name=f"{selected_vessel_name} schematic.svg", mime="image/svg+xml")
+    timing.lap("render")
@@ -1,12 +1,11 @@
-import pandas as pd
 import streamlit as st
 
 st.header("Mixing Report")
 
 def download_report():
     if 'report' in st.session_state:
-        df_all = pd.concat(st.session_state.report, axis=1)
-        df_all.to_csv("mixing_report.csv")
+        # only the cases added since the last download are written
+        st.session_state.report.flush("mixing_report.csv")
         st.success("Report downloaded successfully!")
     else:
         st.warning("No mixing cases found.")
@@ -14,7 +13,10 @@ def download_report():
 st.button("Download Report", on_click=download_report)
 
 if 'report' in st.session_state:
-    df_all = pd.concat(st.session_state.report, axis=1)
-    st.dataframe(df_all)
+    report = st.session_state.report
+    st.download_button("Export Parquet", data=report.to_parquet(),
+                       file_name="mixing_report.parquet",
+                       mime="application/vnd.apache.parquet")
+    st.dataframe(report.to_frame(), hide_index=True)
 else:
     st.warning("No mixing cases found.")
@@ -69,12 +69,17 @@ st.session_state.rxn_rate['dH_rxn'] = float(col1.number_input("Heat of reaction
                                                               step=10.0,
                                                               on_change=update_dH_rxn))
 
+# reaction rate and heat from the calculation graph; only re-evaluated when their inputs change
+calc = st.session_state['calc_graph']
+calc.set("mixture", all_props)
+for key in ("k", "C_eff", "dH_rxn"):
+    calc.set(key, st.session_state.rxn_rate[key])
+
 # calc reaction rate r_rxn [mol/kg/s]
-st.session_state.rxn_rate['r_rxn'] = st.session_state.rxn_rate['k'] * st.session_state.rxn_rate['C_eff']
+st.session_state.rxn_rate['r_rxn'] = calc.get("r_rxn")
 
 # calc heat generated Q [kW]
-st.session_state.rxn_rate['Q'] = (st.session_state.rxn_rate['r_rxn'] * st.session_state.rxn_rate['dH_rxn']
-                                     * mix[('Mass', 'kg')]) * (-1)
+st.session_state.rxn_rate['Q'] = calc.get("Q")
 
 col1.metric("Reaction rate [mol/kg/s]",
             f"{st.session_state.rxn_rate['r_rxn']:.2e}",
@@ -86,7 +91,7 @@ col2.write("")
 col2.metric("Heat Generation [kW]", f"{st.session_state.rxn_rate['Q']:.2f}", border=True)
 st.header("Reaction Browser")
 
-rxns = st.session_state['reactions_df'].copy()
+rxns = st.session_state['reactions_df']
 
 reaction = st.selectbox("Select the reaction type:", rxns["Reaction"].unique())
 
@@ -1,16 +1,21 @@
 import streamlit as st
 import pandas as pd
-import functions as f
+import core
 import plotly.express as px
-import numpy as np
 
 
-# get reactors dataframe
-df_reactors = st.session_state['reactors_df'].copy()
+# get indexed reactor catalog
+reactor_catalog = st.session_state['reactor_catalog']
+# kLa constants fitted per vessel (literature values for vessels without measurements)
+kla_fits = st.session_state['kla_fits']
+kla_A, kla_b = kla_fits.arrays(reactor_catalog.table.index)
 
 # get reaction rate data
 rxn_rate = st.session_state['rxn_rate'].copy()
 
+# mixture properties defined; the System page starts with an empty mixture table
+has_mixture = "mixture" in st.session_state and (st.session_state.mixture["Compound"] == "Mixture").any()
+
 # initialize reactors properties dictionary
 if 'rScale' in st.session_state:
     rScale = st.session_state.rScale
@@ -24,23 +29,15 @@ st.subheader("Reactors")
 
 col1, col2 = st.columns(2)
 
-# get reactor names by scale
-lab_reactors = df_reactors[(df_reactors["property"] == "Scale") & (df_reactors["value"] == "lab")].copy()
-pilot_reactors = df_reactors[(df_reactors["property"] == "Scale") & (df_reactors["value"] == "pilot")].copy()
-comm_reactors = df_reactors[(df_reactors["property"] == "Scale") & (df_reactors["value"] == "commercial")].copy()
-
 # select reactor for each scale
-r_lab = col1.selectbox("Select lab reactor:", lab_reactors["name"].unique())
-r_pilot = col1.selectbox("Select pilot reactor:", pilot_reactors["name"].unique())
-r_commercial = col1.selectbox("Select commercial reactor:", comm_reactors["name"].unique())
+r_lab = col1.selectbox("Select lab reactor:", reactor_catalog.by_scale("lab"))
+r_pilot = col1.selectbox("Select pilot reactor:", reactor_catalog.by_scale("pilot"))
+r_commercial = col1.selectbox("Select commercial reactor:", reactor_catalog.by_scale("commercial"))
 
 # get reactor properties and add to rScale dict as dict
-rScale["lab"] = df_reactors[df_reactors["name"] == r_lab].copy()
-rScale["lab"] = dict(zip(zip(rScale["lab"]["property"], rScale["lab"]["units"]), rScale["lab"]["value"]))
-rScale["pilot"] = df_reactors[df_reactors["name"] == r_pilot].copy()
-rScale["pilot"] = dict(zip(zip(rScale["pilot"]["property"], rScale["pilot"]["units"]), rScale["pilot"]["value"]))
-rScale["commercial"] = df_reactors[df_reactors["name"] == r_commercial].copy()
-rScale["commercial"] = dict(zip(zip(rScale["commercial"]["property"], rScale["commercial"]["units"]), rScale["commercial"]["value"]))
+rScale["lab"] = reactor_catalog.get_by_name(r_lab)
+rScale["pilot"] = reactor_catalog.get_by_name(r_pilot)
+rScale["commercial"] = reactor_catalog.get_by_name(r_commercial)
 
 # convert to dataframes for display
 r_lab_df = pd.DataFrame(rScale["lab"].values(), index=pd.MultiIndex.from_tuples(rScale["lab"].keys()), columns=["Value"])
@@ -54,13 +51,45 @@ r_df = pd.concat([r_lab_df, r_pilot_df, r_comm_df], axis=1, keys=["Lab", "Pilot"
 r_df = r_df.sort_index(level=0)
 st.dataframe(r_df)
 
+# ************* SCALE-UP CALCULATOR *************
+st.subheader("Scale-up Calculator")
+st.write("Equivalent agitation in every vessel for the lab operating point, by scale-up criterion.")
+
+if not has_mixture:
+    st.warning("Please define system properties in the System section before calculating scale-up.")
+elif core.missing_properties(rScale["lab"]):
+    st.warning(f"Missing reactor properties for {r_lab}: {core.missing_properties(rScale['lab'])}")
+else:
+    mix_up, s_up = core.split_mixture(st.session_state.mixture)
+    up1, up2, up3 = st.columns(3)
+    N_lab = up1.number_input("Lab agitation [rpm]", value=float(rScale["lab"][("Agitation Min", "rpm")]),
+                             min_value=0.0, step=10.0)
+    V_lab = up2.number_input("Lab fill volume [L]", value=float(mix_up[("Volume", "L")]),
+                             min_value=0.0, format="%.4g")
+    lab_fill_pct = V_lab / float(rScale["lab"][("Volume Max", "L")]) * 100
+    if lab_fill_pct > 100:
+        st.warning(f"Lab fill volume ({V_lab:.4g} L) exceeds the maximum volume of {r_lab}.")
+    fill_pct = up3.number_input("Target fill [% of Volume Max]", value=min(lab_fill_pct, 100.0),
+                                min_value=0.0, max_value=100.0, format="%.1f")
+    try:
+        A_lab, b_lab = kla_fits.params(*reactor_catalog.names[r_lab])
+        scaled, reference = core.scale_up(rScale["lab"], N_lab, V_lab, reactor_catalog.table,
+                                          mix_up, s_up, fill=fill_pct / 100,
+                                          A=kla_A, b=kla_b, A_lab=A_lab, b_lab=b_lab)
+        st.dataframe(pd.DataFrame([reference], index=[r_lab]))
+        st.dataframe(scaled)
+    except (KeyError, TypeError, ValueError) as ex:
+        st.error(f"Scale-up calculation failed for {r_lab}: {ex}")
+
+st.divider()
+
 # function to run scale analysis on selected reactors
 def scale_analysis():
     # check if reaction rate defined
     if "rxn_rate" not in st.session_state:
         st.warning("Please define reaction rate parameters in the Reaction Kinetics and Heat section before checking scale-dependency.")
     # check if mixture properties defined
-    elif "mixture" not in st.session_state:
+    elif not has_mixture:
         st.warning("Please define system properties in the System section before checking scale-dependency.")
     else:
         # get mixture properties
@@ -70,40 +99,12 @@ def scale_analysis():
         rho = mix[("Density", "kg/m3")]
         # gas-liquid assessment
         lst = ["lab", "commercial"] #, "pilot", "commercial"]
-        scale_results = []
-        for scale in lst:
-            # get volume and agitation ranges for scale
-            Vmin = float(rScale[scale][("Volume Min", "L")])
-            Vmax = float(rScale[scale][("Volume Max", "L")])
-            Nmin = float(rScale[scale][("Agitation Min", "rpm")])
-            Nmax = float(rScale[scale][("Agitation Max", "rpm")])
-            # get discrete volumes by dividing range by 5
-            V_range = [Vmin + i*(Vmax-Vmin)/5 for i in range(6)]
-            N_range = [Nmin + i*(Nmax-Nmin)/5 for i in range(6)]
-            # calculate kla for each volume-agitation speed combination
-            for V in V_range:
-                # get mass [kg]
-                M = V * rho / 1000
-                for N in N_range:
-                    # TODO: account for multiple impellers
-                    Po = float(rScale[scale][("Impeller 1 Np", "-")])
-                    Di = float(rScale[scale][("Impeller 1 Diameter", "m")])
-                    # calculate power input P [W]
-                    P = f.power_input(Po=Po, rho_L=rho, N=N, D=Di)
-                    kla = f.kLa_gas_drawdown(A=0.07, b=0.53, P=P, M=M)
-                    # calculate Damkohler number for mass transfer to reaction (Da = r_rxn / kla)
-                    if kla > 0:
-                        Da1 = rxn_rate['r_rxn'] / kla
-                    else:
-                        Da1 = float('inf')
-
-                    scale_results.append({"Scale": scale,
-                                        "Volume (L)": V,
-                                        "Agitation (rpm)": N,
-                                        "P/M (W/kg)": P/M,
-                                        "kla (1/s)": kla,
-                                        "Da_1": Da1})
-        scale_results = pd.DataFrame(scale_results)
+        names = {"lab": r_lab, "pilot": r_pilot, "commercial": r_commercial}
+        params = {scale: kla_fits.params(*reactor_catalog.names[names[scale]]) for scale in lst}
+        scale_results = core.scale_sweep({scale: rScale[scale] for scale in lst},
+                                         rho, rxn_rate['r_rxn'],
+                                         A={scale: params[scale][0] for scale in lst},
+                                         b={scale: params[scale][1] for scale in lst})
         # sort by kla value
         scale_results = scale_results.sort_values(by="kla (1/s)", ascending=True)
         st.subheader("Gas-Liquid Mass Transfer Analysis")
@@ -129,6 +130,27 @@ def scale_analysis():
         st.divider()
         st.subheader("Solid-Liquid Mass Transfer Analysis")
 
+# function to screen the mixture and reaction against every reactor in the database
+def fleet_screening():
+    if not has_mixture:
+        st.warning("Please define system properties in the System section before screening reactors.")
+        return
+    mix, s = core.split_mixture(st.session_state.mixture)
+    screen = core.screen_fleet(reactor_catalog.table, mix, s, rxn_rate['r_rxn'], A=kla_A, b=kla_b)
+
+    st.subheader("Fleet Screening")
+    n_suitable = (screen["Status"] == "Suitable").sum()
+    st.write(f"{n_suitable} of {len(screen)} reactors can run this step without gas-liquid mass transfer limitation"
+             + (" and with full suspension." if "Nmax/Njs" in screen else "."))
+    st.dataframe(screen)
+
+    # plot best achievable Da_massT for each vessel
+    ranked = screen[screen["Status"] != "Incomplete data"]
+    fig = px.bar(ranked, x="Vessel", y="Da_massT min", color="Scale", log_y=True,
+                 title="Best achievable Damkohler number for mass transfer vs reaction")
+    fig.add_hline(y=1.0, line_dash="dash", line_color="red")
+    st.plotly_chart(fig)
+
 # show reaction rate
 st.write(f"Reaction rate: {rxn_rate['r_rxn']:.3f} mol/kg/s")
 
@@ -139,4 +161,10 @@ st.divider()
 
 # to ensure that outputs appear below the button
 if analyse:
-    scale_analysis()
\ No newline at end of file
+    scale_analysis()
+st.divider()
+
+# screen all reactors at once
+screen = st.button("Screen All Reactors")
+if screen:
+    fleet_screening()
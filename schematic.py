@@ -0,0 +1,143 @@
+import collections
+import hashlib
+import io
+import threading
+
+import numpy as np
+
+# Vessel schematics rendered once per geometry (and fill level) and cached as
+# PNG/SVG bytes. Matplotlib is imported on the first render only, so page
+# reruns that show a cached drawing do not pay its import cost.
+
+# dish depth / radius for elliptical dishes [-]
+DISH_RATIO = 0.5
+# figure size [in] and PNG resolution [dpi]
+FIGSIZE = (2, 4)
+DPI = 150
+# number of cached drawings; the least recently used are dropped first
+MAX_CACHED = 256
+
+_cache = collections.OrderedDict()
+_lock = threading.Lock()
+
+def _dish_height(dish, radius, dish_ratio):
+    # dish depth [m] for the drawing, None for unknown types
+    if dish == "Hemispherical":
+        return radius
+    elif dish == "ASME 2:1 Elliptical":
+        return radius * dish_ratio
+    elif dish == "Torispherical":
+        # highly simplified; slightly flatter than elliptical for visual distinction
+        return radius * dish_ratio * 0.75
+    return None
+
+def draw_vessel(ax, diameter, height, bottom_dish, top_dish, title, dish_ratio=DISH_RATIO,
+                liquid_height=None, impellers=()):
+    '''
+    Draw a vessel schematic on a Matplotlib axes.
+
+    diameter: internal diameter [m]
+    height: height tan-tan [m]
+    bottom_dish, top_dish: dish types [-]; unknown types are not drawn
+    title: axes title
+    dish_ratio: dish depth / radius for elliptical dishes [-]
+    liquid_height: liquid level above the bottom tangent line [m], not drawn if None
+    impellers: (diameter [m], clearance [m], blade height [m], powered) of each impeller;
+               impellers above the liquid are drawn as outlines
+    '''
+    from matplotlib.patches import Rectangle
+
+    radius = diameter / 2
+
+    # Draw cylindrical body
+    ax.add_patch(Rectangle((-radius, 0), diameter, height, fill=False, edgecolor='black', linewidth=2))
+
+    # Draw bottom and top dishes (top is the same logic, shifted up)
+    theta = np.linspace(np.pi, 2 * np.pi, 100)
+    dish_height = _dish_height(bottom_dish, radius, dish_ratio)
+    if dish_height is not None:
+        ax.plot(radius * np.cos(theta), dish_height * np.sin(theta), color='black', linewidth=2)
+    dish_height = _dish_height(top_dish, radius, dish_ratio)
+    if dish_height is not None:
+        ax.plot(radius * np.cos(theta), height - dish_height * np.sin(theta), color='black', linewidth=2)
+
+    # liquid level and impellers at the fill level
+    if liquid_height is not None and np.isfinite(liquid_height):
+        ax.plot([-radius, radius], [liquid_height, liquid_height], color='tab:blue', linewidth=1.5)
+    shaft_bottom = None
+    for D, C, h, powered in impellers:
+        if not (np.isfinite(D) and np.isfinite(C)):
+            continue
+        h = h if np.isfinite(h) else D / 5
+        ax.add_patch(Rectangle((-D / 2, C), D, h, fill=bool(powered), facecolor='grey', edgecolor='grey'))
+        shaft_bottom = C if shaft_bottom is None else min(shaft_bottom, C)
+    if shaft_bottom is not None:
+        ax.plot([0, 0], [shaft_bottom, height + radius], color='grey', linewidth=1)
+
+    # Add dimensions as text
+    font_size = 8
+    ax.text(0, height/2, f'H: {height:.2f}m',
+            verticalalignment='center',
+            horizontalalignment='center',
+            fontsize=font_size)
+    ax.text(0, height/2*0.8, f'D: {diameter:.2f}m',
+            horizontalalignment='center',
+            fontsize=font_size)
+
+    ax.set_aspect('equal', adjustable='box')
+    ax.set_xlabel("X (m)", fontsize=font_size)
+    ax.set_ylabel("Y (m)", fontsize=font_size)
+    ax.set_title(title, fontsize=font_size)
+    ax.tick_params(axis='x', labelsize=font_size)
+    ax.tick_params(axis='y', labelsize=font_size)
+    ax.grid(False)
+
+    # Adjust limits to fit the vessel
+    ax.set_xlim(-diameter * 0.75, diameter * 0.75)
+    ax.set_ylim(-radius * 1.5, height + radius * 1.5)
+
+def _key(*values):
+    # hash of the drawing inputs (numbers, strings and arrays)
+    h = hashlib.sha1()
+    for value in values:
+        h.update(np.asarray(value).tobytes() if isinstance(value, np.ndarray) else repr(value).encode())
+        h.update(b"|")
+    return h.hexdigest()
+
+def render(geom, bottom_dish, top_dish, title, V=None, fmt="png"):
+    '''
+    Vessel schematic as PNG or SVG bytes, cached by geometry hash.
+
+    geom: geometry.VesselGeometry
+    bottom_dish, top_dish: dish types [-]
+    title: drawing title
+    V: fill volume [L] to draw the liquid level and impellers; vessel only if None
+    fmt: "png" or "svg"
+    '''
+    liquid_height, impellers = None, ()
+    if V is not None:
+        liquid_height = float(geom.liquid_height(V))
+        impellers = tuple(zip(geom.impeller_diameters, geom.impeller_clearances,
+                              geom.impeller_heights, geom.powered(V)))
+
+    key = _key(fmt, title, geom.T, geom.height, bottom_dish, top_dish, liquid_height, impellers)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    # Figure (not pyplot) so renders in different sessions do not share state
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=FIGSIZE, layout="constrained")
+    ax = fig.subplots()
+    draw_vessel(ax, geom.T, geom.height, bottom_dish, top_dish, title,
+                liquid_height=liquid_height, impellers=impellers)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=DPI)
+    image = buffer.getvalue()
+
+    with _lock:
+        _cache[key] = image
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
+    return image
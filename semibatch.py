@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+
+import engine as e
+import functions as f
+import geometry
+
+# Semi-batch simulation of the Bourne competitive-consecutive reactions
+#   A + B -> R (k1),  R + B -> S (k2)
+# with B fed into a vessel charged with A. The feed zone follows the
+# engulfment (E) model: fed fluid engulfs bulk fluid at the rate E and grows
+# as exp(E t) until macro circulation returns it to the bulk. The zone is
+# resolved into age cells, each diluted by the same factor, and coupled to the
+# well-mixed bulk. Many conditions (speed, volume, feed rate, feed location)
+# are integrated together as one stiff system, e.g. the Bourne protocol steps.
+
+# Bourne reaction (1-naphthol + diazotized sulfanilic acid), 298 K [m3/mol/s]
+K1 = 7300.0
+K2 = 3.5
+# initial concentration of A in the vessel [mol/m3]
+C_A0 = 1.0
+# fed volume as a fraction of the initial volume [-]
+FEED_RATIO = 0.02
+# moles of B fed per mole of A [-]
+STOICHIOMETRY = 1.0
+
+# feed location -> (local / mean energy dissipation [-], local velocity / tip speed [-])
+FEED_LOCATIONS = {"Surface": (0.3, 0.1),
+                  "Sub-surface": (1.0, 0.2),
+                  "Impeller Zone": (5.0, 0.5)}
+
+# impeller flow number for the circulation time [-]
+FLOW_NUMBER = 0.7
+# mesomixing (inertial-convective disintegration) constant [-]
+A_MESO = 2.0
+# largest feed zone as a fraction of the initial volume [-]
+ZONE_MAX = 0.1
+# age cells of the feed zone
+ZONE_CELLS = 8
+
+def feed_zone(N, V, Q, location, rho_L, nu, geom):
+    '''
+    Engulfment parameters of the feed zone.
+
+    E = micro_mixing_rate at the local dissipation, in series with mesomixing:
+    E_eff = 1 / (1/E + t_s), t_s = A_MESO (L^2/eps)^(1/3), L = (q / (pi u))^(1/2)
+    with q the feed flow and u the local velocity. The zone lives for one
+    circulation time, V / (Fl N D^3), but grows to at most ZONE_MAX of the volume.
+
+    N: impeller speed [rpm]
+    V: liquid volume [L]
+    Q: feed rate [kg/h]
+    location: feed location(s), keys of FEED_LOCATIONS
+    rho_L: liquid (and feed) density [kg/m3]
+    nu: kinematic viscosity [m2/s]
+    geom: geometry.VesselGeometry
+
+    Returns a dict of arrays: q feed flow [m3/s], eps local dissipation [W/kg],
+    E, E_eff [1/s], t_s [s], t_c circulation time [s] and x = ln(zone dilution) [-].
+    '''
+    N = np.asarray(N, dtype=float)
+    V = np.asarray(V, dtype=float)
+    location = np.asarray(location)
+    eps_factor = np.vectorize(lambda loc: FEED_LOCATIONS[loc][0], otypes=[float])(location)
+    u_factor = np.vectorize(lambda loc: FEED_LOCATIONS[loc][1], otypes=[float])(location)
+
+    powered = geom.powered(V)
+    P = e.total_power(geom.impeller_Np, rho_L, N, geom.impeller_diameters, powered)
+    D = e.largest_powered(geom.impeller_diameters, powered)
+    eps = eps_factor * P / (V * rho_L / 1000)
+
+    q = np.asarray(Q, dtype=float) / 3600 / rho_L
+    u = u_factor * f.tip_speed(N, D)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        E = f.micro_mixing_rate(eps, nu)
+        t_s = A_MESO * (q / (np.pi * u) / eps)**(1/3)
+        E_eff = 1 / (1 / E + t_s)
+        t_c = (V / 1000) / (FLOW_NUMBER * N / 60 * D**3)
+        # dilution over one circulation, limited by the largest zone
+        x = np.minimum(E_eff * t_c, np.log1p(ZONE_MAX * (V / 1000) * E_eff / q))
+    return {"q": q, "eps": eps, "E": E, "E_eff": E_eff, "t_s": t_s, "t_c": t_c, "x": x}
+
+def _rates(c, k1a, k2a):
+    # reaction rates of A, B, R, S (species along axis -3) in units of C_A0 per s
+    r1 = k1a * c[..., 0, :, :] * c[..., 1, :, :]
+    r2 = k2a * c[..., 2, :, :] * c[..., 1, :, :]
+    return np.stack([-r1, -r1 - r2, r1 - r2, r2], axis=-3)
+
+def _rhs(tau, y, p):
+    # scaled states (variables, sets[, columns]): zone cell concentrations / C_A0, then
+    # bulk moles / initial moles of A; time scaled by the feed time
+    n_cells, n = p["cells"], p["n"]
+    Y = y.reshape(4 * n_cells + 4, n, -1)
+    zone = Y[:4 * n_cells].reshape(n_cells, 4, n, -1)
+    m = Y[4 * n_cells:]
+
+    # bulk volume / initial volume and bulk concentrations / C_A0
+    v_b = 1 + p["q"] * p["t_feed"] * tau / p["V0"]
+    b = m / v_b
+    upstream = np.concatenate([np.broadcast_to(p["feed"], (1,) + zone.shape[1:]), zone[:-1]])
+
+    E, g = p["E"], p["g"]
+    dzone = E / (g - 1) * upstream + E * b - E * g / (g - 1) * zone + _rates(zone, p["k1a"], p["k2a"])
+    dm = (p["q"] * (p["dilution"] * zone[-1] - (p["dilution"] - 1) * b)) / p["V0"] \
+        + v_b * _rates(b, p["k1a"], p["k2a"])
+    return (p["t_feed"] * np.concatenate([dzone.reshape(4 * n_cells, n, -1), dm])).reshape(y.shape)
+
+def simulate(r, mix, conditions, k1=K1, k2=K2, c_A0=C_A0, feed_ratio=FEED_RATIO,
+             stoichiometry=STOICHIOMETRY, n_cells=ZONE_CELLS, geom=None):
+    '''
+    Semi-batch feed of B into A for a batch of conditions, integrated together
+    with a stiff (BDF) solver. Predicts the Bourne KPI, the yield of the
+    secondary product X_S = 2 S / (R + 2 S) [-], at the end of the feed.
+
+    r: reactor state dict
+    mix: mixture properties dict
+    conditions: one row per condition with "Agitation [rpm]", "Volume [L]",
+                "Feed Rate [kg/h]" and "Feed Location" (keys of FEED_LOCATIONS)
+    k1, k2: rate constants [m3/mol/s]
+    c_A0: initial concentration of A [mol/m3]
+    feed_ratio: fed volume / initial volume [-]
+    stoichiometry: moles of B fed per mole of A [-]
+    n_cells: age cells of the feed zone
+    geom: derived vessel geometry; built from r if None
+
+    Returns the conditions with the predicted KPI and the feed zone parameters.
+    '''
+    from scipy.integrate import solve_ivp
+    from scipy.sparse import identity, kron
+
+    if geom is None:
+        geom = geometry.VesselGeometry(r)
+    rho_L = mix[("Density", "kg/m3")]
+    nu = mix[("Kinematic Viscosity", "m2/s")]
+    V = conditions["Volume [L]"].to_numpy(dtype=float)
+    zone = feed_zone(conditions["Agitation [rpm]"].to_numpy(dtype=float), V,
+                     conditions["Feed Rate [kg/h]"].to_numpy(dtype=float),
+                     conditions["Feed Location"].to_numpy(), rho_L, nu, geom)
+
+    n = len(conditions)
+    V0 = V / 1000
+    col = (slice(None), None)
+    feed = np.zeros((4, n, 1))
+    feed[1] = stoichiometry / feed_ratio
+    x = zone["x"]
+    p = {"cells": n_cells, "n": n, "feed": feed,
+         "q": zone["q"][col], "V0": V0[col], "t_feed": (feed_ratio * V0 / zone["q"])[col],
+         "E": zone["E_eff"][col],
+         "g": np.exp(x / n_cells)[col], "dilution": np.exp(x)[col],
+         "k1a": k1 * c_A0, "k2a": k2 * c_A0}
+
+    # zone and bulk start as charged: A only
+    y0 = np.zeros((4 * n_cells + 4, n))
+    y0[0:4 * n_cells:4] = 1.0
+    y0[4 * n_cells] = 1.0
+    n_vars = 4 * n_cells + 4
+    sparsity = kron(np.ones((n_vars, n_vars)), identity(n), format="csr")
+    sol = solve_ivp(_rhs, (0.0, 1.0), y0.ravel(), method="BDF", t_eval=[1.0], args=(p,),
+                    vectorized=True, jac_sparsity=sparsity, rtol=1e-6, atol=1e-10)
+    if not sol.success:
+        raise RuntimeError(f"Semi-batch simulation failed: {sol.message}")
+
+    Y = sol.y[:, -1].reshape(n_vars, n)
+    cells = Y[:4 * n_cells].reshape(n_cells, 4, n)
+    # moles held in the zone cells, V_j / V0 = q g^j (g - 1) / (E V0)
+    g = p["g"][:, 0]
+    V_cells = zone["q"] * g**np.arange(n_cells)[:, None] * (g - 1) / (zone["E_eff"] * V0)
+    R = Y[4 * n_cells + 2] + np.sum(cells[:, 2] * V_cells, axis=0)
+    S = Y[4 * n_cells + 3] + np.sum(cells[:, 3] * V_cells, axis=0)
+
+    out = conditions.copy()
+    out["X_S"] = 2 * S / (R + 2 * S)
+    out["E (1/s)"] = zone["E"]
+    out["t_s (s)"] = zone["t_s"]
+    out["Feed time (s)"] = p["t_feed"][:, 0]
+    return out
+
+def protocol(r, mix, rpm_mid, V_mid, feed_mid, PV_factor=10, feed_factor=3, location="Surface", **kwargs):
+    '''
+    Predicted KPI at the conditions of the Bourne protocol steps, simulated in one batch:
+    1. agitation at 1/PV_factor, 1 and PV_factor times the centerpoint P/V
+    2. feed rate at 1/feed_factor, 1 and feed_factor times the centerpoint
+    3. feed at each location of FEED_LOCATIONS
+
+    rpm_mid: centerpoint agitation [rpm]
+    V_mid: centerpoint volume [L]
+    feed_mid: centerpoint feed rate [kg/h]
+    location: feed location of steps 1 and 2
+    kwargs: passed to simulate
+
+    Returns {step: conditions with the predicted KPI}.
+    '''
+    rpm = [rpm_mid / PV_factor**(1/3), rpm_mid, rpm_mid * PV_factor**(1/3)]
+    feed = [feed_mid / feed_factor, feed_mid, feed_mid * feed_factor]
+    steps = {1: pd.DataFrame({"Agitation [rpm]": rpm, "Feed Rate [kg/h]": feed_mid, "Feed Location": location},
+                             index=[f"{1/PV_factor} P/V", "P/V", f"{PV_factor} P/V"]),
+             2: pd.DataFrame({"Agitation [rpm]": rpm_mid, "Feed Rate [kg/h]": feed, "Feed Location": location},
+                             index=[f"{1/feed_factor} Q", "Q", f"{feed_factor} Q"]),
+             3: pd.DataFrame({"Agitation [rpm]": rpm_mid, "Feed Rate [kg/h]": feed_mid,
+                              "Feed Location": list(FEED_LOCATIONS)}, index=list(FEED_LOCATIONS))}
+    batch = pd.concat(steps, names=["Step", "Condition"])
+    batch["Volume [L]"] = V_mid
+    res = simulate(r, mix, batch, **kwargs)
+    return {step: res.loc[step] for step in steps}
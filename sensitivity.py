@@ -1,7 +1,12 @@
 import streamlit as st
 import pandas as pd
-import functions as f
+import core
+import assets
+import data
+import materials
+import numpy as np
 import plotly.express as px
+import timing
 st.header("Mixing Sensitivity Analysis")
 st.divider()
 
@@ -23,8 +28,9 @@ try:
     # get reactor iso image
     owner = r[("Owner", "-")]
     reactor = r[("Reactor", "-")]
-    image_path = f"{'assets/reactors/'}{owner}_{reactor}_iso.png"
-    st.image(image_path, width=200)
+    image_path = assets.index().view(owner, reactor, "iso")
+    if image_path is not None:
+        st.image(assets.thumbnail(image_path, 200), width=200)
 except Exception as e:
     error=True
     st.error(f"Error with reactor selection: {e}",
@@ -57,90 +63,25 @@ except Exception as e:
     error=True
 
 
+# temperature range for mixture properties [degC]
+col_T1, col_T2 = st.columns(2)
+T_min = col_T1.number_input("Min temperature (°C)", value=25.0)
+T_max = col_T2.number_input("Max temperature (°C)", value=25.0)
+
 run_analysis = st.button("Check for Mixing Sensitivities",
                          disabled=error)
 st.divider()
+timing.lap("inputs")
 
 # only execute when button is pressed
 if run_analysis:
-    # get reactor and system properties from state variables
-    Vmin = float(r[('Volume Min', 'L')])
-    Vmax = float(r[('Volume Max', 'L')])
-    Nmin = float(r[('Agitation Min', 'rpm')])
-    Nmax = float(r[('Agitation Max', 'rpm')])
-    rho = float(mix[("Density", "kg/m3")])
-    nu = float(mix[("Kinematic Viscosity", "m2/s")])
-
-    # TODO: account for multiple impellers
-    Po = float(r[("Impeller 1 Np", "-")])
-    Di = float(r[("Impeller 1 Diameter", "m")])
-
-    n_points = 20
-
-    # V_range = [Vmin + i*(Vmax-Vmin)/5 for i in range(6)]
-    N_range = [Nmin + i*(Nmax-Nmin)/n_points for i in range(n_points+1)]
-
-    V_series = ['Vmin', 'Vmax']
-    V_vals = [Vmin, Vmax]
-
-    sensitivity_results = []
-    for i, V in enumerate(V_vals):
-        # get mass [kg]
-        M = V * rho / 1000
-        for N in N_range:
-            series = V_series[i]
-            
-            # calculate power input P [W]
-            P = f.power_input(Po=Po, rho_L=rho, N=N, D=Di)
-
-            # *************** Rxn vs Micromixing ****************
-            # Da_micro: micromixing time vs reaction time (Da_micro = tmicro / trxn)
-            # power per unit volume [W/m3]
-            eps = P / (V/1000)
-            # calculate micromixing time [s]
-            tmicro = f.micro_mixing_rate(eps=eps, nu=nu)**(-1)
-            Da_micro = tmicro * rxn_rate
-
-            # *************** Rxn vs Macromixing ****************
-            # Da_macro: macromixing time vs reaction time (Da_macro = tmacro / trxn)
-            # calculate macromixing time [s]
-            tmacro = f.tm2(H=float(r[('Liquid Height', 'm')]),
-                           T=float(r[('Internal Diameter', 'm')]),
-                           D=Di, V=V/1000,
-                           eps=eps,
-                           mu=float(mix[("Dynamic Viscosity", "mPa.s")]),
-                           rho_L=rho, regime="Turbulent")
-            Da_macro = tmacro * rxn_rate
-            
-            # *************** Rxn vs GL Mass Transfer ****************
-            # Da_massT: mass transfer time vs reaction time (Da_massT = tmassT / trxn); tmassT = 1/kla
-
-            kla = f.kLa_gas_drawdown(A=0.07, b=0.53, P=P, M=M)
-            # calculate Damkohler number for mass transfer to reaction (Da = r_rxn / kla)
-            if kla > 0:
-                Da_massT = rxn_rate / kla
-            else:
-                Da_massT = float('inf')
-
-            # **************** Rxn vs Heat Transfer *****************
-
-            Da_heatT = None
-
-            sensitivity_results.append({"Series": series,
-                                "Volume (L)": V,
-                                "Agitation (rpm)": N,
-                                "P/M (W/kg)": P/M,
-                                "P/V (W/m3)": P/(V/1000),
-                                "kla (1/s)": kla,
-                                "tmicro (s)": tmicro,
-                                "tmacro (s)": tmacro,
-                                "Da_micro": Da_micro,
-                                "Da_macro": Da_macro,
-                                "Da_massT": Da_massT,
-                                "Da_heatT": Da_heatT})
-            
-    df_sensitivity = pd.DataFrame(sensitivity_results)
+    # cached vessel geometry (impeller arrays, submergence)
+    geom = st.session_state['reactor_catalog'].geometry(owner, reactor)
+    # kLa constants fitted to the vessel's measurements (literature values if none)
+    kla_A, kla_b = st.session_state['kla_fits'].params(owner, reactor)
+    df_sensitivity = core.sensitivity_sweep(r, mix, rxn_rate, n_points=20, A=kla_A, b=kla_b, geom=geom)
     df_sensitivity.to_csv("sensitivity_results.csv", index=False)
+    timing.lap("sensitivity sweep")
 
     # *************** Rxn vs Micromixing *****************
     st.subheader("Micromixing")
@@ -164,7 +105,9 @@ if run_analysis:
                   line_color="red",
                     annotation_text="Da_micro=1 (system is micromixing limited above line)",
                     annotation_position="top left")
+    timing.lap("figure build")
     st.plotly_chart(fig)
+    timing.lap("render")
 
     micromixing_limited = df_sensitivity[df_sensitivity["Da_micro"] > 1].copy()
     if not micromixing_limited.empty:
@@ -176,7 +119,9 @@ if run_analysis:
         # add horizontal line at Da_micro=1.0
         figx.add_hline(y=1.0, line_dash="dash",
                         line_color="red")
+        timing.lap("figure build")
         st.plotly_chart(figx)
+        timing.lap("render")
 
     # *************** Rxn vs Macromixing *****************
     st.divider()
@@ -201,7 +146,9 @@ if run_analysis:
                   line_color="red",
                     annotation_text="Da_macro=1 (system is macromixing limited above line)",
                     annotation_position="top left")
+    timing.lap("figure build")
     st.plotly_chart(fig2)
+    timing.lap("render")
 
     macromixing_limited = df_sensitivity[df_sensitivity["Da_macro"] > 1].copy()
     if not macromixing_limited.empty:
@@ -213,7 +160,9 @@ if run_analysis:
         # add horizontal line at Da_macro=1.0
         fig3.add_hline(y=1.0, line_dash="dash",
                         line_color="red")
+        timing.lap("figure build")
         st.plotly_chart(fig3)
+        timing.lap("render")
 
     # *************** Rxn vs Mass Transfer *****************
     st.divider()
@@ -239,7 +188,9 @@ if run_analysis:
                     line_color="red",
                     annotation_text="Da_massT=1 (system is gas-liquid mass transfer limited above line)",
                     annotation_position="top right")
+    timing.lap("figure build")
     st.plotly_chart(fig4)
+    timing.lap("render")
 
     # check where Da_massT > 1 in dataframe and plot Da_massT vs agitation speed for those conditions
     mass_transfer_limited = df_sensitivity[df_sensitivity["Da_massT"] > 1].copy()
@@ -252,8 +203,106 @@ if run_analysis:
         # add horizontal line at Da_massT=1.0
         fig5.add_hline(y=1.0, line_dash="dash",
                         line_color="red")
+        timing.lap("figure build")
         st.plotly_chart(fig5)
+        timing.lap("render")
 
     # *************** Rxn vs Heat Transfer *****************
     st.divider()
     st.subheader("Heat Transfer")
+
+    # *************** Da = 1 boundary *****************
+    st.divider()
+    st.subheader("Operating Limits")
+
+    # locate the Da = 1 crossover in volume x agitation space to within 1 rpm
+    df_boundary, n_evals = core.da_boundary(r, mix, rxn_rate, tol=1.0, A=kla_A, b=kla_b, geom=geom)
+    timing.lap("boundary search")
+
+    fig6 = px.line(df_boundary.dropna(subset=["N at Da=1 (rpm)"]),
+                   x="Volume (L)",
+                   y="N at Da=1 (rpm)",
+                   color="Da",
+                   markers=True,
+                   title="Minimum agitation speed for Da < 1 (system is limited below line)")
+    # add horizontal lines at agitation limits
+    fig6.add_hline(y=float(r[('Agitation Max', 'rpm')]), line_dash="dash",
+                   line_color="red",
+                   annotation_text="Agitation Max",
+                   annotation_position="top left")
+    fig6.add_hline(y=float(r[('Agitation Min', 'rpm')]), line_dash="dash",
+                   line_color="grey",
+                   annotation_text="Agitation Min",
+                   annotation_position="bottom left")
+    timing.lap("figure build")
+    st.plotly_chart(fig6)
+    timing.lap("render")
+
+    with st.expander("View Da = 1 boundary table"):
+        st.dataframe(df_boundary, hide_index=True)
+        st.caption(f"{n_evals} model evaluations")
+
+    # *************** Temperature *****************
+    if T_max > T_min:
+        st.divider()
+        st.subheader("Temperature")
+
+        sys_full = st.session_state.sys
+        if "Mass Frac. [-]" not in sys_full.columns:
+            st.warning("Update the mixture on the System page to include temperature effects.",
+                       icon=":material/warning:")
+        else:
+            # mixture properties over the temperature range at the set agitation speed
+            T = np.linspace(T_min, T_max, 11)
+            mix_T = data.material_properties().mixture_at(sys_full, T)
+            df_T = core.temperature_sweep(r, mix_T, T, rxn_rate,
+                                          N=[float(r[('Impeller Speed', 'rpm')])],
+                                          A=kla_A, b=kla_b, geom=geom)
+            timing.lap("temperature sweep")
+
+            fig7 = px.line(df_T.melt(id_vars=["Series", "Temperature (C)"], value_vars=core.DA_KEYS,
+                                     var_name="Da", value_name="Value"),
+                           x="Temperature (C)",
+                           y="Value",
+                           color="Da",
+                           line_dash="Series",
+                           log_y=True,
+                           title=f"Damkohler numbers vs temperature at {r[('Impeller Speed', 'rpm')]:.0f} rpm")
+            fig7.add_hline(y=1.0, line_dash="dash",
+                           line_color="red")
+            timing.lap("figure build")
+            st.plotly_chart(fig7)
+            timing.lap("render")
+            st.caption(f"System table values are taken at {materials.T_REF:g} °C and scaled by the temperature "
+                       "dependence fitted in the materials database; compounds measured at one temperature only "
+                       "keep their values. The reaction rate is not adjusted for temperature.")
+
+# *************** Global sensitivity *****************
+st.divider()
+st.subheader("Global Sensitivity")
+st.write("Sobol indices of the Damkohler numbers with agitation, volume, viscosity, density, "
+         "reaction rate and the kLa constants varied together over the ranges below.")
+
+gsa_samples = st.select_slider("Base samples", options=[2**m for m in range(10, 18)], value=2**14)
+run_gsa = st.button("Run Global Sensitivity", disabled=error)
+
+if run_gsa:
+    geom = st.session_state['reactor_catalog'].geometry(owner, reactor)
+    kla_A, kla_b = st.session_state['kla_fits'].params(owner, reactor)
+    ranges = core.gsa_ranges(r, mix, rxn_rate, A=kla_A, b=kla_b)
+    df_gsa, n_evals = core.global_sensitivity(r, mix, rxn_rate, ranges=ranges, n_samples=gsa_samples,
+                                              A=kla_A, b=kla_b, geom=geom)
+    timing.lap("global sensitivity")
+
+    fig8 = px.bar(df_gsa.melt(id_vars=["Output", "Input"], value_vars=["S1", "ST"],
+                              var_name="Index", value_name="Value"),
+                  x="Input", y="Value", color="Index", barmode="group", facet_col="Output",
+                  title=f"Sobol indices of log10(Da) ({n_evals:,} evaluations)")
+    timing.lap("figure build")
+    st.plotly_chart(fig8)
+    timing.lap("render")
+    with st.expander("Input ranges"):
+        st.dataframe(pd.DataFrame(ranges, index=["Low", "High", "Scale"]).T)
+    with st.expander("Indices"):
+        st.dataframe(df_gsa.pivot(index="Input", columns="Output", values=["S1", "ST"]))
+    st.caption("S1: share of the variance explained by the input alone; ST: including its interactions.")
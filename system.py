@@ -1,11 +1,12 @@
 import pandas as pd
 import streamlit as st
 import numpy as np
+import mixture
 
 st.header("System Properties")
 
 # get all material properties
-df_materials = st.session_state['materials_df'].copy()
+df_materials = st.session_state['materials_df']
 
 # phases
 phases = ["Solid", "Liquid", "Gas"]
@@ -31,56 +32,19 @@ if 'sys' not in st.session_state:
 if 'mixture' not in st.session_state:
     st.session_state.mixture = pd.DataFrame(columns=st.session_state.sys.columns)
 
-# create multi-index for name>unit hierarchy
-def create_new_cols(df):
-    columns = df.columns
-    names = []
-    units = []
-
-    for col in columns:
-        # Split on the last occurrence of '[' to handle names with spaces
-        if '[' in col:
-            name, unit = col.rsplit('[', 1)
-        else:
-            name, unit = col, ''
-        name = name.strip()  # Remove trailing/leading spaces
-        unit = unit.rstrip(']').strip()  # Remove ']' and any spaces
-        names.append(name)
-        units.append(unit)
-
-    # Step 2: Create a MultiIndex from the names and units
-    df.columns = pd.MultiIndex.from_arrays([names, units], names=['Property', 'Units'])
-
-    return df
-
 # updates the mixture properties based on inputs table
 def update_mixture():
 
-    # complete missing cells
-    sys_mod['Mass [kg]'] = np.where(sys_mod['Mass [kg]'].isna(),
-                                     (sys_mod['Volume [L]']/1e3)*sys_mod['Density [kg/m3]'],
-                                     sys_mod['Mass [kg]'])
+    # complete missing cells and add mass/volume fractions
+    sys_full = mixture.complete_system(sys_mod)
 
-    sys_mod['Volume [L]'] = np.where(sys_mod['Volume [L]'].isna(),
-                                      (sys_mod['Mass [kg]'] / sys_mod['Density [kg/m3]']) * 1e3,
-                                      sys_mod['Volume [L]'])
-
-    sys_mod['Density [kg/m3]'] = np.where(sys_mod['Density [kg/m3]'].isna(),
-                                           (sys_mod['Mass [kg]'] / (sys_mod['Volume [L]']/1e3)),
-                                           sys_mod['Density [kg/m3]'])
-    
     # get phases
-    st.session_state.phases = sys_mod['Phase'].unique()
+    st.session_state.phases = sys_full['Phase'].unique()
 
     # check for solids
-    if "Solid" in st.session_state.phases:
-        st.session_state.solid = True
-    else:
-        st.session_state.solid = False
-        # make aprticle size 0 for all rows
-        sys_mod['Particle Size [um]'] = 0.
-
-    df_empty_check = sys_mod.replace('', np.nan).isna()
+    st.session_state.solid = "Solid" in st.session_state.phases
+
+    df_empty_check = sys_full.replace('', np.nan).isna()
     if df_empty_check.any().any():
         st.warning("Some cells are still empty after filling. Please check your inputs.")
         stacked_empty = df_empty_check.stack()
@@ -88,66 +52,36 @@ def update_mixture():
         empty_list = list(empty_cells.index)
         st.write(f"Empty cells at: {empty_list}")
 
-    total_mass = sys_mod['Mass [kg]'].sum()
-    total_volume = sys_mod['Volume [L]'].sum()
-
-    # calculate mass and volume fractions
-    sys_mod["Mass Frac. [-]"] = sys_mod['Mass [kg]'] / total_mass
-    sys_mod["Volume Frac. [-]"] = sys_mod['Volume [L]'] / total_volume
-
-    st.session_state.sys = sys_mod.copy()
-    sys_avg = sys_mod.copy()
+    st.session_state.sys = sys_full.copy()
 
-    # cols to exclude from averaging
-    cols_not_avg = ["Compound", "Phase", "Mass Frac. [-]",
-                    "Volume Frac. [-]", "Volume [L]", "Mass [kg]"]
-
-    for col in sys_avg.columns:
-        # calculate weighted average properties (i.e assumes ideal mixing)
-        if col not in cols_not_avg:
-            # exclude columns with missing values from averaging
-            sys_avg_clean = sys_avg.dropna(subset=[col]).copy()
-            try:
-                sys_avg[col] = (sys_avg_clean[col] * sys_avg_clean["Mass Frac. [-]"]).sum() / sys_avg_clean["Mass Frac. [-]"].sum()
-            except Exception as e:
-                st.warning(f"Error calculating average for {col}: {e}")
-                sys_avg[col] = 0
-
-    mixture = pd.DataFrame(columns=sys_mod.columns)
-
-    mixture['Compound'] = ['Mixture']
-    mixture['Phase'] = ['Liquid']
-    mixture['Volume [L]'] = [sys_mod['Volume [L]'].sum()]
-    mixture['Mass [kg]'] = [sys_mod['Mass [kg]'].sum()]
-    mixture['Mass Frac. [-]'] = [sys_mod['Mass Frac. [-]'].sum()]
-    mixture['Volume Frac. [-]'] = [sys_mod['Volume Frac. [-]'].sum()]
-
-    # get average values for properties
-    for col in sys_avg.columns:
-        if col not in cols_not_avg:
-            # get first value in column, since they're all the same
-            mixture[col] = [sys_avg[col].values[0]]
-
-    mixture['Density [kg/m3]'] = mixture['Mass [kg]'] / (mixture['Volume [L]']/1e3)
-    mixture = pd.concat([sys_mod, mixture], axis=0)
-
-    # create new column names for mixture by extracting the units from [units] and making a tuple (columns, units)
-    mixture = create_new_cols(mixture)
+    mix, errors = mixture.mix_system(sys_full)
+    for msg in errors:
+        st.warning(msg)
 
     # update state variable
-    st.session_state.mixture = mixture
+    st.session_state.mixture = mix
 
 def import_system():
     uploaded_file = st.session_state.sys_upload
     if uploaded_file is not None:
-        df = pd.read_csv(uploaded_file, header=[0, 1])
-        # combine two column headers into one string 'A [B]'
-        df.columns = [f"{col[0]} [{col[1]}]" if ("Unnamed" not in col[1]) else col[0] for col in df.columns]
-        # drop rows where Compound is mixture
-        df = df[df['Compound'] != 'Mixture']
-        st.session_state.sys = df.copy()
+        st.session_state.sys = mixture.read_system(uploaded_file)
         st.success("System imported successfully.")
 
+def import_directory():
+    # read and mix every system file of the directory in one pass
+    try:
+        st.session_state.systems = mixture.read_systems(st.session_state.sys_dir)
+    except (FileNotFoundError, ValueError) as e:
+        st.error(f"Failed to import systems: {e}")
+        return
+    st.session_state.systems_mix = mixture.mix_systems(st.session_state.systems)
+
+def load_system():
+    # components of the selected system from the imported directory
+    name = st.session_state.sys_select
+    st.session_state.sys = st.session_state.systems.loc[name].reset_index(drop=True)
+    st.success(f"System {name} loaded.")
+
 def export_mixture_properties():
     st.session_state.mixture.to_csv("mixture_properties.csv", index=False)
 
@@ -159,6 +93,14 @@ st.text_area("System Inputs Table",
 st.file_uploader("Upload file with system properties", type=["csv"], key="sys_upload",
                  on_change=import_system)
 
+with st.expander("Import a directory of system files"):
+    st.text_input("Directory", "systems", key="sys_dir")
+    st.button("Import Directory", on_click=import_directory)
+    if 'systems' in st.session_state:
+        st.dataframe(st.session_state.systems_mix)
+        st.selectbox("System", st.session_state.systems_mix.index, key="sys_select")
+        st.button("Load System", on_click=load_system)
+
 sys_mod = st.data_editor(st.session_state.sys,
                     num_rows="dynamic",
                     key="system_table",
@@ -1,9 +1,10 @@
 import streamlit as st
 import pandas as pd
+import data
 
 st.header("Theory")
 
-equations = pd.read_csv("properties/equations.csv")
+equations = data.equations()
 equation_meta = equations[['No.', 'Description', 'Source']].copy()
 
 def display_latex_in_dataframe():
@@ -0,0 +1,159 @@
+import collections
+import contextlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Opt-in timing of named sections of the page reruns.
+# mixing_app.py wraps each rerun in rerun(); pages mark their hot paths with
+# section() or lap(). Outside a timed rerun the markers do nothing, so they cost
+# nothing when timing is off. Timings are kept per session and for the whole
+# process (all sessions) to look at the app under load.
+
+# set to 1 to time every session by default
+ENV_ENABLE = "MIXING_APP_TIMING"
+# file the process-wide profile is written to after every timed rerun
+ENV_FILE = "MIXING_APP_TIMING_FILE"
+
+ENABLED = os.environ.get(ENV_ENABLE, "") == "1"
+
+# records kept per profiler; the oldest are dropped first
+MAX_RECORDS = 100_000
+
+class Profiler:
+    '''
+    Section timings of page reruns.
+
+    records: (rerun number, page, section, duration [s]), the last MAX_RECORDS
+    '''
+
+    def __init__(self):
+        self.records = collections.deque(maxlen=MAX_RECORDS)
+        self.reruns = 0
+        self._lock = threading.Lock()
+
+    def add(self, rerun, page, name, seconds):
+        with self._lock:
+            self.records.append((rerun, page, name, seconds))
+
+    def next_rerun(self):
+        with self._lock:
+            self.reruns += 1
+            return self.reruns
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+            self.reruns = 0
+
+    def to_frame(self):
+        '''
+        One row per timed section
+        '''
+        with self._lock:
+            records = list(self.records)
+        return pd.DataFrame(records, columns=["Rerun", "Page", "Section", "Time (s)"])
+
+    def stats(self):
+        '''
+        Statistics per page and section, slowest total first
+        '''
+        df = self.to_frame()
+        if df.empty:
+            return pd.DataFrame(columns=["Page", "Section", "Count", "Total (s)",
+                                         "Mean (ms)", "P95 (ms)", "Max (ms)"])
+        grouped = df.groupby(["Page", "Section"], sort=False)["Time (s)"]
+        stats = pd.DataFrame({"Count": grouped.count(),
+                              "Total (s)": grouped.sum(),
+                              "Mean (ms)": grouped.mean() * 1e3,
+                              "P95 (ms)": grouped.quantile(0.95) * 1e3,
+                              "Max (ms)": grouped.max() * 1e3})
+        return stats.sort_values("Total (s)", ascending=False).reset_index()
+
+    def last(self, page):
+        '''
+        Sections of the last timed rerun of a page
+        '''
+        df = self.to_frame()
+        df = df[df["Page"] == page]
+        return df[df["Rerun"] == df["Rerun"].max()] if not df.empty else df
+
+    def to_json(self):
+        '''
+        Profile as JSON: the per-section statistics and every record
+        '''
+        stats = self.stats()
+        return json.dumps({"stats": stats.replace({np.nan: None}).to_dict("records"),
+                           "records": self.to_frame().to_dict("records")}, indent=1)
+
+    def dump(self, path):
+        '''
+        Write the profile to path (.json, or the statistics as .csv)
+        '''
+        if path.endswith(".csv"):
+            self.stats().to_csv(path, index=False)
+        else:
+            with open(path, "w") as fh:
+                fh.write(self.to_json())
+
+# timings of all sessions in this process
+process = Profiler()
+
+# the rerun timed in this thread (one script thread per session)
+_active = threading.local()
+
+def _record(context, name, seconds):
+    context["profiler"].add(context["session rerun"], context["page"], name, seconds)
+    process.add(context["process rerun"], context["page"], name, seconds)
+
+@contextlib.contextmanager
+def rerun(profiler, page):
+    '''
+    Time a page rerun; section() and lap() calls inside it are recorded for the page.
+
+    profiler: session Profiler
+    page: page title
+    '''
+    start = time.perf_counter()
+    context = {"profiler": profiler, "page": page, "lap": start,
+               "session rerun": profiler.next_rerun(), "process rerun": process.next_rerun()}
+    _active.context = context
+    try:
+        yield
+    finally:
+        _active.context = None
+        _record(context, "rerun", time.perf_counter() - start)
+        path = os.environ.get(ENV_FILE)
+        if path:
+            process.dump(path)
+
+@contextlib.contextmanager
+def section(name):
+    '''
+    Time a named section of the current page rerun (no-op if the rerun is not timed)
+    '''
+    context = getattr(_active, "context", None)
+    if context is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(context, name, time.perf_counter() - start)
+
+def lap(name):
+    '''
+    Record the time since the previous lap (or the start of the rerun) as a named
+    section; marks consecutive stretches of a page script without re-indenting it.
+    '''
+    context = getattr(_active, "context", None)
+    if context is None:
+        return
+    now = time.perf_counter()
+    _record(context, name, now - context["lap"])
+    context["lap"] = now